@@ -0,0 +1,275 @@
+# Análisis estático del programa para /analyze: encuentra sin ejecutar nada lo
+# que /compile solo informa después de correr el programa (variables sin usar,
+# funciones sin llamar) y además los usos antes de asignar y los conflictos de
+# tipos, también en las ramas que una ejecución no recorre.
+#
+# Sigue las reglas del intérprete: las variables se buscan por nombre en un
+# único ámbito global (una función ve sus parámetros, lo que asigna y las
+# globales), el tipo de una variable lo fija su primera asignación y una
+# función existe desde que se ejecuta su declaración.
+from collections import ChainMap
+
+from arrays import BUILTINS
+from typecheck import expression_type
+from nodes import (
+    Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return,
+    Name, UnaryOp, BinOp, Compare, ArrayLiteral, Index, Slice,
+)
+
+def analyze(program):
+    analyzer = Analyzer(program)
+    analyzer.run()
+    return sorted(analyzer.diagnostics, key=lambda diagnostic: diagnostic['line'])
+
+class Analyzer:
+    def __init__(self, program):
+        self.program = program
+        self.diagnostics = []
+        self.functions = {}      # nombre -> FuncDef (la primera declaración)
+        self.assigned = {}       # variable -> línea de su primera asignación
+        self.read = set()        # variables leídas en algún punto
+        self.calls = {}          # función (None = programa principal) -> nombres que llama
+        self.types = {}          # tipos de las variables globales
+        self.reported = set()    # (tipo de aviso, nombre) ya informados
+        self.defined = set()     # variables definidas en todos los caminos
+        self.added = []          # orden en que se definieron, para deshacer
+        self.declared = set()    # funciones ya declaradas
+        self.in_function = False
+        self.collect(program.body, None)
+
+    # Primera pasada: declaraciones, asignaciones, lecturas y llamadas de
+    # todo el programa, incluidas las que están dentro de funciones
+    def collect(self, statements, function):
+        for node in statements:
+            node_type = type(node)
+            if node_type is Assign or node_type is Scan:
+                self.assigned.setdefault(node.name, node.line)
+                if node_type is Assign:
+                    self.collect_expression(node.value, function)
+            elif node_type is Print or node_type is Return:
+                if node.value is not None:
+                    self.collect_expression(node.value, function)
+            elif node_type is Call:
+                self.collect_expression(node, function)
+            elif node_type is Block:
+                self.collect(node.statements, function)
+            elif node_type is If:
+                self.collect_expression(node.condition, function)
+                self.collect(node.body.statements, function)
+                if node.orelse is not None:
+                    self.collect([node.orelse], function)
+            elif node_type is While:
+                self.collect_expression(node.condition, function)
+                self.collect(node.body.statements, function)
+            elif node_type is DoFor:
+                self.collect([node.init, node.update], function)
+                self.collect_expression(node.condition, function)
+                self.collect(node.body.statements, function)
+            elif node_type is FuncDef:
+                self.functions.setdefault(node.name, node)
+                self.calls.setdefault(node.name, set())
+                self.collect(node.body.statements, node.name)
+
+    def collect_expression(self, node, function):
+        node_type = type(node)
+        if node_type is Name:
+            self.read.add(node.id)
+        elif node_type is BinOp:
+            self.collect_expression(node.left, function)
+            self.collect_expression(node.right, function)
+        elif node_type is Compare:
+            self.collect_expression(node.left, function)
+            for comparator in node.comparators:
+                self.collect_expression(comparator, function)
+        elif node_type is UnaryOp:
+            self.collect_expression(node.operand, function)
+        elif node_type is Call:
+            self.calls.setdefault(function, set()).add(node.name)
+            for arg in node.args:
+                self.collect_expression(arg, function)
+        else:
+            for operand in array_operands(node):
+                self.collect_expression(operand, function)
+
+    def report(self, kind, severity, name, line_num, message):
+        self.diagnostics.append({
+            'kind': kind, 'severity': severity, 'name': name, 'line': line_num, 'message': message,
+        })
+
+    def run(self):
+        self.check_statements(self.program.body, self.types)
+        self.in_function = True
+        for func in self.functions.values():
+            for param in func.params:
+                self.define(param)
+            # Sus variables locales se tipan en cada llamada; los parámetros
+            # pueden recibir cualquier tipo
+            self.check_statements(func.body.statements, ChainMap(dict.fromkeys(func.params), self.types))
+            self.undefine(0)
+        self.check_unused()
+
+    # ---- Usos antes de asignar y tipos ----
+
+    # Las variables definidas en todos los caminos hasta el punto actual están
+    # en un único conjunto; cada definición se anota en `added` para deshacer
+    # las de una rama al salir de ella. Así una rama cuesta lo que asigna y no
+    # una copia del conjunto, y el recorrido es lineal en el tamaño del programa.
+    def define(self, name):
+        if name not in self.defined:
+            self.defined.add(name)
+            self.added.append(name)
+
+    # Deshace las definiciones anotadas desde `mark` y las devuelve
+    def undefine(self, mark):
+        names = self.added[mark:]
+        del self.added[mark:]
+        self.defined.difference_update(names)
+        return names
+
+    def check_statements(self, statements, types):
+        for node in statements:
+            self.check_statement(node, types)
+
+    def check_statement(self, node, types):
+        node_type = type(node)
+        if node_type is Assign:
+            self.check_expression(node.value)
+            self.check_type(node, expression_type(node.value, types, self.program.arrays), types)
+            self.define(node.name)
+        elif node_type is Scan:
+            # Un dato de la entrada puede ser number o string
+            self.check_type(node, None, types)
+            self.define(node.name)
+        elif node_type is Print or node_type is Return:
+            if node.value is not None:
+                self.check_expression(node.value)
+        elif node_type is Call:
+            self.check_expression(node)
+        elif node_type is Block:
+            self.check_statements(node.statements, types)
+        elif node_type is If:
+            self.check_expression(node.condition)
+            mark = len(self.added)
+            self.check_statements(node.body.statements, types)
+            body_names = self.undefine(mark)
+            if node.orelse is not None:
+                # Después del if queda definido lo que asignan las dos ramas
+                self.check_statement(node.orelse, types)
+                else_names = set(self.undefine(mark))
+                for name in body_names:
+                    if name in else_names:
+                        self.define(name)
+        elif node_type is While:
+            self.check_expression(node.condition)
+            mark = len(self.added)
+            self.check_statements(node.body.statements, types)
+            self.undefine(mark)
+        elif node_type is DoFor:
+            self.check_statement(node.init, types)
+            self.check_expression(node.condition)
+            # La actualización corre después del cuerpo, con lo que este asignó
+            mark = len(self.added)
+            self.check_statements(node.body.statements, types)
+            self.check_statement(node.update, types)
+            self.undefine(mark)
+        elif node_type is FuncDef:
+            # El cuerpo se revisa aparte; a partir de aquí se puede llamar
+            self.declared.add(node.name)
+
+    def check_expression(self, node):
+        node_type = type(node)
+        if node_type is Name:
+            name = node.id
+            # Una función puede llamarse después de cualquier asignación
+            # global, así que dentro de ella todas cuentan como hechas
+            if name in self.defined or (self.in_function and name in self.assigned):
+                return
+            if name in self.assigned:
+                self.report_once('maybe_undefined', 'warning', name, node.line,
+                                 f'Variable "{name}" puede usarse antes de asignarse')
+            else:
+                self.report_once('undefined_variable', 'error', name, node.line,
+                                 f'Variable no definida: {name}')
+        elif node_type is BinOp:
+            self.check_expression(node.left)
+            self.check_expression(node.right)
+        elif node_type is Compare:
+            self.check_expression(node.left)
+            for comparator in node.comparators:
+                self.check_expression(comparator)
+        elif node_type is UnaryOp:
+            self.check_expression(node.operand)
+        elif node_type is Call:
+            name = node.name
+            # Igual con las funciones: dentro de otra, ya están todas declaradas.
+            # Las predefinidas (len, sum...) existen siempre, salvo que una
+            # función declarada con el mismo nombre las reemplace.
+            if name in BUILTINS and name not in self.functions:
+                if len(node.args) != 1:
+                    self.report('argument_count', 'error', name, node.line,
+                                f'Número incorrecto de argumentos para {name}')
+            elif name not in self.declared and not (self.in_function and name in self.functions):
+                if name in self.functions:
+                    self.report_once('maybe_undefined', 'warning', name, node.line,
+                                     f'Función "{name}" llamada antes de su declaración')
+                else:
+                    self.report_once('undefined_function', 'error', name, node.line,
+                                     f'Función no definida: {name}')
+            elif name in self.functions and len(node.args) != len(self.functions[name].params):
+                self.report('argument_count', 'error', name, node.line,
+                            f'Número incorrecto de argumentos para {name}')
+            for arg in node.args:
+                self.check_expression(arg)
+        else:
+            for operand in array_operands(node):
+                self.check_expression(operand)
+
+    # El tipo de una variable lo fija su primera asignación; en una función,
+    # `types` busca primero en sus variables locales y luego en las globales
+    def check_type(self, node, value_type, types):
+        name = node.name
+        existing_type = types.get(name)
+        if name not in types:
+            types[name] = value_type
+        elif existing_type is not None and value_type is not None and existing_type != value_type:
+            self.report('type_conflict', 'warning', name, node.line,
+                        f'Variable "{name}" es de tipo {existing_type}, no se puede asignar {value_type}')
+
+    def report_once(self, kind, severity, name, line_num, message):
+        if (kind, name) not in self.reported:
+            self.reported.add((kind, name))
+            self.report(kind, severity, name, line_num, message)
+
+    # ---- Variables sin usar y funciones sin llamar ----
+
+    def check_unused(self):
+        for name, line_num in self.assigned.items():
+            if name not in self.read and not name.startswith('__'):
+                self.report('unused_variable', 'warning', name, line_num,
+                            f'⚠️ Variable "{name}" declarada pero no usada')
+
+        # Funciones alcanzables desde el programa principal, siguiendo las
+        # llamadas de cada función alcanzada
+        called = set()
+        pending = list(self.calls.get(None, ()))
+        while pending:
+            name = pending.pop()
+            if name in called or name not in self.functions:
+                continue
+            called.add(name)
+            pending.extend(self.calls.get(name, ()))
+        for name, func in self.functions.items():
+            if name not in called:
+                self.report('unused_function', 'warning', name, func.line,
+                            f'⚠️ Función "{name}" declarada pero nunca usada')
+
+# Subexpresiones de un literal de arreglo, un índice o un corte
+def array_operands(node):
+    node_type = type(node)
+    if node_type is ArrayLiteral:
+        return node.elements
+    if node_type is Index:
+        return [node.value, node.index]
+    if node_type is Slice:
+        return [operand for operand in (node.value, node.start, node.stop) if operand is not None]
+    return []
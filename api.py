@@ -1,520 +1,339 @@
-from flask import Flask, request, jsonify
-from deep_translator import GoogleTranslator
+import gzip
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import re
+from cache import compile_cache
+from incremental import documents
+from workers import POOL_SIZE, WorkerPool
+from streaming import OutputStream, stream_inline
+from responses import parse_shape, shape_response
+from lexer import SourceError, tokenize, columnar_tokens
+from parser import parse_program
+from analyzer import analyze
+from typecheck import conflict_warnings
+from engines import ENGINES, DEFAULT_ENGINE, run_program
+from optimizer import optimize
+from profiler import LineProfile, instrument, measure_phases
+from fuel import parse_budget
+from interpreter import export_variables
+from context import ExecutionContext, parse_input, parse_max_depth
 
 app = Flask(__name__)
 CORS(app)
 
-# Definición de los tokens
-tokens = [
-    ('START', r'\bINICIO\b'),                      # Inicio del programa
-    ('END', r'\bFIN\b'),                           # Fin del programa
-    ('KEYWORD', r'\b(if|else|print|scan|while|doFor|func)\b'),# Palabras clave
-    ('OPERATOR', r'(\+|\-|\*|\/|==|<=|>=|=|%|<|>|&|\|)'),  # Operadores
-    ('IDENTIFIER', r'\b[A-Za-z_][A-Za-z0-9_]*\b'), # Identificadores
-    ('NUMBER', r'\b\d+(\.\d+)?\b'),                # Números (enteros y flotantes)
-    ('STRING', r'\".*?\"'),                        # Cadenas de texto
-    ('SYMBOL', r'[!()\{\};]'),                      # Símbolos como (), {}, !
-    ('COMMENT', r'#.*'),                           # Comentarios
-    ('WHITESPACE', r'\s+'),                        # Espacios en blanco
-    ('NEWLINE', r'!'),                              # Fin de línea
-    ('LBRACE', r'\{'),  # Llave izquierda
-    ('RBRACE', r'\}'),  # Llave derecha
-    ('SYMBOL', r'[!()]'),  # Símbolos restantes (quita { y } de aquí)
-]
-
-logs = []
-unused_vars = {}
-unused_fns = {}
-types = {}
-
-# Función para el analizador léxico
-def lexer(code):
-    pos = 0
-    line_num = 1  # Contador de línea
-    tokens_found = []
-    minified_code = ""
-    
-    while pos < len(code):
-        match = None
-        for token_type, token_regex in tokens:
-            pattern = re.compile(token_regex)
-            match = pattern.match(code, pos)
-            if match:
-                token_value = match.group(0)
-                if token_type != 'WHITESPACE' and token_type != 'COMMENT':
-                    tokens_found.append((token_type, token_value, line_num))  # Añadimos el número de línea
-                    minified_code += token_value
-                if token_type == 'NEWLINE':
-                    line_num += 1  # Incrementamos la línea en caso de 'NEWLINE'
-                pos = match.end(0)
-                line_num += token_value.count('!')  # Incrementamos la línea por cada '!'
-                break
-        if not match:
-            raise SyntaxError(f'Error léxico en la línea {line_num}, posición {pos}: "{code[pos]}"')
-    return tokens_found, minified_code
+# Respuestas JSON más grandes que esto se comprimen si el cliente acepta gzip
+COMPRESS_MIN_BYTES = 1024
 
-def parse_program(tokens):
-    if tokens[0][0] != 'START' or tokens[-1][0] != 'END':
-        raise SyntaxError('El programa debe comenzar con "INICIO" y terminar con "FIN".')
-    
-    in_program = False
-    symbol_table = {
-        '__funciones__': {},  # Nuevo: almacenar funciones
-        '__logs__': {},  # Nuevo: almacenar funciones
-    }
-    current_statement = []
-    brace_stack = []  # Para manejar bloques anidados
-    
-    for token in tokens:
-        if token[0] == 'START':
-            in_program = True
-        elif token[0] == 'END':
-            in_program = False
-            if current_statement:
-                line_num = current_statement[-1][2]
-                raise SyntaxError(f'Error de sintaxis en la línea {line_num}: falta el símbolo "!" al final.')
-            break
-        elif in_program:
-            if token[1] == '!':
-                if not brace_stack:  # Solo procesar si no estamos dentro de un bloque
-                    parse_statement(current_statement, symbol_table)
-                    current_statement = []
-                else:
-                    current_statement.append(token)
-            elif token[1] == '{':
-                brace_stack.append('{')
-                current_statement.append(token)
-            elif token[1] == '}':
-                if not brace_stack:
-                    raise SyntaxError(f'Llave de cierre sin apertura en línea {token[2]}')
-                brace_stack.pop()
-                current_statement.append(token)
-                if not brace_stack:  # Fin del bloque
-                    parse_statement(current_statement, symbol_table)
-                    current_statement = []
-            else:
-                current_statement.append(token)
+@app.after_request
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
-    if in_program:
-        raise SyntaxError('El programa no ha sido cerrado con "FIN".')
-    
-    return symbol_table
+def find_unused_variables(context):
+    unused = []
+    for var, data in context.unused_vars.items():
+        if var.startswith('__'):  # Ignorar variables internas
+            continue
+        if isinstance(data, dict) and not data.get('used', False):
+            unused.append(var)
+    return unused
 
-def parse_statement(tokens, symbol_table):
-    if not tokens:
-        return
+def get_usage_functions_warnings(context):
+    warnings = []
     
-    first_token = tokens[0][1]
-    if first_token == 'if':
-        parse_if(tokens, symbol_table)
-    elif first_token == 'else':
-        parse_else(tokens, symbol_table)
-    elif first_token == 'while':  # Nuevo caso para while
-        parse_while(tokens, symbol_table)
-    elif first_token == 'doFor':  # Nuevo caso para doFor
-        parse_doFor(tokens, symbol_table)
-    elif first_token == 'print':  # Nuevo caso para print
-        parse_print(tokens, symbol_table)
-    elif first_token == 'func':
-        parse_function(tokens, symbol_table)
-    elif tokens[0][1] == '{':
-        parse_block(tokens, symbol_table)
-    else:
-        if len(tokens) > 1 and tokens[1][1] == '(':
-            parse_function_call(tokens, symbol_table)
-        else:
-            parse_assignment(tokens, symbol_table)
+    # Verificar funciones no llamadas
+    for func_name, func_data in context.unused_fns.items():
+        if not func_data['called']:
+            warnings.append(f'⚠️ Función "{func_name}" declarada pero nunca usada')
+            
+    return warnings
 
-def parse_function(tokens, symbol_table):
+# Lexer, parser y ejecución de una petición de /compile; devuelve (respuesta,
+# código HTTP). Corre en el hilo de la petición o en un proceso del pool.
+# Con `emit`, la salida y los avisos se entregan como eventos mientras el
+# programa corre y la respuesta final ya no los incluye.
+def compile_source(data, emit=None):
+    # Solo se recortan los espacios del final: los del principio cuentan para
+    # que líneas, columnas y desplazamientos coincidan con los del editor
+    code = data.get('code', '')
+    if not isinstance(code, str):
+        return {'error': 'El campo "code" debe ser un string.'}, 400
+    code = code.rstrip()
+    engine = data.get('engine', DEFAULT_ENGINE)
+    should_optimize = data.get('optimize', False)
+    should_profile = data.get('profile', False)
+    if not code.strip():
+        return {'error': 'El código no puede estar vacío.'}, 400
+    if engine not in ENGINES:
+        return {'error': f'Motor de ejecución no válido: {engine}. Opciones: {", ".join(ENGINES)}'}, 400
     try:
-        # Validar estructura básica: 'func' + IDENTIFIER + '('
-        if len(tokens) < 4:
-            line_num = tokens[0][2]
-            raise SyntaxError(f'Error en línea {line_num}: Declaración de función incompleta')
-            
-        if tokens[1][0] != 'IDENTIFIER':
-            line_num = tokens[1][2]
-            raise SyntaxError(f'Error en línea {line_num}: Nombre de función no válido')
-            
-        if tokens[2][1] != '(':
-            line_num = tokens[2][2]
-            raise SyntaxError(f'Error en línea {line_num}: Se esperaba "(" después del nombre de la función')
-        
-        func_name = tokens[1][1]
-        
-        # Buscar cierre de parámetros
-        paren_end = None
-        paren_count = 0
-        for i, token in enumerate(tokens[2:]):
-            if token[1] == '(':
-                paren_count += 1
-            elif token[1] == ')':
-                paren_count -= 1
-                if paren_count == 0:
-                    paren_end = i + 2  # Ajustar índice por el slice
-                    break
-        
-        if paren_end is None:
-            line_num = tokens[0][2]
-            raise SyntaxError(f'Error en línea {line_num}: Paréntesis de parámetros no cerrado')
-        
-        # Extraer parámetros
-        params = []
-        for t in tokens[3:paren_end]:
-            if t[0] == 'IDENTIFIER':
-                params.append(t[1])
-            elif t[1] != ',':
-                line_num = t[2]
-                raise SyntaxError(f'Error en línea {line_num}: Carácter no válido en parámetros')
-        
-        # Validar cuerpo
-        body_start = paren_end + 1
-        if body_start >= len(tokens) or tokens[body_start][1] != '{':
-            line_num = tokens[body_start][2] if body_start < len(tokens) else tokens[-1][2]
-            raise SyntaxError('Error en línea {line_num}: Cuerpo de función debe comenzar con {')
-        
-        # Almacenar función
-        symbol_table['__funciones__'][func_name] = {
-            'params': params,
-            'body': tokens[body_start:]
-        }
+        max_steps, timeout = parse_budget(data.get('max_steps'), data.get('timeout'))
+        input_lines = parse_input(data.get('input'))
+        max_depth = parse_max_depth(data.get('max_depth'))
+        fields, token_format = parse_shape(data.get('fields'), data.get('token_format'))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    output = OutputStream(emit) if emit is not None else None
+    context = None
+    try:
+        compiled, cache_hit = compile_cache.compile(code)
+        minified_code, program = compiled.minified_code, compiled.program
+        # La caché guarda los tokens en columnas compactas; la lista de
+        # [tipo, valor, línea] se arma solo si la respuesta la incluye
+        tokens_detected = None
+        if fields is None or 'tokens_found' in fields:
+            if token_format == 'columnar':
+                if compiled.columnar is None:
+                    compiled.columnar = columnar_tokens(compiled.tokens)
+                tokens_detected = compiled.columnar
+            else:
+                tokens_detected = list(compiled.tokens)
+        phases = measure_phases(code) if should_profile else None
+        optimizations = None
+        if should_optimize:
+            program, optimizations = optimize(program)
+        context = ExecutionContext(max_steps, timeout, input_lines, output, max_depth)
+        if should_profile:
+            program, engine = instrument(program), 'tree'
+            context.profile = LineProfile()
+        symbol_table = run_program(program, engine, context)
+        unused = find_unused_variables(context)
+        unused_fns_local = get_usage_functions_warnings(context)
+        # Los conflictos de tipos se conocen antes de ejecutar; los que no
+        # llegaron a ejecutarse no dieron error pero se avisan igual
+        warnings = conflict_warnings(compiled.type_conflicts)
+        warnings += [f'⚠️ Variable "{var}" declarada pero no usada' for var in unused]
 
-        unused_fns[func_name] = {
-            'params': params,
-            'body': tokens[body_start:],
-            'called': False,  # Nuevo: indica si la función fue llamada
-            # 'used_params': used_params  # Parámetros realmente usados
+        response = {
+            'message': 'Compilado con éxito.',
+            'variables': export_variables(symbol_table),
+            'minified_code': minified_code,
+            'tokens_found': tokens_detected,
+            'logs': context.logs,
+            'warnings': warnings,
+            'warnings_fns': unused_fns_local,
+            'optimizations': optimizations,
+            'steps': context.fuel.steps,
+            'cache': {'hit': cache_hit, **compile_cache.stats()},
+            'profile': profile_report(context, phases),
         }
-
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: Estructura de función inválida')
-# Nueva función para procesar llamadas a funciones
-def parse_function_call(tokens, symbol_table):
-    func_name = tokens[0][1]
+        if output is not None:
+            output.flush()
+            emit({'event': 'warnings', 'warnings': warnings, 'warnings_fns': unused_fns_local})
+            del response['logs'], response['warnings'], response['warnings_fns']
+        return shape_response(response, fields), 200
     
-    # print(symbol_table)
+    except SyntaxError as e:
+        # Lo impreso antes del error también llega al cliente
+        if output is not None:
+            output.flush()
+        # Un programa cortado por el límite de pasos es justo el que se quiere
+        # perfilar: el perfil de lo ejecutado acompaña al error
+        response = error_response(e)
+        if context is not None and context.profile is not None:
+            response['profile'] = profile_report(context, phases)
+        return response, 400
 
-    if func_name not in symbol_table['__funciones__'] or not isinstance(symbol_table['__funciones__'][func_name], dict):
-        raise SyntaxError(f'Función no definida: {func_name}')
-    
-    # Obtener argumentos
-    paren_start = tokens.index(('SYMBOL', '(', tokens[0][2]))
-    paren_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    args_tokens = tokens[paren_start+1:paren_end]
-    
-    # Evaluar argumentos
-    args = []
-    current_arg = []
-    for token in args_tokens:
-        if token[1] == ',':
-            args.append(evaluate_expression(current_arg, symbol_table))
-            current_arg = []
-        else:
-            current_arg.append(token)
-    if current_arg:
-        args.append(evaluate_expression(current_arg, symbol_table))
-    
-    # Verificar parámetros
-    func_data = symbol_table['__funciones__'][func_name]
-    if len(args) != len(func_data['params']):
-        raise SyntaxError(f'Número incorrecto de argumentos para {func_name}')
-    
-    # Crear nuevo ámbito
-    local_scope = symbol_table.copy()
-    local_scope.update(zip(func_data['params'], args))
-    
-    # Ejecutar cuerpo de la función
-    parse_block(func_data['body'], local_scope)
-    
-    # # Actualizar símbolos globales
-    # for var in local_scope:
-    #     if var not in symbol_table:
-    #         symbol_table[var] = local_scope[var]
-    unused_fns[func_name]['called'] = True
+def profile_report(context, phases):
+    if context.profile is None:
+        return None
+    return {**context.profile.table(), 'engine': 'tree', 'phases': phases}
 
+# El pool se crea con la primera petición: con el recargador de Flask el
+# módulo se importa también en el proceso que solo vigila los archivos
+execution_pool = None
+execution_pool_lock = threading.Lock()
 
+def get_execution_pool():
+    global execution_pool
+    with execution_pool_lock:
+        if execution_pool is None:
+            execution_pool = WorkerPool(compile_source)
+        return execution_pool
 
-def parse_print(tokens, symbol_table):
-    try:
-        # Buscar paréntesis de la expresión
-        paren_start = tokens.index(('SYMBOL', '(', tokens[0][2]))
-        paren_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: print debe tener la forma print(expresión).')
-    
-    # Evaluar la expresión dentro del print
-    expr_tokens = tokens[paren_start+1:paren_end]
-    result = evaluate_expression(expr_tokens, symbol_table)
-    
-    # Almacenar el resultado en el array global
-    print(result)
-    logs.append(str(result))
+# El cuerpo de cada ruta debe ser un objeto JSON: una lista, un número o un
+# string válidos como JSON no tienen campos que leer
+INVALID_BODY = {'error': 'El cuerpo de la petición debe ser un objeto JSON.'}
 
-def parse_doFor(tokens, symbol_table):
-    # Validar estructura básica
-    if len(tokens) < 2 or tokens[1][1] != '(':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: estructura "doFor" debe ser: doFor (inicialización; condición; actualización) {{...}}')
+def request_object():
+    data = request.json
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
 
-    try:
-        # Buscar paréntesis de condición
-        paren_start = tokens.index(('SYMBOL', '(', tokens[0][2]), 1)  # Busca "(" después de "doFor"
-        paren_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "doFor".')
-    
-    # Obtener las tres partes del for
-    for_parts = tokens[paren_start+1:paren_end]
-    parts = []
-    current_part = []
-    
-    for token in for_parts:
-        if token[1] == ';':
-            parts.append(current_part)
-            current_part = []
+def submit_job(data):
+    if POOL_SIZE > 0:
+        return get_execution_pool().submit(data)
+    return compile_source(data)
+
+# Con "stream": true la respuesta es NDJSON: eventos {"event": "output",
+# "lines": [...]} mientras el programa imprime, {"event": "warnings", ...} al
+# terminar y por último {"event": "result", "status": ..., ...} con el resto
+# de los campos de /compile (o "error").
+@app.route('/compile', methods=['POST'])
+def compile_code():
+    data = request_object()
+    if data is None:
+        return jsonify(INVALID_BODY), 400
+    if data.get('stream'):
+        if POOL_SIZE > 0:
+            messages = get_execution_pool().stream(data)
         else:
-            current_part.append(token)
-    parts.append(current_part)
-    
-    if len(parts) != 3:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: "doFor" necesita tres partes separadas por ";".')
-    
-    init_tokens, condition_tokens, update_tokens = parts
-    
-    # Procesar inicialización (asignación)
-    parse_assignment(init_tokens, symbol_table)
-    
-    # Evaluar condición (debe ser booleana)
-    condition = evaluate_expression(condition_tokens, symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num} en "doFor".')
-    
-    # Procesar cuerpo del doFor (debe estar entre llaves)
-    body_tokens = tokens[paren_end+1:]
-    if not body_tokens or body_tokens[0][1] != '{':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: cuerpo del "doFor" debe estar entre llaves {{}}.')
-    
-    # Ejecutar el bucle
-    while condition:
-        parse_block(body_tokens, symbol_table)
-        parse_assignment(update_tokens, symbol_table)
-        condition = evaluate_expression(condition_tokens, symbol_table)
+            messages = stream_inline(compile_source, data)
+        return Response(stream_events(messages), mimetype='application/x-ndjson')
 
-def parse_while(tokens, symbol_table):
-    try:
-        # Buscar paréntesis de condición
-        cond_start = tokens.index(('SYMBOL', '(', tokens[0][2])) + 1
-        cond_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "while".')
-    
-    # Evaluar condición
-    condition = evaluate_expression(tokens[cond_start:cond_end], symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num} (se esperaba true/false).')
-    
-    # Procesar cuerpo (debe estar entre llaves)
-    body_tokens = tokens[cond_end+1:]
-    if not body_tokens or body_tokens[0][1] != '{':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: cuerpo del "while" debe estar entre llaves {{}}.')
-    
-    parse_block(body_tokens, symbol_table)
+    response, status = submit_job(data)
+    return jsonify(response), status
 
-def parse_block(tokens, symbol_table):
-    if tokens[0][1] != '{' or tokens[-1][1] != '}':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: bloque mal formado.')
-    
-    current_statement = []
-    brace_count = 0  # Contador de bloques anidados
-    
-    for token in tokens[1:-1]:  # Ignorar las llaves externas
-        if token[1] == '{':
-            brace_count += 1
-        elif token[1] == '}':
-            brace_count -= 1
-        
-        # Procesar "!" solo si no estamos dentro de un bloque anidado
-        if token[1] == '!' and brace_count == 0:
-            parse_statement(current_statement, symbol_table)
-            current_statement = []
-        else:
-            current_statement.append(token)
-    
-    if current_statement:
-        line_num = current_statement[-1][2]
-        raise SyntaxError(f'Error en línea {line_num}: falta "!" al final.')
-    
-def parse_if(tokens, symbol_table):
+def stream_events(messages):
     try:
-        # Buscar paréntesis de condición
-        cond_start = tokens.index(('SYMBOL', '(', tokens[0][2])) + 1
-        cond_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "if".')
-    
-    # Evaluar condición
-    condition = evaluate_expression(tokens[cond_start:cond_end], symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num}')
-    
-    # Procesar cuerpo del if SOLO si la condición es verdadera
-    body_tokens = tokens[cond_end+1:]
-    if condition:  # <--- ¡Aquí está el cambio clave!
-        if not body_tokens or body_tokens[0][1] != '{':
-            line_num = tokens[0][2]
-            raise SyntaxError(f'Error en línea {line_num}: cuerpo del "if" debe estar entre llaves.')
-        parse_block(body_tokens, symbol_table)
+        for kind, payload in messages:
+            if kind == 'result':
+                response, status = payload
+                payload = {'event': 'result', 'status': status, **response}
+            yield json.dumps(payload, ensure_ascii=False) + '\n'
+    finally:
+        messages.close()
 
-def parse_else(tokens, symbol_table):
-    if len(tokens) < 2:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: "else" no puede estar vacío.')
-    # Procesa el cuerpo del else
-    parse_statement(tokens[1:], symbol_table)
+MAX_BATCH_PROGRAMS = 1000
 
-def determine_type(value):
-    if isinstance(value, bool):
-        return 'boolean'
-    elif isinstance(value, (int, float)):
-        return 'number'
-    elif isinstance(value, str):
-        return 'string'
-    else:
-        raise SyntaxError(f'Tipo no soportado: {type(value).__name__}')
+# Varios programas en una sola petición (p. ej. para calificar entregas). Cada
+# elemento de "programs" acepta los mismos campos que /compile más un "id"
+# opcional. Los resultados se envían como NDJSON, una línea por programa en
+# el orden en que terminan, con los mismos campos que /compile más "index",
+# "id" y "status".
+@app.route('/compile/batch', methods=['POST'])
+def compile_batch():
+    data = request_object()
+    if data is None:
+        return jsonify(INVALID_BODY), 400
+    programs = data.get('programs')
+    if not isinstance(programs, list) or not programs:
+        return jsonify({'error': 'Se esperaba una lista no vacía de programas en "programs".'}), 400
+    if len(programs) > MAX_BATCH_PROGRAMS:
+        return jsonify({'error': f'Se admiten como máximo {MAX_BATCH_PROGRAMS} programas por lote.'}), 400
+    if not all(isinstance(job, dict) for job in programs):
+        return jsonify({'error': 'Cada programa del lote debe ser un objeto con al menos "code".'}), 400
 
-# Función para procesar asignaciones de variables
-def parse_assignment(tokens, symbol_table):
-    if len(tokens) >= 3 and tokens[0][0] == 'IDENTIFIER' and tokens[1][0] == 'OPERATOR' and tokens[1][1] == '=':
-        var_name = tokens[0][1]
-        expr_tokens = tokens[2:]
+    # Programas idénticos (mismo código, entrada, motor y límites) se
+    # ejecutan una sola vez y el resultado se repite para cada uno
+    groups = {}
+    for index, job in enumerate(programs):
+        key = json.dumps({field: value for field, value in job.items() if field != 'id'}, sort_keys=True)
+        groups.setdefault(key, []).append(index)
+    return Response(stream_batch(programs, list(groups.values())), mimetype='application/x-ndjson')
 
-        if len(expr_tokens) == 1 and expr_tokens[0][0] == 'NUMBER':
-            value = float(expr_tokens[0][1]) if '.' in expr_tokens[0][1] else int(expr_tokens[0][1])
-        elif len(expr_tokens) == 1 and expr_tokens[0][0] == 'STRING':
-            value = expr_tokens[0][1].strip('"')
-        else:
-            filterByIdentifiers = filter(lambda x: x[0] == 'IDENTIFIER', expr_tokens)
-            for(_, token_value, line_num) in filterByIdentifiers:
-                if token_value not in symbol_table:
-                    raise SyntaxError(f'Error de sintaxis en la línea {line_num}: falta el símbolo "!" al final de la declaración.')
-            value = evaluate_expression(expr_tokens, symbol_table)
+def stream_batch(programs, groups):
+    executor = ThreadPoolExecutor(max_workers=max(POOL_SIZE, 1))
+    try:
+        futures = {executor.submit(submit_job, programs[indexes[0]]): indexes for indexes in groups}
+        for future in as_completed(futures):
+            response, status = future.result()
+            for index in futures[future]:
+                result = {'index': index, 'id': programs[index].get('id'), 'status': status, **response}
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+    finally:
+        # Si el cliente corta la conexión no se lanzan los que faltan
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        new_type = determine_type(value)
+def error_response(e):
+    response = {'error': str(e)}
+    if isinstance(e, SourceError):
+        response['position'] = {'line': e.line, 'column': e.column}
+    return response
 
-        if var_name in symbol_table:
-            existing_type = types[var_name]
-            if existing_type != new_type:
-                line_num = tokens[0][2]
-                raise SyntaxError(f'Error en línea {line_num}: Variable "{var_name}" es de tipo {existing_type}, no se puede asignar {new_type}')
-            # Actualizar valor
-            symbol_table[var_name] = value
-        else:
-            # Crear nueva entrada
-            # symbol_table[var_name] = {
-            #     'value': new_value,
-            #     'type': new_type
-            # }
-            symbol_table[var_name] = value
-            unused_vars[var_name] = {
-                'value': value,
-                'used': False  # Inicialmente no usada
-            }
-            types[var_name] = new_type
-    else:
-        line_num = tokens[0][2] if tokens else '?'
-        raise SyntaxError(f'Error de sintaxis en la línea {line_num}.')
+# Análisis estático para el editor, sin ejecutar el programa: devuelve en
+# "diagnostics" las variables sin usar, funciones sin llamar, usos antes de
+# asignar, llamadas a funciones inexistentes y conflictos de tipos, cada uno
+# con kind, severity, name, line y message. Es barato (un recorrido del AST),
+# así que corre en el hilo de la petición; no pasa por la caché de
+# compilación para que cada versión a medio escribir no desplace programas
+# compilados.
+@app.route('/analyze', methods=['POST'])
+def analyze_code():
+    data = request_object()
+    if data is None:
+        return jsonify(INVALID_BODY), 400
+    code = data.get('code', '')
+    if not isinstance(code, str):
+        return jsonify({'error': 'El campo "code" debe ser un string.'}), 400
+    code = code.rstrip()
+    if not code.strip():
+        return jsonify({'error': 'El código no puede estar vacío.'}), 400
+    try:
+        program = parse_program(tokenize(code).columns())
+    except SyntaxError as e:
+        return jsonify(error_response(e)), 400
+    return jsonify({'diagnostics': analyze(program)})
 
-def find_unused_variables(symbol_table):
-    unused = []
-    for var, data in unused_vars.items():
-        if var.startswith('__'):  # Ignorar variables internas
-            continue
-        if isinstance(data, dict) and not data.get('used', False):
-            unused.append(var)
-    return unused
+# Tokens para el resaltado en vivo del editor. Con "text" se abre (o
+# reinicia) una sesión y se devuelven todos los tokens; con "session" y
+# "edits" ([{offset, deleted, inserted}, ...]) se aplican las ediciones en
+# orden y se devuelve por cada una el tramo de tokens que cambió.
+@app.route('/tokens', methods=['POST'])
+def relex_tokens():
+    data = request_object()
+    if data is None:
+        return jsonify(INVALID_BODY), 400
+    session = data.get('session')
+    if session is not None and not isinstance(session, str):
+        return jsonify({'error': 'El campo "session" debe ser un string.'}), 400
 
-def get_usage_functions_warnings():
-    warnings = []
-    
-    # Verificar funciones no llamadas
-    for func_name, func_data in unused_fns.items():
-        if not func_data['called']:
-            warnings.append(f'⚠️ Función "{func_name}" declarada pero nunca usada')
-            
-    return warnings
+    if 'text' in data:
+        if not isinstance(data['text'], str):
+            return jsonify({'error': 'El campo "text" debe ser un string.'}), 400
+        session, document = documents.open(data['text'], session)
+        return jsonify({
+            'session': session,
+            'version': document.version,
+            'tokens': document.all_tokens(),
+        })
 
-# Función para evaluar expresiones aritméticas
-def evaluate_expression(tokens, symbol_table):
-    expr = ""
-    for token_type, token_value, line_num in tokens:
-        if token_type == 'IDENTIFIER':
-            if token_value in symbol_table:
-                if token_value in unused_vars:
-                    unused_vars[token_value]['used'] = True
-                # Si es un string, añadir comillas al valor
-                if isinstance(symbol_table[token_value], str):
-                    expr += f'"{symbol_table[token_value]}"'
-                else:
-                    expr += str(symbol_table[token_value])
-            else:
-                raise SyntaxError(f'Variable no definida en la línea {line_num}: {token_value}')
-        elif token_type == 'STRING':
-            expr += token_value  # Ya incluye comillas
-        elif token_type in ('NUMBER', 'OPERATOR'):
-            expr += token_value
-        else:
-            raise SyntaxError(f'Error de sintaxis en la expresión en la línea {line_num}: {token_value}')
-    try:
-        result = eval(expr)
-    except Exception as e:
-        error_str = str(e)
-        traduccion = GoogleTranslator(source='en', target='es').translate(error_str)
-        raise SyntaxError(f'Error evaluando la expresión: {expr} ({traduccion})')
-    return result
+    document = documents.get(session) if session else None
+    if document is None:
+        return jsonify({'error': 'Sesión no encontrada: envíe el texto completo para abrirla.'}), 404
 
-@app.route('/compile', methods=['POST'])
-def compile_code():
-    code = request.json.get('code', '').strip()
-    unused_vars = {}
-    unused_fns = {}
-    types = {}
-    logs.clear()
-    if not code:
-        return jsonify({'error': 'El código no puede estar vacío.'}), 400
-    
-    try:
-        tokens_detected, minified_code = lexer(code)
-        symbol_table = parse_program(tokens_detected)
-        unused = find_unused_variables(symbol_table)
-        unused_fns_local = get_usage_functions_warnings()
-        warnings = [f'⚠️ Variable "{var}" declarada pero no usada' for var in unused]
+    with document.lock:
+        version = data.get('version')
+        if version is not None and version != document.version:
+            return jsonify({
+                'error': f'Versión desactualizada: se esperaba {document.version}, se recibió {version}.',
+                'version': document.version,
+            }), 409
+
+        changes = []
+        try:
+            for edit in data.get('edits', []):
+                start, deleted, tokens = document.apply_edit(
+                    int(edit.get('offset', 0)),
+                    int(edit.get('deleted', 0)),
+                    edit.get('inserted', ''),
+                )
+                changes.append({'start': start, 'deleted': deleted, 'tokens': tokens})
+        except (AttributeError, TypeError, ValueError) as e:
+            # El documento puede haber quedado a medio editar: se descarta la
+            # sesión para que el editor la vuelva a abrir con el texto completo
+            documents.close(session)
+            return jsonify({'error': str(e)}), 400
 
         return jsonify({
-            'message': 'Compilado con éxito.',
-            'variables': symbol_table,
-            'minified_code': minified_code,
-            'tokens_found': tokens_detected,
-            'logs': logs,
-            'warnings': warnings,
-            'warnings_fns': unused_fns_local
+            'session': session,
+            'version': document.version,
+            'changes': changes,
         })
-    
-    except SyntaxError as e:
-        return jsonify({'error': str(e)}), 400
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,219 @@
+# Arreglos numéricos del lenguaje: [1, 2, 3]. Son arreglos de NumPy de una
+# dimensión (int64 si todos los elementos son enteros, float64 si no) y los
+# operadores del lenguaje se aplican sobre ellos elemento a elemento con las
+# mismas funciones de Python que para los números: operator.add sobre un
+# ndarray ya es la suma vectorizada de NumPy. Las comparaciones devuelven un
+# arreglo de booleanos, que sirve como máscara para indexar.
+# Los enteros de un arreglo tienen 64 bits: una operación cuyo resultado no
+# cabe es un error, nunca un valor que da la vuelta (check_add y compañía).
+#
+# Un arreglo no se modifica nunca: las operaciones, los cortes y los índices
+# devuelven valores nuevos, así que dos variables pueden compartir el mismo.
+# NumPy se importa al crear el primer arreglo, así que un programa que no los
+# usa no paga su importación (benchmarks/bench_startup.py). Hasta entonces
+# ningún valor puede ser un arreglo y `ndarray` es una clase sin instancias;
+# por eso los demás módulos preguntan con `is_array` en lugar de importarla.
+np = None
+
+class ndarray:
+    pass
+
+def load_numpy():
+    global np, ndarray
+    import numpy
+
+    # Los enteros de NumPy son de 64 bits y al desbordarse dan la vuelta sin
+    # avisar; los números del lenguaje no tienen límite. Los arreglos son de
+    # esta subclase, que comprueba cada operación que puede desbordarse.
+    class CheckedArray(numpy.ndarray):
+        def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+            inputs = [value.view(numpy.ndarray) if type(value) is CheckedArray else value for value in inputs]
+            result = getattr(ufunc, method)(*inputs, **kwargs)
+            if type(result) is not numpy.ndarray:
+                return result
+            if method == '__call__' and result.dtype == numpy.int64 and ufunc in OVERFLOW_CHECKS:
+                OVERFLOW_CHECKS[ufunc](*inputs, result)
+            return result.view(CheckedArray)
+
+    OVERFLOW_CHECKS.update({
+        numpy.add: check_add,
+        numpy.subtract: check_subtract,
+        numpy.multiply: check_multiply,
+        numpy.negative: check_negative,
+    })
+    np, ndarray = numpy, CheckedArray
+
+# ---- Desbordamiento de enteros ----
+
+# Operaciones de NumPy con resultado entero y la función que comprueba que no
+# se desbordó: recibe los operandos y el resultado
+OVERFLOW_CHECKS = {}
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+def integer_overflow():
+    return OverflowError('integer array overflow')
+
+def as_int64(value):
+    return np.asarray(value, dtype=np.int64)
+
+# Una suma se desborda si los dos operandos tienen el mismo signo y el
+# resultado el contrario; una resta, si los operandos tienen signos
+# distintos y el resultado no tiene el del primero
+def check_add(left, right, result):
+    left, right = as_int64(left), as_int64(right)
+    if (((left ^ result) & (right ^ result)) < 0).any():
+        raise integer_overflow()
+
+def check_subtract(left, right, result):
+    left, right = as_int64(left), as_int64(right)
+    if (((left ^ right) & (left ^ result)) < 0).any():
+        raise integer_overflow()
+
+# El producto aproximado en decimales señala los elementos que pueden haberse
+# desbordado; esos se multiplican con enteros de Python
+def check_multiply(left, right, result):
+    left, right = np.broadcast_arrays(as_int64(left), as_int64(right))
+    suspect = np.abs(left.astype(np.float64) * right) >= 2.0 ** 62
+    if suspect.any():
+        for a, b in zip(left[suspect].tolist(), right[suspect].tolist()):
+            if not INT64_MIN <= a * b <= INT64_MAX:
+                raise integer_overflow()
+
+def check_negative(operand, result):
+    if (as_int64(operand) == INT64_MIN).any():
+        raise integer_overflow()
+
+# Con los números, dividir entre cero es un error; NumPy por defecto devuelve
+# inf o nan con un aviso. Así los arreglos fallan igual (FloatingPointError,
+# traducido en errors.py). NumPy 2 guarda este modo por hilo (en una variable
+# de contexto), y los programas corren en hilos distintos: peticiones de
+# Flask, lotes de /compile/batch, salida en flujo. Por eso se comprueba en el
+# hilo que crea cada arreglo, que es el que después opera con él.
+def raise_float_errors():
+    state = np.geterr()
+    if state['divide'] != 'raise' or state['invalid'] != 'raise':
+        np.seterr(divide='raise', invalid='raise')
+
+def is_array(value):
+    return type(value) is ndarray
+
+# A partir de este tamaño, print y las variables muestran solo los extremos
+SUMMARY_THRESHOLD = 1000
+SUMMARY_EDGE = 3
+
+# Arreglo a partir de los valores ya evaluados de un literal
+def make_array(values, line_num):
+    if np is None:
+        load_numpy()
+    raise_float_errors()
+    for value in values:
+        if type(value) is not int and type(value) is not float:
+            raise SyntaxError(f'Error en línea {line_num}: los elementos de un arreglo deben ser números, no {value_type(value)}.')
+    if values and all(type(value) is int for value in values):
+        try:
+            return np.array(values, dtype=np.int64).view(ndarray)
+        except OverflowError:
+            raise SyntaxError(f'Error en línea {line_num}: un elemento entero del arreglo es demasiado grande.') from None
+    return np.array(values, dtype=np.float64).view(ndarray)
+
+# a[i] con un entero devuelve el elemento como número (o booleano) de Python;
+# con un arreglo de booleanos o de enteros, el arreglo de los elegidos
+def index_array(array, index, line_num):
+    if type(array) is not ndarray:
+        raise SyntaxError(f'Error en línea {line_num}: solo se puede indexar un arreglo, no {value_type(array)}.')
+    if type(index) is int:
+        if not -len(array) <= index < len(array):
+            raise SyntaxError(f'Error en línea {line_num}: índice {index} fuera del arreglo de tamaño {len(array)}.')
+        return array[index].item()
+    if type(index) is ndarray:
+        try:
+            return array[index]
+        except IndexError:
+            raise SyntaxError(f'Error en línea {line_num}: un arreglo de índices debe tener enteros dentro del arreglo o booleanos del mismo tamaño.') from None
+    raise SyntaxError(f'Error en línea {line_num}: el índice de un arreglo debe ser un número entero, no {describe(index)}.')
+
+# a[inicio:fin]; un extremo omitido llega como None. Como en Python, los
+# extremos fuera de rango se ajustan al tamaño del arreglo.
+def slice_array(array, start, stop, line_num):
+    if type(array) is not ndarray:
+        raise SyntaxError(f'Error en línea {line_num}: solo se puede cortar un arreglo, no {value_type(array)}.')
+    for bound in (start, stop):
+        if bound is not None and type(bound) is not int:
+            raise SyntaxError(f'Error en línea {line_num}: los extremos de un corte deben ser números enteros, no {describe(bound)}.')
+    return array[start:stop]
+
+# Un número no entero se muestra tal cual; otro valor, por su tipo
+def describe(value):
+    return str(value) if type(value) is float else value_type(value)
+
+def value_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, ndarray):
+        return 'array'
+    return type(value).__name__
+
+# ---- Funciones predefinidas ----
+
+def builtin_len(value, line_num):
+    if type(value) is not ndarray and type(value) is not str:
+        raise SyntaxError(f'Error en línea {line_num}: len espera un arreglo o un string, no {value_type(value)}.')
+    return len(value)
+
+# La suma de un arreglo de enteros es un número del lenguaje, sin límite: si
+# la de NumPy puede haberse desbordado se repite con enteros de Python
+def builtin_sum(value, line_num):
+    check_array('sum', value, line_num)
+    total = value.sum().item()
+    if type(total) is int and abs(value.astype(np.float64).sum()) >= 2.0 ** 62:
+        total = sum(value.tolist())
+    return total
+
+def builtin_min(value, line_num):
+    check_array('min', value, line_num)
+    if not len(value):
+        raise SyntaxError(f'Error en línea {line_num}: min de un arreglo vacío.')
+    return value.min().item()
+
+def builtin_max(value, line_num):
+    check_array('max', value, line_num)
+    if not len(value):
+        raise SyntaxError(f'Error en línea {line_num}: max de un arreglo vacío.')
+    return value.max().item()
+
+def check_array(name, value, line_num):
+    if type(value) is not ndarray:
+        raise SyntaxError(f'Error en línea {line_num}: {name} espera un arreglo, no {value_type(value)}.')
+
+# Funciones disponibles sin declararlas, todas de un argumento. Una función
+# declarada con el mismo nombre tiene prioridad.
+BUILTINS = {
+    'len': builtin_len,
+    'sum': builtin_sum,
+    'min': builtin_min,
+    'max': builtin_max,
+}
+
+def call_builtin(func_name, args, line_num):
+    if len(args) != 1:
+        raise SyntaxError(f'Número incorrecto de argumentos para {func_name}')
+    return BUILTINS[func_name](args[0], line_num)
+
+# ---- Presentación ----
+
+# Forma compacta para print y las variables de la respuesta: [1, 2.5, 3], y
+# en arreglos grandes solo los extremos: [0, 1, 2, ..., 997, 998, 999]
+def format_array(array):
+    if len(array) > SUMMARY_THRESHOLD:
+        head = array[:SUMMARY_EDGE].tolist()
+        tail = array[-SUMMARY_EDGE:].tolist()
+        return '[' + ', '.join(map(str, head)) + ', ..., ' + ', '.join(map(str, tail)) + ']'
+    return '[' + ', '.join(map(str, array.tolist())) + ']'
+
+def display_value(value):
+    return format_array(value) if type(value) is ndarray else str(value)
@@ -0,0 +1,249 @@
+# Programas precompilados en disco para la línea de comandos, como los .pyc
+# de Python. Los scripts de corrección ejecutan miles de veces los mismos
+# programas: con un artefacto solo la primera ejecución paga el léxico, el
+# análisis sintáctico, la inferencia de tipos y la compilación a bytecode, y
+# las siguientes ni siquiera importan el lexer ni el parser.
+#
+# Cada código fuente tiene un archivo <crc32 y largo del código>.clc en el
+# directorio de la caché con:
+#   cabecera   número mágico, versión del formato y tamaño de cada sección
+#   versión    la versión del intérprete que lo escribió
+#   código     el código fuente en UTF-8
+#   tipos      los nombres de los tipos de token, en el orden de sus códigos
+#   tokens     las columnas del TokenStream (tipo, inicio, fin y línea) con
+#              los mismos bytes que tienen en memoria
+#   programa   el AST ya marcado por typecheck.annotate_types, con pickle
+#   bytecode   el CodeObject de compiler.compile_program con su tabla de
+#              constantes, también con pickle
+# El archivo se abre con mmap: los tokens son vistas sobre el mapa y las
+# secciones con pickle se decodifican desde él sin leerlo a memoria, la de
+# bytecode solo si el motor es vm.
+#
+# La versión y el código se comparan byte a byte con los actuales, así que
+# el nombre del archivo no necesita un hash criptográfico (hashlib carga
+# OpenSSL, que tarda más que lo que ahorra el artefacto en un programa corto).
+# Un artefacto de otra versión, de otro código, truncado o ilegible se trata
+# como si no existiera: el programa se compila de nuevo y el artefacto se
+# reemplaza. Un código con errores no deja artefacto, y si no se puede
+# escribir en la caché se sigue sin él.
+#
+# Las secciones con pickle pueden ejecutar código al decodificarse, así que
+# la caché es privada: el directorio se crea con permisos 0o700 y solo se
+# abren artefactos del usuario actual que nadie más puede modificar.
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b'CLC\x00'
+FORMAT_VERSION = 2
+SUFFIX = '.clc'
+
+# Mágico, versión del formato, bytes de la versión y del código, cantidad de
+# tokens y bytes de los nombres de tipo, del programa y del bytecode
+HEADER = struct.Struct('<4sH2xIIIIII')
+
+# Módulos de los que depende el contenido de un artefacto
+VERSION_MODULES = ('lexer', 'parser', 'nodes', 'typecheck', 'loops', 'compiler', 'artifacts')
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# CUSTOMLANG_CACHE_DIR o, si no está definida, ~/.cache/customlang
+def default_cache_dir():
+    cache_dir = os.environ.get('CUSTOMLANG_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+    user_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(user_cache, 'customlang')
+
+# Como la de los .pyc, sale de la fecha de modificación y el tamaño de los
+# módulos, que se consultan sin leerlos, además de la versión de Python
+def interpreter_version():
+    parts = [f'{FORMAT_VERSION} {sys.implementation.cache_tag} {sys.byteorder} {array("I").itemsize}']
+    for name in VERSION_MODULES:
+        info = os.stat(os.path.join(ROOT, f'{name}.py'))
+        parts.append(f'{name} {info.st_mtime_ns} {info.st_size}')
+    return '\n'.join(parts).encode()
+
+# Dos códigos con el mismo nombre se reemplazan el artefacto uno a otro, pero
+# nunca se confunden: el código se compara entero al abrirlo
+def artifact_path(cache_dir, data):
+    return os.path.join(cache_dir, f'{zlib.crc32(data):08x}{len(data):x}{SUFFIX}')
+
+# Cada sección empieza alineada a 4 bytes, como las columnas de inicio, fin y
+# línea
+def padding(size):
+    return -size % 4
+
+# Programa compilado, recién analizado o leído de un artefacto. En el
+# segundo caso los tokens y el bytecode se arman desde el mapa al pedirlos.
+class Artifact:
+    def __init__(self, source, stream=None, program=None, code=None, buffer=None, counts=(0,) * 6):
+        self.source = source
+        self.stream = stream
+        self.program = program
+        self.code = code
+        self.buffer = buffer            # memoryview del archivo mapeado
+        # Inicio de cada sección en el archivo: versión, código, nombres de
+        # tipo, columnas de tokens, programa, bytecode y fin
+        version_size, source_size, token_count, types_size, program_size, code_size = counts
+        self.token_count = token_count
+        self.types_size = types_size
+        self.version_offset = HEADER.size
+        self.source_offset = self.version_offset + version_size + padding(version_size)
+        self.types_offset = self.source_offset + source_size + padding(source_size)
+        self.tokens_offset = self.types_offset + types_size + padding(types_size)
+        self.program_offset = self.tokens_offset + token_count + padding(token_count) + 12 * token_count
+        self.code_offset = self.program_offset + program_size
+        self.size = self.code_offset + code_size
+
+    def tokens(self):
+        if self.stream is None:
+            self.stream = MappedTokens(self)
+        return self.stream
+
+    def bytecode(self):
+        if self.code is None:
+            self.code = decode(self.buffer[self.code_offset:self.size])
+            if self.code is None:
+                from compiler import compile_program
+                self.code = compile_program(self.program)
+        return self.code
+
+# Tokens de un artefacto: se indexan y recorren como un lexer.TokenStream
+# (tuplas tipo, valor, línea) sin importar el lexer. Las columnas son vistas
+# sobre el mapa y los nombres de tipo vienen en el propio artefacto.
+class MappedTokens:
+    __slots__ = ('source', 'types', 'kinds', 'starts', 'ends', 'lines')
+
+    def __init__(self, artifact):
+        count, buffer, offset = artifact.token_count, artifact.buffer, artifact.tokens_offset
+        self.source = artifact.source
+        types_end = artifact.types_offset + artifact.types_size
+        self.types = bytes(buffer[artifact.types_offset:types_end]).decode('ascii').split()
+        self.kinds = buffer[offset:offset + count]
+        offset += count + padding(count)
+        self.starts = buffer[offset:offset + 4 * count].cast('I')
+        offset += 4 * count
+        self.ends = buffer[offset:offset + 4 * count].cast('I')
+        offset += 4 * count
+        self.lines = buffer[offset:offset + 4 * count].cast('I')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return (self.types[self.kinds[index]], self.source[self.starts[index]:self.ends[index]], self.lines[index])
+
+    def __iter__(self):
+        source, types = self.source, self.types
+        for kind, start, end, line_num in zip(self.kinds, self.starts, self.ends, self.lines):
+            yield (types[kind], source[start:end], line_num)
+
+# Artefacto del código si hay uno válido en la caché; si no, lo compila y lo
+# guarda. Los errores léxicos o sintácticos se propagan.
+def compile_source(source, cache_dir):
+    data = source.encode('utf-8')
+    path = artifact_path(cache_dir, data)
+    version = interpreter_version()
+    artifact = open_artifact(path, source, data, version)
+    if artifact is not None:
+        artifact.program = decode(artifact.buffer[artifact.program_offset:artifact.code_offset])
+        if artifact.program is not None:
+            return artifact
+
+    from lexer import TOKEN_TYPES, tokenize
+    from parser import parse_program
+    from typecheck import annotate_types
+    from compiler import compile_program
+    stream = tokenize(source)
+    program = parse_program(stream.columns())
+    annotate_types(program)
+    code = compile_program(program)
+    save_artifact(path, cache_dir, version, data, TOKEN_TYPES, stream, program, code)
+    return Artifact(source, stream, program, code)
+
+# Artefacto válido del código sin decodificar nada, o None si no hay uno.
+# Basta para los tokens y para saber que el código no tiene errores de
+# sintaxis: solo se guardan artefactos de códigos sin errores.
+def cached_artifact(source, cache_dir):
+    data = source.encode('utf-8')
+    return open_artifact(artifact_path(cache_dir, data), source, data, interpreter_version())
+
+# Solo archivos del usuario actual que nadie más puede modificar, como los
+# que escribe save_artifact: otro usuario con acceso a la caché no puede
+# dejar uno preparado para que pickle ejecute su código
+def trusted(info):
+    if not hasattr(os, 'getuid'):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+def open_artifact(path, source, data, version):
+    try:
+        with open(path, 'rb') as artifact_file:
+            if not trusted(os.fstat(artifact_file.fileno())):
+                return None
+            mapping = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # No existe, no se puede leer o está vacío
+        return None
+    buffer = memoryview(mapping)
+    if len(buffer) >= HEADER.size:
+        magic, format_version, *counts = HEADER.unpack_from(buffer)
+        artifact = Artifact(source, buffer=buffer, counts=counts)
+        if (magic == MAGIC and format_version == FORMAT_VERSION and len(buffer) == artifact.size
+                and buffer[artifact.version_offset:artifact.version_offset + counts[0]] == version
+                and buffer[artifact.source_offset:artifact.source_offset + counts[1]] == data):
+            return artifact
+    buffer.release()
+    mapping.close()
+    return None
+
+# Objeto de una sección con pickle; None si la sección está dañada. pickle
+# se importa solo si hay algo que decodificar o guardar.
+def decode(section):
+    import pickle
+    try:
+        return pickle.loads(section)
+    except Exception:
+        return None
+
+def save_artifact(path, cache_dir, version, data, token_types, stream, program, code):
+    import pickle
+    import tempfile
+    try:
+        program_data = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        code_data = pickle.dumps(code, pickle.HIGHEST_PROTOCOL)
+    except RecursionError:
+        # Un programa con bloques anidados a gran profundidad se queda sin
+        # artefacto
+        return
+    types = ' '.join(token_types).encode('ascii')
+    kinds = stream.kinds.tobytes()
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(version), len(data),
+                    len(stream), len(types), len(program_data), len(code_data)),
+        version, bytes(padding(len(version))),
+        data, bytes(padding(len(data))),
+        types, bytes(padding(len(types))),
+        kinds, bytes(padding(len(kinds))),
+        stream.starts.tobytes(), stream.ends.tobytes(), stream.lines.tobytes(),
+        program_data, code_data,
+    ]
+    # Se escribe aparte y se renombra: otro proceso que ejecuta el mismo
+    # programa a la vez ve el artefacto anterior o el nuevo, nunca uno a
+    # medias. El directorio, si hay que crearlo, y el archivo (mkstemp) son
+    # solo del usuario.
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as artifact_file:
+                artifact_file.writelines(parts)
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        pass
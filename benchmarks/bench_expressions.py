@@ -0,0 +1,95 @@
+# Microbenchmark del evaluador de expresiones: evaluaciones por segundo de la
+# misma expresión con
+#   - eval de cadenas (implementación anterior de evaluate_expression),
+#   - recorrido recursivo del AST (sin registro de uso ni mensajes de error),
+#   - cierres compilados una vez por sitio (evaluator.evaluate).
+#
+# Uso: python benchmarks/bench_expressions.py [--iterations N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import tokenize  # noqa: E402
+from parser import parse_expression  # noqa: E402
+from nodes import Literal, Name, UnaryOp, BinOp, Compare  # noqa: E402
+from evaluator import (  # noqa: E402
+    evaluate, evaluate_expression, BINARY_OPERATORS, COMPARISON_OPERATORS, UNARY_OPERATORS,
+)
+from context import ExecutionContext  # noqa: E402
+
+EXPRESSIONS = [
+    'i < 100000',
+    's + i * 2',
+    's % 3 == 0',
+    '(a + b) * (a - b) / 2 >= c',
+    '"Hola " + nombre',
+]
+
+SYMBOLS = {'i': 7, 's': 120, 'a': 3.5, 'b': 1.25, 'c': 2, 'nombre': 'Mundo'}
+CONTEXT = ExecutionContext()
+
+# Implementación anterior: reconstruye el código Python y llama a eval()
+def legacy_evaluate_expression(tokens, symbol_table):
+    expr = ""
+    for token_type, token_value, line_num in tokens:
+        if token_type == 'IDENTIFIER':
+            if isinstance(symbol_table[token_value], str):
+                expr += f'"{symbol_table[token_value]}"'
+            else:
+                expr += str(symbol_table[token_value])
+        else:
+            expr += token_value
+    return eval(expr)
+
+# Recorrido recursivo del AST, sin compilar
+def walk(node, symbol_table):
+    node_type = type(node)
+    if node_type is Literal:
+        return node.value
+    elif node_type is Name:
+        return symbol_table[node.id]
+    elif node_type is BinOp:
+        return BINARY_OPERATORS[node.op](walk(node.left, symbol_table), walk(node.right, symbol_table))
+    elif node_type is Compare:
+        left = walk(node.left, symbol_table)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = walk(comparator, symbol_table)
+            if not COMPARISON_OPERATORS[op](left, right):
+                return False
+            left = right
+        return True
+    elif node_type is UnaryOp:
+        return UNARY_OPERATORS[node.op](walk(node.operand, symbol_table))
+
+def rate(fn, args, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(*args)
+    return iterations / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluaciones por segundo del evaluador de expresiones')
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f'{"expresión":<30} {"eval()":>12} {"AST":>12} {"compilado":>12}  evals/s')
+    for source in EXPRESSIONS:
+        tokens = tokenize(source)
+        node, _ = parse_expression(tokens.columns(), 0)
+
+        expected = legacy_evaluate_expression(tokens, SYMBOLS)
+        if evaluate(node, SYMBOLS, CONTEXT) != expected or evaluate_expression(tokens, SYMBOLS, CONTEXT) != expected:
+            print(f'ERROR: resultado distinto para {source}')
+            return 1
+
+        legacy = rate(legacy_evaluate_expression, (tokens, SYMBOLS), max(1, args.iterations // 10))
+        walked = rate(walk, (node, SYMBOLS), args.iterations)
+        compiled = rate(evaluate, (node, SYMBOLS, CONTEXT), args.iterations)
+        print(f'{source:<30} {legacy:>12,.0f} {walked:>12,.0f} {compiled:>12,.0f}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
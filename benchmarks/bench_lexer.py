@@ -0,0 +1,92 @@
+# Prueba de rendimiento del analizador léxico: compara el lexer de una sola
+# pasada (lexer.lexer) contra la implementación anterior, que recompilaba cada
+# patrón en cada posición. Verifica que ambos produzcan los mismos tokens y
+# reporta el throughput en MB/s.
+#
+# Uso: python benchmarks/bench_lexer.py [--size MB] [--repeat N]
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lexer import lexer, tokens  # noqa: E402
+
+SAMPLE_BODY = '''x = 1!
+func saludar (nombre) {
+  print("Hola " + nombre)!
+}!
+if( x == 1 )
+{
+  test=10!  # comentario
+  print("Hola Mundo")!
+}!
+doFor (i = 0; i < 5; i = i + 1){
+    total = total + i * 2.5!
+}!
+'''
+
+# Implementación anterior, conservada solo como referencia para la comparación
+def legacy_lexer(code):
+    pos = 0
+    line_num = 1
+    tokens_found = []
+    minified_code = ""
+
+    while pos < len(code):
+        match = None
+        for token_type, token_regex in tokens:
+            pattern = re.compile(token_regex)
+            match = pattern.match(code, pos)
+            if match:
+                token_value = match.group(0)
+                if token_type not in ['WHITESPACE', 'COMMENT']:
+                    tokens_found.append((token_type, token_value, line_num))
+                    minified_code += token_value
+                pos = match.end(0)
+                # Como en el lexer actual, la línea es la del texto: cuenta
+                # saltos de línea y no símbolos "!"
+                line_num += token_value.count('\n')
+                break
+        if not match:
+            raise SyntaxError(f'Error léxico en la línea {line_num}, posición {pos}: "{code[pos]}"')
+    return tokens_found, minified_code
+
+def build_source(size_mb):
+    repeats = max(1, int(size_mb * 1024 * 1024) // len(SAMPLE_BODY))
+    return 'INICIO\n' + SAMPLE_BODY * repeats + 'FIN'
+
+def measure(fn, code, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(code)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput del analizador léxico')
+    parser.add_argument('--size', type=float, default=1.0, help='tamaño de la fuente en MB')
+    parser.add_argument('--repeat', type=int, default=3, help='repeticiones (se toma la mejor)')
+    args = parser.parse_args()
+
+    code = build_source(args.size)
+    size_mb = len(code.encode('utf-8')) / (1024 * 1024)
+
+    new_time, new_result = measure(lexer, code, args.repeat)
+    old_time, old_result = measure(legacy_lexer, code, 1)
+
+    if (list(new_result[0]), new_result[1]) != old_result:
+        print('ERROR: los tokens no coinciden con la implementación anterior')
+        return 1
+
+    print(f'fuente: {size_mb:.2f} MB, {len(new_result[0])} tokens')
+    print(f'lexer anterior:      {size_mb / old_time:8.2f} MB/s')
+    print(f'lexer de una pasada: {size_mb / new_time:8.2f} MB/s')
+    print(f'aceleración:         {old_time / new_time:8.1f}x')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Tamaño y tiempo de codificación de la respuesta de /compile para un programa
+# grande, con cada opción de forma de la respuesta: tokens como lista o en
+# columnas, solo algunos campos y compresión gzip.
+#
+# Uso: python benchmarks/bench_response.py [--statements N] [--repeat N]
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.setdefault('CUSTOMLANG_WORKERS', '0')
+from api import app, compile_source  # noqa: E402
+
+STATEMENT_BLOCK = '''total = total + i * 2!
+if (total % 3 == 0) {
+  cuenta = cuenta + 1!
+} else {
+  resto = total % 7!
+}
+'''
+
+SHAPES = [
+    ('completa (tokens en lista)', {}),
+    ('tokens en columnas', {'token_format': 'columnar'}),
+    ('columnas sin minified_code', {'token_format': 'columnar', 'fields': [
+        'message', 'variables', 'tokens_found', 'logs', 'warnings', 'warnings_fns', 'steps',
+    ]}),
+    ('solo logs y avisos', {'fields': ['message', 'logs', 'warnings', 'warnings_fns']}),
+]
+
+def build_program(statements):
+    blocks = max(1, statements // 4)
+    return 'INICIO\ntotal = 0!\ncuenta = 0!\nresto = 0!\ni = 1!\n' + STATEMENT_BLOCK * blocks + 'print(total)!\nFIN'
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description='Tamaño y tiempo de codificación de la respuesta de /compile')
+    parser.add_argument('--statements', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    code = build_program(args.statements)
+    print(f'Programa: {len(code) / 1024:.0f} KB, {code.count(chr(10))} líneas')
+    print(f'{"forma":<28} {"JSON":>10} {"codificar":>10} {"gzip":>10} {"comprimir":>10}')
+    with app.app_context():
+        for name, shape in SHAPES:
+            response, status = compile_source({'code': code, **shape})
+            if status != 200:
+                print(f'ERROR: {response}')
+                return 1
+            body, encode = best_time(lambda: app.json.dumps(response).encode('utf-8'), args.repeat)
+            compressed, compress = best_time(lambda: gzip.compress(body, compresslevel=6), args.repeat)
+            print(f'{name:<28} {len(body) / 1024:>7.1f} KB {encode * 1000:>7.2f} ms '
+                  f'{len(compressed) / 1024:>7.1f} KB {compress * 1000:>7.2f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# Tiempo de arranque de la línea de comandos (python -m customlang). Para cada
+# comando mide, con -X importtime, cuánto tardan los módulos que importa además
+# de los que ya carga el propio intérprete, y el tiempo total del proceso.
+# Termina con error si algún comando pasa su presupuesto de importación, para
+# poder usarlo en CI. Los comandos se miden con el artefacto precompilado del
+# programa ya guardado (artifacts.py), en una caché temporal, y con --no-cache.
+#
+# Uso: python benchmarks/bench_startup.py [--repeat N] [--budget-scale X]
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROGRAM = '''INICIO
+total = 0!
+doFor (i = 1; i <= 10; i = i + 1) {
+  total = total + i!
+}
+print(total)!
+FIN
+'''
+
+# (comando, presupuesto de importación en ms). Sin artefacto check importa lo
+# mismo que run: nodes, con dataclasses, inspect y ast. Con artefacto run
+# también los importa para decodificar el AST.
+COMMANDS = [
+    (['check'], 15),
+    (['tokens'], 15),
+    (['run'], 45),
+    (['run', '--engine', 'vm'], 45),
+    (['check', '--no-cache'], 45),
+    (['run', '--no-cache'], 45),
+    (['run', '--engine', 'vm', '--no-cache'], 45),
+]
+
+# Módulos importados por el proceso y su tiempo propio en microsegundos
+def import_times(args):
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+def best_wall_time(args, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de python -m customlang')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiplica los presupuestos (para máquinas lentas)')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as source:
+        source.write(PROGRAM)
+    # Los procesos heredan la caché temporal; el primer check guarda el artefacto
+    cache_dir = tempfile.mkdtemp()
+    os.environ['CUSTOMLANG_CACHE_DIR'] = cache_dir
+    subprocess.run([sys.executable, '-m', 'customlang', 'check', source.name], cwd=ROOT, capture_output=True, check=True)
+    try:
+        baseline = {}
+        for _ in range(args.repeat):
+            baseline.update(import_times(['-c', 'pass']))
+        base_wall = best_wall_time(['-c', 'pass'], args.repeat)
+        print(f'Intérprete sin nada: {base_wall * 1000:.1f} ms')
+        print(f'{"comando":<28} {"importación":>12} {"presupuesto":>12} {"proceso":>10}  módulos más lentos')
+
+        failed = False
+        for command, budget in COMMANDS:
+            cli_args = ['-m', 'customlang', *command, source.name]
+            # Mejor tiempo de cada módulo entre las repeticiones
+            times = {}
+            for _ in range(args.repeat):
+                for name, self_us in import_times(cli_args).items():
+                    if name not in baseline:
+                        times[name] = min(self_us, times.get(name, self_us))
+            total_ms = sum(times.values()) / 1000
+            limit = budget * args.budget_scale
+            wall = best_wall_time(cli_args, args.repeat)
+            slowest = ', '.join(f'{name} {us / 1000:.1f}' for name, us in sorted(times.items(), key=lambda item: -item[1])[:3])
+            mark = '' if total_ms <= limit else '  <- excede el presupuesto'
+            failed = failed or total_ms > limit
+            print(f'{" ".join(command):<28} {total_ms:>9.1f} ms {limit:>9.0f} ms {wall * 1000:>7.1f} ms  {slowest}{mark}')
+        return 1 if failed else 0
+    finally:
+        os.unlink(source.name)
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# Suite de benchmarks con cargas fijas para saber si un cambio hace a
+# CustomLang más rápido o más lento. Las cargas salen de los programas de
+# ejemplos.txt y de generadores sintéticos que los escalan:
+#   lexer       fuente de ~1 MB hecha con los ejemplos repetidos
+#   parser      bloques if/while anidados a gran profundidad
+#   doFor       bucles de 10^5 (árbol) y 10^6 (vm) iteraciones
+#   aritmética  expresiones largas dentro de un bucle
+#   llamadas    funciones declaradas y llamadas en un bucle
+#   ejemplos    los programas de ejemplos.txt, de la fuente a la salida
+#   /compile    petición completa con el cliente de pruebas de Flask
+#
+# Cada carga informa operaciones por segundo (la unidad depende de la carga:
+# bytes, tokens, iteraciones, peticiones) y el pico de memoria de una
+# ejecución. Con --save se guarda el resultado como línea base y con --compare
+# se marca como regresión toda carga que sea más lenta o use más memoria que la
+# línea base por encima del umbral; en ese caso el script sale con 1.
+#
+# Uso: python benchmarks/suite.py [--only NOMBRE ...] [--scale X] [--repeat N]
+#                                 [--save ARCHIVO] [--compare ARCHIVO] [--threshold X]
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('CUSTOMLANG_WORKERS', '0')
+from lexer import lexer, tokenize  # noqa: E402
+from parser import parse_program  # noqa: E402
+from engines import run_program  # noqa: E402
+from context import ExecutionContext  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# ---- Programas ----
+
+# Programas de ejemplos.txt que se pueden ejecutar: cada uno va de INICIO a
+# FIN; los que tienen errores a propósito se descartan
+def load_examples():
+    with open(os.path.join(ROOT, 'ejemplos.txt'), encoding='utf-8') as examples_file:
+        text = examples_file.read()
+    programs = []
+    for match in re.finditer(r'^INICIO\b.*?^FIN\b', text, re.MULTILINE | re.DOTALL):
+        code = match.group(0)
+        try:
+            execute(code, 'tree')
+        except SyntaxError:
+            continue
+        programs.append(code)
+    return programs
+
+def execute(code, engine):
+    context = ExecutionContext(max_steps=0, timeout=0)
+    run_program(parse_program(tokenize(code).columns()), engine, context)
+    return context
+
+def nested_blocks(depth):
+    lines = ['x = 0!']
+    for level in range(depth):
+        indent = '  ' * level
+        keyword = 'if' if level % 2 == 0 else 'while'
+        lines.append(f'{indent}{keyword} (x < {level + 1}) {{')
+        lines.append(f'{indent}  x = x + 1!')
+    for level in reversed(range(depth)):
+        lines.append('  ' * level + '}')
+    return '\n'.join(lines)
+
+def counted_loop(iterations, body):
+    return f'INICIO\ntotal = 0!\ndoFor (i = 0; i < {iterations}; i = i + 1) {{\n{body}\n}}\nprint(total)!\nFIN'
+
+ARITHMETIC_BODY = '''  a = (i * 3 + 7) % 11!
+  b = (a * a - i / 4) * 2 + (i % 5) * (a - 1)!
+  total = total + b - a * 2 + (i + 1) % 3!'''
+
+# Cada llamada trabaja sobre su propio ámbito; escalar llama a cuadrado para
+# medir también llamadas anidadas
+FUNCTION_CALLS = '''func cuadrado (n) {
+  r = n * n + 1!
+}
+func escalar (n) {
+  cuadrado(n * 2)!
+}
+'''
+
+# ---- Cargas ----
+
+# Cada generador devuelve (función sin argumentos, operaciones por llamada,
+# unidad); `scale` multiplica el tamaño
+def workload_lexer(scale, examples):
+    source = '\n'.join(examples)
+    code = source * max(1, int(1_000_000 * scale) // len(source))
+    return (lambda: lexer(code)), len(code), 'bytes'
+
+def workload_parser(scale, examples):
+    block = nested_blocks(100)
+    code = 'INICIO\n' + '\n'.join([block] * max(1, int(100 * scale))) + '\nFIN'
+    tokens_detected = tokenize(code)
+    return (lambda: parse_program(tokens_detected.columns())), len(tokens_detected), 'tokens'
+
+def workload_dofor(iterations, engine):
+    def build(scale, examples):
+        count = max(1, int(iterations * scale))
+        code = counted_loop(count, '  total = total + i!')
+        return (lambda: execute(code, engine)), count, 'iteraciones'
+    return build
+
+def workload_arithmetic(scale, examples):
+    count = max(1, int(100_000 * scale))
+    code = counted_loop(count, ARITHMETIC_BODY)
+    return (lambda: execute(code, 'vm')), count, 'iteraciones'
+
+def workload_calls(scale, examples):
+    count = max(1, int(100_000 * scale))
+    code = counted_loop(count, '  escalar(i)!').replace('total = 0!', 'total = 0!\n' + FUNCTION_CALLS)
+    return (lambda: execute(code, 'tree')), count, 'llamadas'
+
+def workload_examples(scale, examples):
+    rounds = max(1, int(200 * scale))
+
+    def run():
+        for _ in range(rounds):
+            for code in examples:
+                execute(code, 'tree')
+    return run, rounds * len(examples), 'programas'
+
+# Incluye la caché de compilación de api.py: a partir de la segunda petición
+# de cada programa se mide el camino que recorre un cliente que recompila
+def workload_http(scale, examples):
+    from api import app
+    client = app.test_client()
+    rounds = max(1, int(50 * scale))
+
+    def run():
+        for _ in range(rounds):
+            for code in examples:
+                response = client.post('/compile', json={'code': code})
+                if response.status_code != 200:
+                    raise RuntimeError(f'/compile respondió {response.status_code}: {response.get_data(as_text=True)}')
+    return run, rounds * len(examples), 'peticiones'
+
+WORKLOADS = {
+    'lexer_1mb': workload_lexer,
+    'parser_anidado': workload_parser,
+    'dofor_arbol_1e5': workload_dofor(100_000, 'tree'),
+    'dofor_vm_1e6': workload_dofor(1_000_000, 'vm'),
+    'aritmetica_vm': workload_arithmetic,
+    'llamadas_funciones': workload_calls,
+    'ejemplos': workload_examples,
+    'http_compile': workload_http,
+}
+
+# ---- Medición ----
+
+def measure(build, scale, repeat, examples):
+    fn, ops, unit = build(scale, examples)
+    fn()  # Calentamiento: cachés de expresiones, importaciones, etc.
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    # La memoria se mide aparte: tracemalloc hace todo más lento
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ops_per_sec': ops / best, 'unit': unit, 'seconds': best, 'peak_kb': peak / 1024}
+
+# Cambios respecto a la línea base: (carga, velocidad, memoria) como
+# variaciones relativas, y las que cuentan como regresión. Las variaciones de
+# memoria por debajo de MEMORY_NOISE_KB no cuentan: los bucles usan pocos KB
+# y ahí cualquier asignación suelta parece un gran porcentaje.
+MEMORY_NOISE_KB = 64
+
+def compare(results, baseline, threshold):
+    changes, regressions = [], []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        speed = result['ops_per_sec'] / previous['ops_per_sec'] - 1
+        memory = result['peak_kb'] / previous['peak_kb'] - 1 if previous['peak_kb'] else 0
+        changes.append((name, speed, memory))
+        if speed < -threshold:
+            regressions.append(f'{name}: {-speed:.0%} más lento')
+        if memory > threshold and result['peak_kb'] - previous['peak_kb'] > MEMORY_NOISE_KB:
+            regressions.append(f'{name}: {memory:.0%} más memoria')
+    return changes, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Suite de benchmarks de CustomLang')
+    parser.add_argument('--only', nargs='+', choices=WORKLOADS, help='cargas a medir (por defecto: todas)')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplica el tamaño de las cargas')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='ARCHIVO', help='guarda el resultado como JSON (línea base)')
+    parser.add_argument('--compare', metavar='ARCHIVO', nargs='?', const=BASELINE,
+                        help=f'compara con una línea base (por defecto: {os.path.relpath(BASELINE, ROOT)})')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='variación relativa que cuenta como regresión (por defecto: %(default)s)')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('scale') != args.scale:
+            print(f'Aviso: la línea base usa --scale {baseline.get("scale")}, la comparación no es directa')
+
+    examples = load_examples()
+    print(f'{len(examples)} programas de ejemplos.txt')
+    results = {}
+    for name in args.only or WORKLOADS:
+        results[name] = result = measure(WORKLOADS[name], args.scale, args.repeat, examples)
+        print(f'{name:<20} {result["ops_per_sec"]:>14,.0f} {result["unit"]}/s '
+              f'{result["seconds"] * 1000:>9.1f} ms {result["peak_kb"]:>10,.0f} KB')
+
+    status = 0
+    if baseline is not None:
+        changes, regressions = compare(results, baseline, args.threshold)
+        for name, speed, memory in changes:
+            print(f'{name:<20} velocidad {speed:>+7.1%}  memoria {memory:>+7.1%}')
+        if regressions:
+            print('Regresiones:')
+            for regression in regressions:
+                print(f'  {regression}')
+            status = 1
+        else:
+            print('Sin regresiones respecto a la línea base')
+
+    if args.save:
+        report = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'scale': args.scale,
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+            report_file.write('\n')
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
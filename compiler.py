@@ -0,0 +1,438 @@
+# Compilador del AST a bytecode lineal para la máquina virtual (vm.py).
+# Cada instrucción es una tupla (opcode, argumento); las variables se resuelven
+# en tiempo de compilación a índices (slots) de un arreglo en lugar de buscarse
+# por nombre en un diccionario.
+#
+# Las formas más comunes de los bucles tienen instrucciones propias que hacen
+# en un solo despacho lo que harían tres o cuatro: un operador con una
+# variable o una constante como operandos (i % 7, a * b), la condición i < n
+# con su salto y la actualización x = x + c. Como el intérprete de árbol, los
+# bucles contados (loops.py) calculan sus subexpresiones invariantes una vez
+# por ejecución del bucle.
+from math import copysign
+
+from nodes import (
+    Program, Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return,
+    Literal, Name, UnaryOp, BinOp, Compare, ArrayLiteral, Index, Slice, Hoisted,
+)
+from loops import counter_step, operands
+from evaluator import BINARY_OPERATORS, COMPARISON_OPERATORS
+
+# ---- Opcodes ----
+LOAD_CONST = 0
+LOAD_FAST = 1
+STORE_FAST = 2
+LOAD_GLOBAL = 3
+BINARY_OP = 4                 # (función, op): los dos valores del tope
+UNARY_NEG = 5
+UNARY_POS = 6
+JUMP = 7
+JUMP_IF_FALSE = 8
+JUMP_IF_FALSE_OR_POP = 9
+DUP_TOP = 10
+ROT_TWO = 11
+ROT_THREE = 12
+POP_TOP = 13
+PRINT = 14
+DEFINE_FUNC = 15
+CALL = 16
+RETURN = 17
+TICK = 18
+SCAN = 19
+FOR_STEP = 20
+BUILD_ARRAY = 21
+INDEX = 22
+SLICE = 23
+# Instrucciones combinadas. Los operadores (aritméticos y comparaciones)
+# llevan en el argumento la función de operator que aplican y su símbolo, que
+# se usa en los mensajes de error.
+BINARY_FAST_CONST = 24        # (slot, constante, función, op): apila x op c
+BINARY_FAST_FAST = 25         # (slot, slot, función, op): apila x op y
+BINARY_CONST = 26             # (constante, función, op): tope op c
+BINARY_FAST = 27              # (slot, función, op): tope op x
+COMPARE_FAST_CONST_JUMP = 28  # (slot, constante, función, op, destino): salta si x op c es falso
+COMPARE_FAST_FAST_JUMP = 29   # (slot, slot, función, op, destino): salta si x op y es falso
+INPLACE_FAST_CONST = 30       # (slot, constante, función, op): x = x op c
+LOAD_HOISTED = 31             # (slot, destino): apila el invariante y salta si ya se calculó
+STORE_HOISTED = 32            # slot: guarda el tope como valor del invariante
+CLEAR_HOISTED = 33            # slots: olvida los invariantes al entrar al bucle
+
+OPNAMES = {value: name for name, value in globals().items() if name.isupper() and isinstance(value, int)}
+
+OPERATORS = {**BINARY_OPERATORS, **COMPARISON_OPERATORS}
+UNARY_OPCODES = {'-': UNARY_NEG, '+': UNARY_POS}
+
+# Sentencias que cierran un tramo de TICK: ejecutan sentencias anidadas con
+# sus propios pasos, o (return) las siguientes pueden no ejecutarse. También
+# cierra el tramo una sentencia simple que llama a una función en una expresión.
+CONTROL_STATEMENTS = (Block, If, While, DoFor, Call, Return)
+
+# Código compilado del programa principal o de una función
+class CodeObject:
+    def __init__(self, name, params=(), line=1):
+        self.name = name
+        self.params = list(params)
+        self.line = line
+        self.instructions = []
+        self.lines = []           # Línea de origen de cada instrucción
+        self.consts = []
+        self.varnames = list(params)  # Nombre de cada slot local
+        self.copy_in = []         # (slot local, slot global) copiados al llamar
+        self.errors = {}          # Mensajes de error de condición por instrucción
+        self.hoisted = {}         # Slot de cada nodo Hoisted (solo al compilar)
+
+    def emit(self, opcode, arg, line):
+        self.instructions.append((opcode, arg))
+        self.lines.append(line)
+        return len(self.instructions) - 1
+
+    # Completa el destino de un salto: el argumento entero, o su último
+    # elemento en los saltos combinados con una comparación
+    def patch(self, index, target):
+        opcode, arg = self.instructions[index]
+        if opcode == COMPARE_FAST_CONST_JUMP or opcode == COMPARE_FAST_FAST_JUMP:
+            target = arg[:4] + (target,)
+        self.instructions[index] = (opcode, target)
+
+    # 0.0 == -0.0, pero son constantes distintas: se distinguen por el signo
+    def const(self, value):
+        for index, existing in enumerate(self.consts):
+            if type(existing) is type(value) and existing == value and (
+                    type(value) is not float or copysign(1, existing) == copysign(1, value)):
+                return index
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def local_slot(self, name):
+        if name not in self.varnames:
+            self.varnames.append(name)
+        return self.varnames.index(name)
+
+    # Slot sin nombre de variable para el valor de una subexpresión invariante
+    def hoisted_slot(self, node):
+        slot = self.hoisted.get(node)
+        if slot is None:
+            slot = self.hoisted[node] = len(self.varnames)
+            self.varnames.append(f'<invariante {slot}>')
+        return slot
+
+# Los slots de invariantes no son variables del programa
+def is_variable(name):
+    return not name.startswith('<')
+
+# Compila el programa completo; el código principal usa como slots locales
+# las variables globales
+def compile_program(program):
+    main = CodeObject('<programa>', line=program.line)
+    functions = []
+    compile_statements(program.body, main, main, functions)
+    main.emit(RETURN, None, program.line)
+
+    # Al llamar a una función, las variables que asigna y que también existen
+    # en el ámbito global arrancan con el valor global (la función trabaja
+    # sobre una copia del ámbito, como en el intérprete de árbol)
+    for code in functions:
+        code.copy_in = [
+            (slot, main.varnames.index(name))
+            for slot, name in enumerate(code.varnames)
+            if slot >= len(code.params) and is_variable(name) and name in main.varnames
+        ]
+    for code in (main, *functions):
+        code.hoisted = {}
+    return main
+
+# Cada sentencia, y cada vuelta de un bucle, consume un paso del presupuesto
+# (fuel.py). En lugar de una instrucción por sentencia se emite un TICK por
+# tramo de sentencias simples, terminado como mucho en una de control; el
+# argumento es (pasos, línea de cada paso) para poder señalar la sentencia
+# exacta si el presupuesto se agota a mitad del tramo. La vuelta de un bucle
+# se cobra junto con el primer tramo de su cuerpo.
+def compile_statements(statements, code, main, functions, loop_line=None):
+    step_lines = [] if loop_line is None else [loop_line]
+    run = []
+    for statement in statements:
+        step_lines.append(statement.line)
+        run.append(statement)
+        if type(statement) in CONTROL_STATEMENTS or calls_function(statement):
+            compile_run(run, step_lines, code, main, functions)
+            step_lines, run = [], []
+    if step_lines:
+        compile_run(run, step_lines, code, main, functions)
+
+def compile_run(run, step_lines, code, main, functions):
+    code.emit(TICK, (len(step_lines), tuple(step_lines)), step_lines[0])
+    for statement in run:
+        compile_statement(statement, code, main, functions)
+
+def compile_statement(node, code, main, functions):
+    node_type = type(node)
+    if node_type is Assign:
+        value = node.value
+        if (type(value) is BinOp and type(value.left) is Name and value.left.id == node.name
+                and type(value.right) is Literal and is_local(node.name, code, main)):
+            slot = code.local_slot(node.name)
+            code.emit(INPLACE_FAST_CONST, (slot, value.right.value, OPERATORS[value.op], value.op), node.line)
+            return
+        compile_expression(value, code, main)
+        code.emit(STORE_FAST, code.local_slot(node.name), node.line)
+    elif node_type is Print:
+        compile_expression(node.value, code, main)
+        code.emit(PRINT, None, node.line)
+    elif node_type is Scan:
+        code.emit(SCAN, None, node.line)
+        code.emit(STORE_FAST, code.local_slot(node.name), node.line)
+    elif node_type is Block:
+        compile_statements(node.statements, code, main, functions)
+    elif node_type is If:
+        jump_else = compile_condition(node.condition, code, main, node.line)
+        code.errors[jump_else] = f'Condición no booleana en línea {node.line}'
+        compile_statements(node.body.statements, code, main, functions)
+        if node.orelse is None:
+            code.patch(jump_else, len(code.instructions))
+        else:
+            jump_end = code.emit(JUMP, None, node.line)
+            code.patch(jump_else, len(code.instructions))
+            compile_statement(node.orelse, code, main, functions)
+            code.patch(jump_end, len(code.instructions))
+    elif node_type is While:
+        loop_start = len(code.instructions)
+        jump_end = compile_condition(node.condition, code, main, node.line)
+        code.errors[jump_end] = f'Condición no booleana en línea {node.line} (se esperaba true/false).'
+        compile_statements(node.body.statements, code, main, functions, loop_line=node.line)
+        code.emit(JUMP, loop_start, node.line)
+        code.patch(jump_end, len(code.instructions))
+    elif node_type is DoFor:
+        compile_statement(node.init, code, main, functions)
+        # Un bucle contado ejecuta la copia del cuerpo con los invariantes
+        # extraídos; se recalculan en cada ejecución del bucle
+        body = node.body if node.counted is None else node.counted.body
+        if body is not node.body:
+            code.emit(CLEAR_HOISTED, tuple(code.hoisted_slot(hoisted) for hoisted in node.counted.hoisted), node.line)
+        loop_start = len(code.instructions)
+        jump_end = compile_condition(node.condition, code, main, node.line)
+        code.errors[jump_end] = f'Condición no booleana en línea {node.line} en "doFor".'
+        body_start = len(code.instructions)
+        compile_statements(body.statements, code, main, functions, loop_line=node.line)
+        for_step = compile_for_step(node, code, main)
+        compile_statement(node.update, code, main, functions)
+        code.emit(JUMP, loop_start, node.line)
+        code.patch(jump_end, len(code.instructions))
+        if for_step is not None:
+            code.patch(for_step, code.instructions[for_step][1] + (body_start, len(code.instructions)))
+    elif node_type is FuncDef:
+        func_code = CodeObject(node.name, node.params, node.line)
+        for name in assigned_names(node.body.statements):
+            func_code.local_slot(name)
+        compile_statements(node.body.statements, func_code, main, functions)
+        # Terminar sin return no devuelve valor
+        func_code.emit(LOAD_CONST, func_code.const(None), node.line)
+        func_code.emit(RETURN, None, node.line)
+        functions.append(func_code)
+        code.emit(DEFINE_FUNC, code.const(func_code), node.line)
+    elif node_type is Call:
+        compile_call(node, code, main, wants_value=False)
+    elif node_type is Return:
+        if code is main:
+            raise SyntaxError(f'Error en línea {node.line}: "return" fuera de una función.')
+        if node.value is None:
+            code.emit(LOAD_CONST, code.const(None), node.line)
+        else:
+            compile_expression(node.value, code, main)
+        code.emit(RETURN, None, node.line)
+    else:
+        raise SyntaxError(f'Error en línea {node.line}: sentencia no soportada por la máquina virtual.')
+
+# Condición de un if o un bucle con su salto si es falsa; devuelve el índice
+# del salto, que se completa al conocer el destino. Una comparación de una
+# variable con una constante o con otra variable es una sola instrucción.
+def compile_condition(node, code, main, line_num):
+    if type(node) is Compare and len(node.ops) == 1 and type(node.left) is Name and is_local(node.left.id, code, main):
+        op, right = node.ops[0], node.comparators[0]
+        slot = code.local_slot(node.left.id)
+        if type(right) is Literal:
+            return code.emit(COMPARE_FAST_CONST_JUMP, (slot, right.value, OPERATORS[op], op), line_num)
+        if type(right) is Name and is_local(right.id, code, main):
+            return code.emit(COMPARE_FAST_FAST_JUMP, (slot, code.local_slot(right.id), OPERATORS[op], op), line_num)
+    compile_expression(node, code, main)
+    return code.emit(JUMP_IF_FALSE, None, line_num)
+
+# Fin de vuelta de un doFor con contador (loops.counter_step): una sola
+# instrucción suma el paso y compara con el límite en lugar de las nueve de la
+# actualización, la condición y el salto. Si el contador o el límite no son
+# números del tipo adecuado sigue con el código normal de la actualización.
+# El argumento es (slot, paso, comparación, slot del límite, si es global,
+# límite constante, inicio del cuerpo, fin del bucle); los dos últimos se
+# completan al terminar de compilar el bucle.
+def compile_for_step(node, code, main):
+    step = counter_step(node)
+    if step is None:
+        return None
+    bound = node.condition.comparators[0]
+    if type(bound) is Literal:
+        bound_slot, bound_global, bound_value = None, False, bound.value
+    elif type(bound) is Name and bound.id != node.update.name:
+        bound_global = code is not main and bound.id not in code.varnames
+        bound_slot = (main if bound_global else code).local_slot(bound.id)
+        bound_value = None
+    else:
+        return None
+    arg = (code.local_slot(node.update.name), step, node.condition.ops[0], bound_slot, bound_global, bound_value)
+    return code.emit(FOR_STEP, arg, node.line)
+
+# Argumento de CALL: (nombre, número de argumentos, si se usa el valor devuelto)
+def compile_call(node, code, main, wants_value):
+    for arg in node.args:
+        compile_expression(arg, code, main)
+    code.emit(CALL, (node.name, len(node.args), wants_value), node.line)
+
+# Sentencia simple (asignación, print) que llama a una función en alguna de
+# sus expresiones
+def calls_function(node):
+    node_type = type(node)
+    if node_type is Assign or node_type is Print:
+        return expression_calls(node.value)
+    return False
+
+def expression_calls(node):
+    node_type = type(node)
+    if node_type is Call:
+        return True
+    if node_type is Hoisted:
+        return expression_calls(node.value)
+    parts = operands(node)
+    return parts is not None and any(expression_calls(part) for part in parts)
+
+# Variables asignadas en un cuerpo de función: son locales desde el inicio
+def assigned_names(statements):
+    names = []
+    for node in statements:
+        node_type = type(node)
+        if node_type is Assign or node_type is Scan:
+            names.append(node.name)
+        elif node_type is Block:
+            names.extend(assigned_names(node.statements))
+        elif node_type is If:
+            names.extend(assigned_names(node.body.statements))
+            if node.orelse is not None:
+                names.extend(assigned_names([node.orelse]))
+        elif node_type is While:
+            names.extend(assigned_names(node.body.statements))
+        elif node_type is DoFor:
+            names.extend(assigned_names([node.init, node.update]))
+            names.extend(assigned_names(node.body.statements))
+    return names
+
+def compile_expression(node, code, main):
+    node_type = type(node)
+    if node_type is Literal:
+        code.emit(LOAD_CONST, code.const(node.value), node.line)
+    elif node_type is Name:
+        # Dentro de una función, lo que no es parámetro ni se asigna en ella
+        # se lee del ámbito global
+        if is_local(node.id, code, main):
+            code.emit(LOAD_FAST, code.local_slot(node.id), node.line)
+        else:
+            code.emit(LOAD_GLOBAL, main.local_slot(node.id), node.line)
+    elif node_type is BinOp:
+        compile_operation(node.op, node.left, node.right, node.line, code, main)
+    elif node_type is UnaryOp:
+        compile_expression(node.operand, code, main)
+        code.emit(UNARY_OPCODES[node.op], node.op, node.line)
+    elif node_type is Compare:
+        compile_compare(node, code, main)
+    elif node_type is Call:
+        compile_call(node, code, main, wants_value=True)
+    elif node_type is ArrayLiteral:
+        for element in node.elements:
+            compile_expression(element, code, main)
+        code.emit(BUILD_ARRAY, len(node.elements), node.line)
+    elif node_type is Index:
+        compile_expression(node.value, code, main)
+        compile_expression(node.index, code, main)
+        code.emit(INDEX, None, node.line)
+    elif node_type is Hoisted:
+        # La primera vez se calcula y se guarda; las siguientes se salta el
+        # cálculo
+        slot = code.hoisted_slot(node)
+        load = code.emit(LOAD_HOISTED, None, node.line)
+        compile_expression(node.value, code, main)
+        code.emit(STORE_HOISTED, slot, node.line)
+        code.instructions[load] = (LOAD_HOISTED, (slot, len(code.instructions)))
+    elif node_type is Slice:
+        # Argumento: (si hay inicio, si hay fin); los extremos presentes
+        # quedan en la pila encima del arreglo
+        compile_expression(node.value, code, main)
+        for bound in (node.start, node.stop):
+            if bound is not None:
+                compile_expression(bound, code, main)
+        code.emit(SLICE, (node.start is not None, node.stop is not None), node.line)
+    else:
+        raise SyntaxError(f'Error de sintaxis en la expresión en la línea {node.line}')
+
+def is_local(name, code, main):
+    return code is main or name in code.varnames
+
+# Operador binario o comparación simple. Si un operando es una variable local
+# o una constante se lee en la misma instrucción que aplica el operador; la
+# izquierda se evalúa siempre antes que la derecha.
+def compile_operation(op, left, right, line_num, code, main):
+    function = OPERATORS[op]
+    right_local = type(right) is Name and is_local(right.id, code, main)
+    if type(left) is Name and is_local(left.id, code, main):
+        slot = code.local_slot(left.id)
+        if type(right) is Literal:
+            code.emit(BINARY_FAST_CONST, (slot, right.value, function, op), line_num)
+            return
+        if right_local:
+            code.emit(BINARY_FAST_FAST, (slot, code.local_slot(right.id), function, op), line_num)
+            return
+    compile_expression(left, code, main)
+    if type(right) is Literal:
+        code.emit(BINARY_CONST, (right.value, function, op), line_num)
+    elif right_local:
+        code.emit(BINARY_FAST, (code.local_slot(right.id), function, op), line_num)
+    else:
+        compile_expression(right, code, main)
+        code.emit(BINARY_OP, (function, op), line_num)
+
+# Comparaciones encadenadas (a < b < c) con el mismo esquema que CPython:
+# el operando intermedio se duplica y la cadena se corta en el primer False
+def compile_compare(node, code, main):
+    if len(node.ops) == 1:
+        compile_operation(node.ops[0], node.left, node.comparators[0], node.line, code, main)
+        return
+
+    compile_expression(node.left, code, main)
+    cleanup_jumps = []
+    for op, comparator in zip(node.ops[:-1], node.comparators[:-1]):
+        compile_expression(comparator, code, main)
+        code.emit(DUP_TOP, None, node.line)
+        code.emit(ROT_THREE, None, node.line)
+        code.emit(BINARY_OP, (OPERATORS[op], op), node.line)
+        cleanup_jumps.append(code.emit(JUMP_IF_FALSE_OR_POP, None, node.line))
+    compile_expression(node.comparators[-1], code, main)
+    code.emit(BINARY_OP, (OPERATORS[node.ops[-1]], node.ops[-1]), node.line)
+    jump_end = code.emit(JUMP, None, node.line)
+    for index in cleanup_jumps:
+        code.patch(index, len(code.instructions))
+    code.emit(ROT_TWO, None, node.line)
+    code.emit(POP_TOP, None, node.line)
+    code.patch(jump_end, len(code.instructions))
+
+# Listado legible del bytecode, útil para depurar el compilador
+def disassemble(code):
+    lines = [f'<{code.name}>']
+    for index, (opcode, arg) in enumerate(code.instructions):
+        shown = '' if arg is None else repr(code.consts[arg]) if opcode == LOAD_CONST else arg
+        if opcode in (LOAD_FAST, STORE_FAST):
+            shown = f'{arg} ({code.varnames[arg]})'
+        elif type(arg) is tuple:
+            # Las funciones de operator de las instrucciones combinadas ya
+            # están representadas por su símbolo
+            shown = ' '.join(repr(part) for part in arg if not callable(part))
+        lines.append(f'{code.lines[index]:>4} {index:>4} {OPNAMES[opcode]:<22} {shown}')
+    for const in code.consts:
+        if isinstance(const, CodeObject):
+            lines.append('')
+            lines.append(disassemble(const))
+    return '\n'.join(lines)
@@ -1 +0,0 @@
-logs = []
\ No newline at end of file
@@ -0,0 +1,74 @@
+# Estado de una ejecución: tabla de símbolos global, salida de print, tipos de
+# las variables, registro de uso, presupuesto de pasos y profundidad de
+# llamadas. Cada programa recibe su propio contexto, así que varias
+# ejecuciones pueden convivir en el mismo proceso (un servidor con hilos, un
+# lote) sin compartir nada.
+import re
+from collections import deque
+
+from fuel import FuelMeter, DEFAULT_MAX_STEPS, DEFAULT_TIMEOUT
+
+NUMBER = re.compile(r'-?\d+(\.\d+)?')
+
+# Llamadas anidadas (recursión incluida) permitidas por ejecución y tope para
+# el valor que puede pedir un cliente
+DEFAULT_MAX_DEPTH = 200
+MAX_DEPTH_LIMIT = 1000
+
+# Entrada de un programa tal como llega en la petición: texto con un dato por
+# línea o lista de datos
+def parse_input(value):
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return value.splitlines()
+    if isinstance(value, list) and all(isinstance(item, (str, int, float)) and not isinstance(item, bool) for item in value):
+        return [str(item) for item in value]
+    raise ValueError('input debe ser un texto o una lista de datos.')
+
+# Valida la profundidad de llamadas pedida por un cliente; None toma el valor
+# por defecto
+def parse_max_depth(value):
+    if value is None:
+        return DEFAULT_MAX_DEPTH
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_DEPTH_LIMIT:
+        raise ValueError(f'max_depth debe ser un entero entre 1 y {MAX_DEPTH_LIMIT}.')
+    return value
+
+class ExecutionContext:
+    # `output` reemplaza a la lista de logs por cualquier objeto con append
+    # (p. ej. streaming.OutputStream)
+    def __init__(self, max_steps=DEFAULT_MAX_STEPS, timeout=DEFAULT_TIMEOUT, input_lines=(), output=None,
+                 max_depth=DEFAULT_MAX_DEPTH):
+        self.symbol_table = {
+            '__funciones__': {},  # Funciones declaradas
+            '__logs__': {},
+        }
+        self.logs = [] if output is None else output
+        self.input = deque(input_lines)
+        self.types = {}
+        self.unused_vars = {}
+        self.unused_fns = {}
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.fuel = FuelMeter()
+        self.max_depth = max_depth
+        self.depth = 0         # Llamadas en curso (intérprete de árbol)
+        self.profile = None    # profiler.LineProfile cuando se pide perfilar
+        self.hoisted = {}      # Valores de las subexpresiones invariantes de los bucles en curso
+        self.start()
+
+    # Arranca el presupuesto; se llama justo antes de ejecutar para que el
+    # tiempo de análisis no cuente contra la fecha límite
+    def start(self):
+        self.fuel.reset(self.max_steps, self.timeout)
+
+    # Siguiente dato de la entrada para scan: los números se leen como number
+    # y el resto como string
+    def read_input(self, line_num):
+        if not self.input:
+            raise SyntaxError(f'Error en línea {line_num}: scan no tiene más datos de entrada.')
+        text = str(self.input.popleft())
+        if NUMBER.fullmatch(text.strip()):
+            return float(text) if '.' in text else int(text)
+        return text
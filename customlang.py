@@ -0,0 +1,158 @@
+# Línea de comandos para ejecutar programas de CustomLang sin el servidor web.
+#
+# Uso: python -m customlang run programa.txt [--engine tree|vm] [--optimize]
+#                                          [--max-steps N] [--timeout S] [--max-depth N]
+#      python -m customlang tokens programa.txt
+#      python -m customlang check programa.txt [otro.txt ...]
+#      (todos aceptan --no-cache)
+#
+# Pensada para lanzarse miles de veces desde scripts de corrección y CI: cada
+# comando importa solo lo que usa (check y tokens no cargan los motores de
+# ejecución) y nada de la pila web, y un programa que ya se analizó se carga
+# de su artefacto precompilado (artifacts.py) sin importar el lexer ni el
+# parser. El presupuesto de arranque se mide con benchmarks/bench_startup.py.
+import argparse
+import sys
+
+# Son ligeros: engines importa cada motor solo al usarlo. El lexer, el parser
+# (que carga dataclasses) y el optimizador se importan en cada comando.
+from engines import ENGINES, DEFAULT_ENGINE, run_program
+from fuel import DEFAULT_MAX_STEPS, DEFAULT_TIMEOUT
+from context import ExecutionContext, DEFAULT_MAX_DEPTH, MAX_DEPTH_LIMIT, parse_max_depth
+
+# Mismo rango que acepta /compile en max_depth
+def max_depth_argument(text):
+    try:
+        return parse_max_depth(int(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'debe ser un entero entre 1 y {MAX_DEPTH_LIMIT}: {text}') from None
+
+# Sin recortar el principio, para que las líneas coincidan con las del archivo
+def read_source(path):
+    with open(path, encoding='utf-8') as source_file:
+        return source_file.read().rstrip()
+
+def parse_file(path):
+    from lexer import tokenize
+    from parser import parse_program
+    tokens_detected = tokenize(read_source(path))
+    return tokens_detected, parse_program(tokens_detected.columns())
+
+# Artefacto del archivo en la caché; si no hay uno válido, el archivo se
+# analiza y se guarda el suyo
+def load_artifact(path):
+    from artifacts import compile_source, default_cache_dir
+    return compile_source(read_source(path), default_cache_dir())
+
+# Con un artefacto válido el archivo ya pasó la comprobación y no se analiza
+def check_artifact(path):
+    from artifacts import cached_artifact, compile_source, default_cache_dir
+    source, cache_dir = read_source(path), default_cache_dir()
+    if cached_artifact(source, cache_dir) is None:
+        compile_source(source, cache_dir)
+
+def command_run(args):
+    code = None
+    if args.no_cache:
+        _, program = parse_file(args.file)
+    else:
+        artifact = load_artifact(args.file)
+        program = artifact.program
+        # El bytecode guardado es el del programa sin optimizar
+        if args.engine == 'vm' and not args.optimize:
+            code = artifact.bytecode()
+    if args.optimize:
+        from optimizer import optimize
+        program, _ = optimize(program)
+    context = ExecutionContext(args.max_steps, args.timeout, max_depth=args.max_depth)
+    # Lo impreso antes de un error de ejecución también sale, antes del
+    # mensaje de error que escribe main
+    try:
+        run_program(program, args.engine, context, code)
+    finally:
+        sys.stdout.write(''.join(f'{line}\n' for line in context.logs))
+        sys.stdout.flush()
+    return 0
+
+# Un token por línea: línea, tipo y valor separados por tabuladores. Solo
+# lee artefactos: un código con errores de sintaxis también tiene tokens.
+def command_tokens(args):
+    source = read_source(args.file)
+    artifact = None
+    if not args.no_cache:
+        from artifacts import cached_artifact, default_cache_dir
+        artifact = cached_artifact(source, default_cache_dir())
+    if artifact is not None:
+        tokens_detected = artifact.tokens()
+    else:
+        from lexer import tokenize
+        tokens_detected = tokenize(source)
+    sys.stdout.write(''.join(f'{line}\t{token_type}\t{value}\n' for token_type, value, line in tokens_detected))
+    return 0
+
+# Solo analiza: informa de cada archivo y falla si alguno tiene errores. Los
+# errores con posición salen como archivo:línea:columna, el formato que
+# reconocen los editores
+def command_check(args):
+    status = 0
+    for path in args.files:
+        try:
+            if args.no_cache:
+                parse_file(path)
+            else:
+                check_artifact(path)
+        except SyntaxError as e:
+            column = getattr(e, 'column', None)
+            location = f'{path}:{e.line}:{column}' if column is not None else path
+            print(f'{location}: {e}')
+            status = 1
+        except OSError as e:
+            print(f'{path}: no se pudo leer el archivo ({e.strerror})')
+            status = 1
+        else:
+            print(f'{path}: OK')
+    return status
+
+NO_CACHE_HELP = 'analiza el código sin leer ni guardar su artefacto precompilado'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='customlang', description='Herramientas de CustomLang')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='ejecuta un programa')
+    run_parser.add_argument('file', help='archivo fuente (.txt)')
+    run_parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                            help='motor de ejecución (por defecto: %(default)s)')
+    run_parser.add_argument('--optimize', action='store_true',
+                            help='pliega constantes y elimina ramas muertas antes de ejecutar')
+    run_parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS,
+                            help='pasos máximos de ejecución (por defecto: %(default)s; 0 = sin límite)')
+    run_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                            help='segundos máximos de ejecución (por defecto: %(default)s; 0 = sin límite)')
+    run_parser.add_argument('--max-depth', type=max_depth_argument, default=DEFAULT_MAX_DEPTH,
+                            metavar='N', help='llamadas anidadas máximas (por defecto: %(default)s)')
+    run_parser.add_argument('--no-cache', action='store_true', help=NO_CACHE_HELP)
+    run_parser.set_defaults(handler=command_run)
+
+    tokens_parser = subparsers.add_parser('tokens', help='muestra los tokens de un programa')
+    tokens_parser.add_argument('file', help='archivo fuente (.txt)')
+    tokens_parser.add_argument('--no-cache', action='store_true', help=NO_CACHE_HELP)
+    tokens_parser.set_defaults(handler=command_tokens)
+
+    check_parser = subparsers.add_parser('check', help='comprueba la sintaxis sin ejecutar')
+    check_parser.add_argument('files', nargs='+', metavar='file', help='archivos fuente (.txt)')
+    check_parser.add_argument('--no-cache', action='store_true', help=NO_CACHE_HELP)
+    check_parser.set_defaults(handler=command_check)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except SyntaxError as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f'Error: no se pudo leer el archivo ({e.strerror})', file=sys.stderr)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
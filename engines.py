@@ -0,0 +1,40 @@
+# Motores de ejecución disponibles para un programa ya analizado:
+#   tree -> intérprete que recorre el AST (interpreter.py)
+#   vm   -> compilación a bytecode y máquina virtual de pila (compiler.py, vm.py)
+# Cada motor se importa la primera vez que se usa, para que quien solo
+# necesita analizar (customlang check/tokens) no cargue ninguno.
+from context import ExecutionContext
+
+ENGINES = ('tree', 'vm')
+DEFAULT_ENGINE = 'tree'
+
+# Ejecuta el programa con el motor elegido; la salida, los tipos y el uso de
+# variables quedan en el contexto. `code` es el bytecode ya compilado del
+# programa (el de un artefacto, artifacts.py), si se tiene.
+def run_program(program, engine=DEFAULT_ENGINE, context=None, code=None):
+    if context is None:
+        context = ExecutionContext()
+    context.start()
+    if engine not in ENGINES:
+        raise ValueError(f'Motor de ejecución no válido: {engine}. Opciones: {", ".join(ENGINES)}')
+    # El programa de la caché ya viene marcado (tipos y bucles contados, que
+    # usan los dos motores); uno recién analizado u optimizado se marca aquí
+    if code is None and not program.typed:
+        from typecheck import annotate_types
+        annotate_types(program)
+    if engine == 'tree':
+        from interpreter import execute
+        symbol_table = execute(program, context)
+    else:
+        from vm import run
+        if code is None:
+            from compiler import compile_program
+            code = compile_program(program)
+        symbol_table = run(code, context)
+
+    # Lecturas que el optimizador reemplazó por constantes siguen contando
+    # como uso de la variable
+    for var_name in program.static_uses:
+        if var_name in context.unused_vars:
+            context.unused_vars[var_name]['used'] = True
+    return symbol_table
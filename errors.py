@@ -0,0 +1,68 @@
+# Catálogo local de mensajes de error en español. Las operaciones del
+# lenguaje se ejecutan con los operadores de Python, así que sus errores
+# llegan como excepciones de Python con el texto en inglés; aquí se traducen
+# a partir de su tipo y del formato de su mensaje, sin usar la red.
+import re
+from functools import lru_cache
+
+# Nombres de los tipos de Python con los del lenguaje
+TYPE_NAMES = {
+    'str': 'string',
+    'int': 'number',
+    'float': 'number',
+    'bool': 'boolean',
+}
+
+# (tipo de excepción, patrón del mensaje o None, plantilla en español). Los
+# grupos del patrón se pasan a la plantilla en orden; los que son nombres de
+# tipo se traducen con TYPE_NAMES.
+ERROR_CATALOG = [
+    (ZeroDivisionError, None, 'división entre cero'),
+    (TypeError, re.compile(r"unsupported operand type\(s\) for (.+): '(\w+)' and '(\w+)'"),
+     'el operador {0} no se puede aplicar entre {1} y {2}'),
+    (TypeError, re.compile(r'can only concatenate str \(not "(\w+)"\) to str'),
+     'un string solo se puede concatenar con otro string, no con {0}'),
+    (TypeError, re.compile(r"'(.+)' not supported between instances of '(\w+)' and '(\w+)'"),
+     'no se puede comparar con {0} un {1} y un {2}'),
+    (TypeError, re.compile(r"bad operand type for unary (.+): '(\w+)'"),
+     'el operador unario {0} no se puede aplicar a un {1}'),
+    (TypeError, re.compile(r"can't multiply sequence by non-int of type '(\w+)'"),
+     'un string solo se puede repetir un número entero de veces'),
+    (TypeError, re.compile(r'not all arguments converted during string formatting'),
+     'el operador % no se puede aplicar a un string'),
+    # Operaciones de arreglos (NumPy)
+    (ValueError, re.compile(r'operands could not be broadcast together with shapes \((\d+),\) \((\d+),\)\s*'),
+     'los arreglos tienen distinto tamaño ({0} y {1})'),
+    (FloatingPointError, re.compile(r'(divide by zero|invalid value) encountered in (divide|remainder)'),
+     'división entre cero'),
+    (FloatingPointError, None, 'el resultado no es un número válido'),
+    (TypeError, re.compile(r'The numpy boolean negative.*'),
+     'el operador unario - no se puede aplicar a un arreglo de booleanos'),
+    (TypeError, re.compile(r".*ufunc.*"),
+     'un arreglo solo opera con números, booleanos u otros arreglos'),
+    (OverflowError, re.compile(r'integer array overflow'),
+     'el resultado no cabe en un arreglo de enteros (límite de 64 bits)'),
+    (OverflowError, re.compile(r'Python int too large to convert to C long'),
+     'el número no cabe en un arreglo de enteros (límite de 64 bits)'),
+    (OverflowError, None, 'el resultado es demasiado grande'),
+    (MemoryError, None, 'el resultado no cabe en memoria'),
+    (RecursionError, None, 'demasiadas llamadas anidadas'),
+]
+
+# Traduce una excepción de Python al español. Los mensajes se repiten mucho
+# (el mismo error en cada vuelta de un bucle), por eso se memoriza por tipo y
+# texto; lo que no está en el catálogo se muestra tal cual.
+def translate_error(error):
+    return translate_message(type(error), str(error))
+
+@lru_cache(maxsize=256)
+def translate_message(error_type, message):
+    for catalog_type, pattern, template in ERROR_CATALOG:
+        if not issubclass(error_type, catalog_type):
+            continue
+        if pattern is None:
+            return template
+        match = pattern.fullmatch(message)
+        if match:
+            return template.format(*(TYPE_NAMES.get(group, group) for group in match.groups()))
+    return message
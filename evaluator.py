@@ -1,24 +1,276 @@
-# Función para evaluar expresiones aritméticas
-def evaluate_expression(tokens, symbol_table):
-    expr = ""
-    for token_type, token_value, line_num in tokens:
-        if token_type == 'IDENTIFIER':
-            if token_value in symbol_table:
-                # Si es un string, añadir comillas al valor
-                if isinstance(symbol_table[token_value], str):
-                    expr += f'"{symbol_table[token_value]}"'
-                else:
-                    expr += str(symbol_table[token_value])
-            else:
-                raise SyntaxError(f'Variable no definida en la línea {line_num}: {token_value}')
-        elif token_type == 'STRING':
-            expr += token_value  # Ya incluye comillas
-        elif token_type in ('NUMBER', 'OPERATOR'):
-            expr += token_value
-        else:
-            raise SyntaxError(f'Error de sintaxis en la expresión en la línea {line_num}: {token_value}')
+import operator
+from functools import lru_cache
+
+from errors import translate_error
+from nodes import Literal, Name, UnaryOp, BinOp, Compare, Call, Hoisted, ArrayLiteral, Index, Slice
+from arrays import make_array, index_array, slice_array, format_array, is_array
+
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '&': operator.and_,
+    '|': operator.or_,
+}
+
+COMPARISON_OPERATORS = {
+    '==': operator.eq,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '>': operator.gt,
+}
+
+UNARY_OPERATORS = {
+    '-': operator.neg,
+    '+': operator.pos,
+}
+
+# Función para evaluar expresiones aritméticas a partir de sus tokens. La
+# expresión se analiza y compila una sola vez por sitio (la tupla de tokens
+# incluye la línea) y las evaluaciones siguientes reutilizan el cierre.
+def evaluate_expression(tokens, symbol_table, context):
+    return compile_tokens(tuple(tokens))(symbol_table, context)
+
+# El lexer y el parser se importan aquí: al ejecutar un programa cargado de
+# su artefacto (artifacts.py) no se usan
+@lru_cache(maxsize=1024)
+def compile_tokens(tokens):
+    from lexer import tuple_columns
+    from parser import parse_expression
+    if not tokens:
+        raise SyntaxError('Error de sintaxis en la expresión: expresión vacía')
+    node, pos = parse_expression(tuple_columns(tokens), 0)
+    if pos != len(tokens):
+        token_value, line_num = tokens[pos][1], tokens[pos][2]
+        raise SyntaxError(f'Error de sintaxis en la expresión en la línea {line_num}: {token_value}')
+    return compile_expression(node)
+
+# Evalúa un nodo de expresión del AST sobre la tabla de símbolos. El cierre
+# compilado se guarda en el propio nodo, así cada sitio se compila una vez.
+# El cierre no guarda estado de la ejecución (el AST puede estar en la caché
+# y compartirse entre peticiones): el uso de variables se anota en el
+# contexto que se le pasa.
+def evaluate(node, symbol_table, context):
     try:
-        result = eval(expr)
-    except Exception as e:
-        raise SyntaxError(f'Error evaluando la expresión: {expr} ({e})')
-    return result
\ No newline at end of file
+        compiled = node.compiled
+    except AttributeError:
+        compiled = node.compiled = compile_expression(node)
+    return compiled(symbol_table, context)
+
+# Cierre compilado del nodo, para quien lo evalúa muchas veces seguidas (la
+# condición de un bucle)
+def expression_closure(node):
+    try:
+        return node.compiled
+    except AttributeError:
+        compiled = node.compiled = compile_expression(node)
+        return compiled
+
+# Convierte un nodo de expresión en un cierre fn(symbol_table, context) -> valor
+def compile_expression(node):
+    node_type = type(node)
+    if node_type is Literal:
+        return compile_literal(node)
+    elif node_type is Name:
+        return compile_name(node)
+    elif node_type is BinOp:
+        return compile_binary(node)
+    elif node_type is Compare:
+        return compile_compare(node)
+    elif node_type is UnaryOp:
+        return compile_unary(node)
+    elif node_type is Call:
+        return compile_call(node)
+    elif node_type is Hoisted:
+        return compile_hoisted(node)
+    elif node_type is Index:
+        return compile_index(node)
+    elif node_type is ArrayLiteral:
+        return compile_array(node)
+    elif node_type is Slice:
+        return compile_slice(node)
+    raise SyntaxError(f'Error de sintaxis en la expresión en la línea {node.line}')
+
+def compile_literal(node):
+    value = node.value
+    return lambda symbol_table, context: value
+
+def compile_name(node):
+    name, line_num = node.id, node.line
+
+    def load(symbol_table, context):
+        try:
+            value = symbol_table[name]
+        except KeyError:
+            raise SyntaxError(f'Variable no definida en la línea {line_num}: {name}') from None
+        usage = context.unused_vars.get(name)
+        if usage is not None:
+            usage['used'] = True
+        return value
+    return load
+
+def compile_binary(node):
+    return compile_operation(BINARY_OPERATORS[node.op], node.op, node.left, node.right, node.line)
+
+def compile_operation(function, op, left_node, right_node, op_line):
+    # Variable a la izquierda y constante a la derecha (i < 10, x + 1): el
+    # caso más común en condiciones y contadores se resuelve sin subllamadas
+    if type(left_node) is Name and type(right_node) is Literal:
+        name, line_num, right_value = left_node.id, left_node.line, right_node.value
+
+        def operation_name_const(symbol_table, context):
+            try:
+                left_value = symbol_table[name]
+            except KeyError:
+                raise SyntaxError(f'Variable no definida en la línea {line_num}: {name}') from None
+            usage = context.unused_vars.get(name)
+            if usage is not None:
+                usage['used'] = True
+            try:
+                return function(left_value, right_value)
+            except Exception as e:
+                raise operation_error(e, op, left_value, right_value, op_line) from None
+        return operation_name_const
+
+    left = compile_expression(left_node)
+
+    # Operando derecho constante: se evita una llamada
+    if type(right_node) is Literal:
+        right_value = right_node.value
+
+        def operation_const(symbol_table, context):
+            left_value = left(symbol_table, context)
+            try:
+                return function(left_value, right_value)
+            except Exception as e:
+                raise operation_error(e, op, left_value, right_value, op_line) from None
+        return operation_const
+
+    right = compile_expression(right_node)
+
+    def operation(symbol_table, context):
+        left_value = left(symbol_table, context)
+        right_value = right(symbol_table, context)
+        try:
+            return function(left_value, right_value)
+        except Exception as e:
+            raise operation_error(e, op, left_value, right_value, op_line) from None
+    return operation
+
+def compile_compare(node):
+    if len(node.ops) == 1:
+        op = node.ops[0]
+        return compile_operation(COMPARISON_OPERATORS[op], op, node.left, node.comparators[0], node.line)
+
+    # Comparación encadenada: a < b < c equivale a (a < b) and (b < c)
+    left = compile_expression(node.left)
+    op_line = node.line
+    links = [
+        (COMPARISON_OPERATORS[op], op, compile_expression(comparator))
+        for op, comparator in zip(node.ops, node.comparators)
+    ]
+
+    def chain(symbol_table, context):
+        left_value = left(symbol_table, context)
+        for function, op, right in links:
+            right_value = right(symbol_table, context)
+            try:
+                result = function(left_value, right_value)
+            except Exception as e:
+                raise operation_error(e, op, left_value, right_value, op_line) from None
+            if result is not True:
+                if result is False:
+                    return False
+                raise SyntaxError(f'Error evaluando la expresión en la línea {op_line}: una comparación encadenada no admite arreglos')
+            left_value = right_value
+        return True
+    return chain
+
+def compile_unary(node):
+    function, op, op_line = UNARY_OPERATORS[node.op], node.op, node.line
+    operand = compile_expression(node.operand)
+
+    def unary(symbol_table, context):
+        value = operand(symbol_table, context)
+        try:
+            return function(value)
+        except Exception as e:
+            raise expression_error(e, f'{op}{format_value(value)}', op_line) from None
+    return unary
+
+# Llamada usada como expresión: la función debe devolver un valor
+def compile_call(node):
+    # interpreter importa este módulo; al compilar una llamada ya está cargado
+    from interpreter import call_function
+    name, line_num = node.name, node.line
+    args = [compile_expression(arg) for arg in node.args]
+
+    def call(symbol_table, context):
+        value = call_function(name, [arg(symbol_table, context) for arg in args], line_num, context)
+        if value is None:
+            raise SyntaxError(f'Error en línea {line_num}: la función {name} no devolvió ningún valor.')
+        return value
+    return call
+
+# ---- Arreglos (arrays.py) ----
+
+def compile_array(node):
+    elements = [compile_expression(element) for element in node.elements]
+    line_num = node.line
+
+    def array(symbol_table, context):
+        return make_array([element(symbol_table, context) for element in elements], line_num)
+    return array
+
+def compile_index(node):
+    value, index, line_num = compile_expression(node.value), compile_expression(node.index), node.line
+
+    def index_value(symbol_table, context):
+        return index_array(value(symbol_table, context), index(symbol_table, context), line_num)
+    return index_value
+
+def compile_slice(node):
+    value, line_num = compile_expression(node.value), node.line
+    start = compile_expression(node.start) if node.start is not None else None
+    stop = compile_expression(node.stop) if node.stop is not None else None
+
+    def slice_value(symbol_table, context):
+        array = value(symbol_table, context)
+        return slice_array(
+            array,
+            None if start is None else start(symbol_table, context),
+            None if stop is None else stop(symbol_table, context),
+            line_num,
+        )
+    return slice_value
+
+# Subexpresión invariante de un bucle contado (loops.py): su valor se guarda en
+# el contexto la primera vez que se evalúa y el intérprete lo descarta al
+# terminar la ejecución del bucle
+def compile_hoisted(node):
+    compute = compile_expression(node.value)
+
+    def hoisted(symbol_table, context):
+        values = context.hoisted
+        try:
+            return values[node]
+        except KeyError:
+            value = values[node] = compute(symbol_table, context)
+            return value
+    return hoisted
+
+def operation_error(error, op, left, right, line_num):
+    return expression_error(error, f'{format_value(left)} {op} {format_value(right)}', line_num)
+
+# Mensaje común a los dos motores para un error de Python al aplicar un
+# operador; el motivo sale del catálogo de errors.py
+def expression_error(error, expr, line_num):
+    return SyntaxError(f'Error evaluando la expresión en la línea {line_num}: {expr} ({translate_error(error)})')
+
+def format_value(value):
+    if isinstance(value, str):
+        return f'"{value}"'
+    return format_array(value) if is_array(value) else str(value)
@@ -0,0 +1,52 @@
+# Presupuesto de ejecución ("combustible"): cada sentencia ejecutada y cada
+# iteración de un bucle consumen un paso. Al agotarse los pasos o al pasar la
+# fecha límite se corta el programa con un error que indica la línea, para
+# que un bucle infinito no deje ocupado al servidor.
+import time
+
+DEFAULT_MAX_STEPS = 1_000_000
+DEFAULT_TIMEOUT = 5.0          # Segundos
+
+# Topes para los valores que puede pedir un cliente
+MAX_STEPS_LIMIT = 50_000_000
+MAX_TIMEOUT = 30.0
+
+# El reloj solo se consulta cada tantos pasos; contar es mucho más barato
+CHECK_INTERVAL = 1024
+
+class FuelMeter:
+    def __init__(self):
+        self.reset()
+
+    # Un límite en 0 o None desactiva esa restricción
+    def reset(self, max_steps=DEFAULT_MAX_STEPS, timeout=DEFAULT_TIMEOUT):
+        self.max_steps = max_steps or None
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.steps = 0
+        self.limit = self.next_limit()
+
+    # Los motores suman a `steps` y llaman a checkpoint solo cuando pasan de
+    # `limit`, que nunca supera max_steps
+    def next_limit(self):
+        limit = self.steps + CHECK_INTERVAL
+        return limit if self.max_steps is None else min(limit, self.max_steps)
+
+    def checkpoint(self, line_num):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise SyntaxError(f'Límite de ejecución excedido en la línea {line_num}: el programa superó {self.max_steps} pasos (¿bucle infinito?).')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SyntaxError(f'Tiempo de ejecución excedido en la línea {line_num}: el programa superó {self.timeout:g} s.')
+        self.limit = self.next_limit()
+
+# Valida el presupuesto pedido por un cliente; None toma el valor por defecto
+def parse_budget(max_steps=None, timeout=None):
+    if max_steps is None:
+        max_steps = DEFAULT_MAX_STEPS
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if isinstance(max_steps, bool) or not isinstance(max_steps, int) or not 0 < max_steps <= MAX_STEPS_LIMIT:
+        raise ValueError(f'max_steps debe ser un entero entre 1 y {MAX_STEPS_LIMIT}.')
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout <= MAX_TIMEOUT:
+        raise ValueError(f'timeout debe ser un número de segundos entre 0 y {MAX_TIMEOUT:g}.')
+    return max_steps, timeout
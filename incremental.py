@@ -0,0 +1,199 @@
+# Re-análisis léxico incremental para el editor. Cada sesión guarda el texto
+# por líneas, sus tokens con desplazamientos y el inicio de cada línea; una
+# edición (offset, borrados, insertado) solo vuelve a escanear las líneas que
+# toca, desde el inicio de la primera y hasta que el scanner se resincroniza
+# con un token previo, y se devuelve únicamente el tramo de tokens que cambió.
+#
+# Para que una edición no cueste lo que mide el documento, los desplazamientos
+# no se reescriben en cada pulsación. Como en un búfer con hueco, los tokens y
+# los inicios de línea anteriores al hueco guardan su desplazamiento absoluto
+# y los posteriores lo guardan respecto del final del documento (desplazamiento
+# - longitud, negativo o cero), que una edición anterior a ellos no cambia. El
+# hueco se mueve al punto de cada edición convirtiendo solo lo que hay entre
+# las dos posiciones: al escribir en un mismo lugar no se convierte nada.
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from lexer import scan
+
+MAX_SESSIONS = 512
+
+class IncrementalDocument:
+    def __init__(self, text=''):
+        self.version = 0
+        self.lock = threading.Lock()
+        self.reset(text)
+
+    def reset(self, text):
+        self.lines = text.split('\n')
+        self.length = len(text)
+        self.types, self.values, self.starts, self.ends = [], [], [], []
+        for token_type, value, start, end in scan(text):
+            self.types.append(token_type)
+            self.values.append(value)
+            self.starts.append(start)
+            self.ends.append(end)
+        self.line_starts = [0] + [index + 1 for index, char in enumerate(text) if char == '\n']
+        self.gap = len(self.starts)             # Primer token guardado respecto del final
+        self.line_gap = len(self.line_starts)   # Primera línea guardada respecto del final
+
+    def text(self):
+        return '\n'.join(self.lines)
+
+    # Aplica una edición y devuelve (índice, cantidad reemplazada, tokens
+    # nuevos): los tokens [índice, índice + cantidad) del estado anterior se
+    # sustituyen por los nuevos.
+    def apply_edit(self, offset, deleted, inserted):
+        length = self.length
+        if offset < 0 or deleted < 0 or offset + deleted > length:
+            raise ValueError(f'Edición fuera del documento: offset {offset}, borrados {deleted}, longitud {length}')
+
+        edit_end = offset + deleted
+        new_end = offset + len(inserted)
+        delta = len(inserted) - deleted
+
+        # Ningún token cruza un salto de línea, así que los tokens de una
+        # línea dependen solo de su texto. Pero una edición sí puede cambiar
+        # lo anterior en su misma línea (cerrar una cadena, extender un
+        # identificador): se reescanean enteras las líneas que toca.
+        first_line = self.find_line(offset) - 1
+        last_line = self.find_line(edit_end) - 1
+        restart = self.line_start(first_line)
+        segment = '\n'.join(self.lines[first_line:last_line + 1])
+        segment = segment[:offset - restart] + inserted + segment[edit_end - restart:]
+        # El fin del tramo en el texto anterior, contando el salto de línea
+        # que lo separa de la línea siguiente
+        old_segment_end = restart + len(segment) - delta + 1
+
+        self.move_gap(self.find_token(restart))
+        starts, ends, first = self.starts, self.ends, self.gap
+        new_types, new_values, new_starts, new_ends = [], [], [], []
+        # Los tokens de las líneas siguientes no cambian
+        resync = bisect_left(starts, old_segment_end - length, first)
+        for token_type, value, start, end in scan(segment):
+            start += restart
+            # A partir de new_end el texto es el mismo de antes desplazado por
+            # delta; si el scanner cae en el inicio de un token previo, el
+            # resto de la secuencia es idéntica. Se exige un carácter intacto
+            # antes del token para que los \b de los patrones no cambien.
+            if start > new_end:
+                old_start = start - delta - length
+                index = bisect_left(starts, old_start, first, resync)
+                if index < resync and starts[index] == old_start:
+                    resync = index
+                    break
+            new_types.append(token_type)
+            new_values.append(value)
+            new_starts.append(start)
+            new_ends.append(end + restart)
+
+        # Los tokens desde resync guardan su distancia al final, que la
+        # edición no cambia; los nuevos quedan antes del hueco
+        replaced = resync - first
+        self.types[first:resync] = new_types
+        self.values[first:resync] = new_values
+        starts[first:resync] = new_starts
+        ends[first:resync] = new_ends
+        self.gap = first + len(new_types)
+
+        new_lines = segment.split('\n')
+        self.lines[first_line:last_line + 1] = new_lines
+        self.update_line_starts(first_line, last_line, restart, new_lines)
+        self.length = length + delta
+        self.version += 1
+        return first, replaced, [self.token(index) for index in range(first, self.gap)]
+
+    # Las líneas first_line..last_line pasan a ser new_lines; las que siguen
+    # guardan su distancia al final y no cambian
+    def update_line_starts(self, first_line, last_line, restart, new_lines):
+        self.move_line_gap(first_line + 1)
+        starts = []
+        for line in new_lines[:-1]:
+            restart += len(line) + 1
+            starts.append(restart)
+        self.line_starts[first_line + 1:last_line + 1] = starts
+        self.line_gap = first_line + len(new_lines)
+
+    # ---- Desplazamientos con hueco ----
+
+    def move_gap(self, gap):
+        self.shift(self.starts, self.gap, gap)
+        self.shift(self.ends, self.gap, gap)
+        self.gap = gap
+
+    def move_line_gap(self, gap):
+        self.shift(self.line_starts, self.line_gap, gap)
+        self.line_gap = gap
+
+    # Pasa los valores entre el hueco actual y el nuevo a absolutos (si el
+    # hueco avanza) o a relativos al final (si retrocede)
+    def shift(self, values, gap, new_gap):
+        length = self.length
+        if new_gap > gap:
+            values[gap:new_gap] = [value + length for value in values[gap:new_gap]]
+        elif new_gap < gap:
+            values[new_gap:gap] = [value - length for value in values[new_gap:gap]]
+
+    # Índice del primer token que empieza en `offset` o después
+    def find_token(self, offset):
+        return find(self.starts, self.gap, self.length, offset, bisect_left)
+
+    # Cantidad de líneas que empiezan en `offset` o antes
+    def find_line(self, offset):
+        return find(self.line_starts, self.line_gap, self.length, offset, bisect_right)
+
+    def line_start(self, index):
+        start = self.line_starts[index]
+        return start if index < self.line_gap else start + self.length
+
+    # Token como [tipo, valor, inicio, longitud]. Se usan desplazamientos y no
+    # línea/columna para que los tokens posteriores a una edición sigan siendo
+    # válidos en el cliente con solo sumarles la diferencia de longitud.
+    def token(self, index):
+        start, end = self.starts[index], self.ends[index]
+        if index >= self.gap:
+            start += self.length
+            end += self.length
+        return [self.types[index], self.values[index], start, end - start]
+
+    def all_tokens(self):
+        return [self.token(index) for index in range(len(self.types))]
+
+# Búsqueda binaria sobre valores guardados con hueco: antes del hueco son
+# absolutos y después relativos al final, y en los dos tramos están ordenados
+def find(values, gap, length, offset, search):
+    index = search(values, offset, 0, gap)
+    return index if index < gap else search(values, offset - length, gap)
+
+# Documentos abiertos por sesión; al superar el límite se descarta la sesión
+# usada hace más tiempo
+class DocumentStore:
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.documents = OrderedDict()
+        self.lock = threading.Lock()
+
+    def open(self, text, session=None):
+        document = IncrementalDocument(text)
+        session = session or uuid.uuid4().hex
+        with self.lock:
+            self.documents[session] = document
+            self.documents.move_to_end(session)
+            while len(self.documents) > self.max_sessions:
+                self.documents.popitem(last=False)
+        return session, document
+
+    def get(self, session):
+        with self.lock:
+            document = self.documents.get(session)
+            if document is not None:
+                self.documents.move_to_end(session)
+            return document
+
+    def close(self, session):
+        with self.lock:
+            self.documents.pop(session, None)
+
+documents = DocumentStore()
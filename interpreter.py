@@ -0,0 +1,319 @@
+# Intérprete que recorre el AST construido por parser.parse_program. El programa
+# se analiza una sola vez; cada iteración de un bucle solo evalúa expresiones.
+import sys
+from time import perf_counter_ns
+
+from nodes import Program, Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return, Profiled
+from evaluator import evaluate, expression_closure, COMPARISON_OPERATORS
+from context import ExecutionContext
+from arrays import BUILTINS, call_builtin, display_value, format_array, is_array
+
+# Cada llamada del lenguaje anida unas pocas funciones de Python (bloque,
+# sentencia, expresión...); el límite de recursión de Python se sube para que
+# alcance la profundidad de llamadas permitida con margen
+PYTHON_FRAMES_PER_CALL = 16
+RECURSION_MARGIN = 1000
+
+# Ejecuta el programa sobre la tabla de símbolos del contexto y la devuelve
+def execute(program, context=None):
+    if context is None:
+        context = ExecutionContext()
+    needed = context.max_depth * PYTHON_FRAMES_PER_CALL + RECURSION_MARGIN
+    if sys.getrecursionlimit() < needed:
+        sys.setrecursionlimit(needed)
+    execute_block(program, context.symbol_table, context)
+    return context.symbol_table
+
+# Ámbito local de una llamada: solo los parámetros y las variables que asigna
+# la función. Lo que no encuentra lo lee del ámbito global (`parent`), así que
+# llamar cuesta lo mismo sin importar cuántas variables globales haya. Las
+# asignaciones quedan en el ámbito local.
+class Frame(dict):
+    __slots__ = ('parent',)
+
+    def __missing__(self, name):
+        return self.parent[name]
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self.parent
+
+# Lleva el valor de un return hasta la llamada que lo espera
+class FunctionReturn(Exception):
+    def __init__(self, value):
+        self.value = value
+
+def execute_statement(node, symbol_table, context):
+    EXECUTORS[type(node)](node, symbol_table, context)
+
+# Cada sentencia, y cada vuelta de un bucle, consume un paso del presupuesto
+# de ejecución (fuel.py)
+def execute_block(node, symbol_table, context):
+    statements = node.body if type(node) is Program else node.statements
+    fuel = context.fuel
+    for statement in statements:
+        fuel.steps += 1
+        if fuel.steps > fuel.limit:
+            fuel.checkpoint(statement.line)
+        EXECUTORS[type(statement)](statement, symbol_table, context)
+
+def check_condition(node, symbol_table, context, error_message):
+    condition = evaluate(node.condition, symbol_table, context)
+    if not isinstance(condition, bool):
+        raise SyntaxError(error_message)
+    return condition
+
+# Con `node.typed` la condición es booleana sin necesidad de comprobarlo
+# (typecheck.py); en los bucles se evalúa directamente con su cierre compilado
+def execute_if(node, symbol_table, context):
+    if node.typed:
+        condition = evaluate(node.condition, symbol_table, context)
+    else:
+        condition = check_condition(node, symbol_table, context, f'Condición no booleana en línea {node.line}')
+    if condition:
+        execute_block(node.body, symbol_table, context)
+    elif node.orelse is not None:
+        execute_statement(node.orelse, symbol_table, context)
+
+def execute_while(node, symbol_table, context):
+    fuel = context.fuel
+    if node.typed:
+        condition = expression_closure(node.condition)
+        while condition(symbol_table, context):
+            fuel.steps += 1
+            if fuel.steps > fuel.limit:
+                fuel.checkpoint(node.line)
+            execute_block(node.body, symbol_table, context)
+        return
+
+    error_message = f'Condición no booleana en línea {node.line} (se esperaba true/false).'
+    while check_condition(node, symbol_table, context, error_message):
+        fuel.steps += 1
+        if fuel.steps > fuel.limit:
+            fuel.checkpoint(node.line)
+        execute_block(node.body, symbol_table, context)
+
+# Un bucle contado (loops.py) se recorre con execute_counted salvo al
+# perfilar: la copia instrumentada mide la condición y el paso en cada vuelta
+def execute_doFor(node, symbol_table, context):
+    fuel = context.fuel
+    execute_assignment(node.init, symbol_table, context)
+    counted = node.counted
+    if counted is not None and context.profile is None and execute_counted(node, counted, symbol_table, context):
+        return
+    if node.typed:
+        condition = expression_closure(node.condition)
+        while condition(symbol_table, context):
+            fuel.steps += 1
+            if fuel.steps > fuel.limit:
+                fuel.checkpoint(node.line)
+            execute_block(node.body, symbol_table, context)
+            execute_assignment(node.update, symbol_table, context)
+        return
+
+    error_message = f'Condición no booleana en línea {node.line} en "doFor".'
+    while check_condition(node, symbol_table, context, error_message):
+        fuel.steps += 1
+        if fuel.steps > fuel.limit:
+            fuel.checkpoint(node.line)
+        execute_block(node.body, symbol_table, context)
+        execute_assignment(node.update, symbol_table, context)
+
+# Recorre el bucle contado con el contador en una variable de Python; la
+# condición y la actualización no se evalúan. Devuelve False sin ejecutar
+# nada si el inicio, el paso o el límite no son números del mismo tipo que
+# permitan hacerlo (entonces el bucle se ejecuta como siempre).
+def execute_counted(node, counted, symbol_table, context):
+    name, step = counted.name, counted.step
+    start = symbol_table[name]
+    # La condición lee el contador al menos una vez, antes que el límite
+    usage = context.unused_vars.get(name)
+    if usage is not None:
+        usage['used'] = True
+    bound = evaluate(counted.bound, symbol_table, context)
+    if type(start) is not type(step) or type(bound) not in (int, float):
+        return False
+
+    hoisted = counted.hoisted
+    if hoisted:
+        # Una llamada recursiva puede volver a entrar en el mismo bucle: sus
+        # valores invariantes son otros y los de esta ejecución se recuperan
+        # al salir
+        values = context.hoisted
+        outer = {key: values.pop(key) for key in hoisted if key in values}
+    try:
+        counter = run_counted(node, counted, start, bound, symbol_table, context)
+    finally:
+        if hoisted:
+            for key in hoisted:
+                values.pop(key, None)
+            values.update(outer)
+    symbol_table[name] = counter
+    return True
+
+# Devuelve el valor final del contador: el primero que no cumple la condición
+def run_counted(node, counted, start, bound, symbol_table, context):
+    name, step, body, line_num = counted.name, counted.step, counted.body, node.line
+    fuel = context.fuel
+    stop = range_stop(counted.op, start, bound, step)
+    if stop is not None:
+        counters = range(start, stop, step)
+        for counter in counters:
+            symbol_table[name] = counter
+            fuel.steps += 1
+            if fuel.steps > fuel.limit:
+                fuel.checkpoint(line_num)
+            execute_block(body, symbol_table, context)
+        return start + len(counters) * step
+
+    compare = COMPARISON_OPERATORS[counted.op]
+    counter = start
+    while compare(counter, bound):
+        fuel.steps += 1
+        if fuel.steps > fuel.limit:
+            fuel.checkpoint(line_num)
+        execute_block(body, symbol_table, context)
+        counter = counter + step
+        symbol_table[name] = counter
+    return counter
+
+# Fin del range equivalente a la condición si todo es entero y el paso avanza
+# hacia el límite; None en otro caso (se compara en cada vuelta)
+def range_stop(op, start, bound, step):
+    if type(start) is not int or type(bound) is not int:
+        return None
+    if step > 0:
+        if op == '<':
+            return bound
+        if op == '<=':
+            return bound + 1
+    elif step < 0:
+        if op == '>':
+            return bound
+        if op == '>=':
+            return bound - 1
+    return None
+
+def execute_print(node, symbol_table, context):
+    context.logs.append(display_value(evaluate(node.value, symbol_table, context)))
+
+def determine_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    elif isinstance(value, (int, float)):
+        return 'number'
+    elif isinstance(value, str):
+        return 'string'
+    elif is_array(value):
+        return 'array'
+    else:
+        raise SyntaxError(f'Tipo no soportado: {type(value).__name__}')
+
+# Con `node.typed` todas las asignaciones de la variable producen el mismo
+# tipo (typecheck.py): después de la primera no hay nada que comprobar
+def execute_assignment(node, symbol_table, context):
+    value = evaluate(node.value, symbol_table, context)
+    if node.typed and node.name in symbol_table:
+        symbol_table[node.name] = value
+    else:
+        assign_variable(node.name, value, node.line, symbol_table, context)
+
+def execute_scan(node, symbol_table, context):
+    assign_variable(node.name, context.read_input(node.line), node.line, symbol_table, context)
+
+def assign_variable(var_name, value, line_num, symbol_table, context):
+    new_type = determine_type(value)
+
+    existing_type = context.types.get(var_name)
+    if var_name in symbol_table and existing_type is not None:
+        if existing_type != new_type:
+            raise SyntaxError(f'Error en línea {line_num}: Variable "{var_name}" es de tipo {existing_type}, no se puede asignar {new_type}')
+    elif var_name not in symbol_table:
+        context.unused_vars[var_name] = {
+            'value': value,
+            'used': False  # Inicialmente no usada
+        }
+        context.types[var_name] = new_type
+    symbol_table[var_name] = value
+
+def execute_function(node, symbol_table, context):
+    symbol_table['__funciones__'][node.name] = node
+    context.unused_fns[node.name] = {
+        'params': node.params,
+        'called': False,
+    }
+
+def execute_function_call(node, symbol_table, context):
+    args = [evaluate(arg, symbol_table, context) for arg in node.args]
+    call_function(node.name, args, node.line, context)
+
+# Ejecuta la función con un marco nuevo y devuelve el valor de su return, o
+# None si termina sin devolver nada. Las funciones se buscan en el ámbito global.
+def call_function(func_name, args, line_num, context):
+    func = context.symbol_table['__funciones__'].get(func_name)
+    if func is None:
+        if func_name in BUILTINS:
+            return call_builtin(func_name, args, line_num)
+        raise SyntaxError(f'Función no definida: {func_name}')
+    if len(args) != len(func.params):
+        raise SyntaxError(f'Número incorrecto de argumentos para {func_name}')
+    if context.depth >= context.max_depth:
+        raise SyntaxError(f'Error en línea {line_num}: se superó el límite de {context.max_depth} llamadas anidadas al llamar a {func_name}.')
+
+    frame = Frame(zip(func.params, args))
+    frame.parent = context.symbol_table
+    context.depth += 1
+    try:
+        execute_block(func.body, frame, context)
+        value = None
+    except FunctionReturn as result:
+        value = result.value
+    finally:
+        context.depth -= 1
+    context.unused_fns[func_name]['called'] = True
+    return value
+
+def execute_return(node, symbol_table, context):
+    raise FunctionReturn(None if node.value is None else evaluate(node.value, symbol_table, context))
+
+# Sentencia instrumentada por profiler.py: mide su tiempo total y resta el de
+# las sentencias anidadas para obtener el propio
+def execute_profiled(node, symbol_table, context):
+    profile = context.profile
+    outer_children = profile.children_ns
+    profile.children_ns = 0
+    start = perf_counter_ns()
+    try:
+        statement = node.statement
+        EXECUTORS[type(statement)](statement, symbol_table, context)
+    finally:
+        elapsed = perf_counter_ns() - start
+        profile.record_statement(node.line, elapsed, elapsed - profile.children_ns)
+        profile.children_ns = outer_children + elapsed
+
+# Tabla de símbolos lista para serializar como JSON: las funciones se
+# reportan por su firma en lugar del nodo del AST y los arreglos en su forma
+# compacta de texto
+def export_variables(symbol_table):
+    variables = {
+        name: format_array(value) if is_array(value) else value
+        for name, value in symbol_table.items()
+    }
+    variables['__funciones__'] = {
+        name: {'params': func.params, 'line': func.line}
+        for name, func in symbol_table.get('__funciones__', {}).items()
+    }
+    return variables
+
+EXECUTORS = {
+    Block: execute_block,
+    If: execute_if,
+    While: execute_while,
+    DoFor: execute_doFor,
+    Print: execute_print,
+    Scan: execute_scan,
+    Assign: execute_assignment,
+    FuncDef: execute_function,
+    Call: execute_function_call,
+    Return: execute_return,
+    Profiled: execute_profiled,
+}
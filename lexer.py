@@ -1,14 +1,16 @@
 import re
+from array import array
+from bisect import bisect_right
 
 tokens = [
     ('START', r'\bINICIO\b'),
     ('END', r'\bFIN\b'),
-    ('KEYWORD', r'\b(if|else|print|scan|while|doFor)\b'),
+    ('KEYWORD', r'\b(if|else|print|scan|while|doFor|func|return)\b'),
     ('OPERATOR', r'(\+|\-|\*|\/|==|<=|>=|=|%|<|>|&|\|)'),
     ('IDENTIFIER', r'\b[A-Za-z_][A-Za-z0-9_]*\b'),
     ('NUMBER', r'\b\d+(\.\d+)?\b'),
     ('STRING', r'\".*?\"'),
-    ('SYMBOL', r'[!()\{\};]'),
+    ('SYMBOL', r'[!()\{\};,\[\]:]'),
     ('COMMENT', r'#.*'),
     ('WHITESPACE', r'\s+'),
     ('NEWLINE', r'!'),
@@ -17,27 +19,228 @@ tokens = [
     ('SYMBOL', r'[!()]'),
 ]
 
+SKIPPED_TOKENS = ('WHITESPACE', 'COMMENT')
+
+# Compila la tabla de tokens una sola vez en una única alternancia con grupos
+# nombrados (T0, T1, ...). La alternancia de `re` prueba las ramas en orden, así
+# que se conserva la prioridad de la tabla: gana el primer patrón que coincide.
+# Los espacios en blanco no pueden ser el inicio de ningún otro token, por eso
+# se consumen como prefijo opcional de cada coincidencia en lugar de ocupar una
+# vuelta completa del scanner.
+def compile_token_table(token_table):
+    whitespace_regex = '|'.join(regex for token_type, regex in token_table if token_type == 'WHITESPACE') or r'(?!)'
+    whitespace = re.compile(whitespace_regex)
+    master = re.compile(f'(?:{whitespace_regex})?(?:' + '|'.join(
+        f'(?P<T{index}>{token_regex})'
+        for index, (token_type, token_regex) in enumerate(token_table)
+        if token_type != 'WHITESPACE'
+    ) + ')')
+    group_types = {f'T{index}': token_type for index, (token_type, _) in enumerate(token_table)}
+    return master, whitespace, group_types
+
+# Tipos de token en el orden de la tabla del lexer. El índice en esta lista es
+# el código de un byte que guarda TokenStream y el que envía columnar_tokens.
+TOKEN_TYPES = list(dict.fromkeys(token_type for token_type, _ in tokens if token_type not in SKIPPED_TOKENS))
+TOKEN_CODES = {token_type: index for index, token_type in enumerate(TOKEN_TYPES)}
+
+LINE_BREAK = re.compile('\n')
+
+# Inicio (desplazamiento) de cada línea de un código, para pasar de un
+# desplazamiento a (línea, columna) con una búsqueda binaria. Se arma una sola
+# vez por código y solo cuando hace falta una posición (un error).
+class LineIndex:
+    __slots__ = ('starts',)
+
+    def __init__(self, source):
+        self.starts = array('I', [0])
+        self.starts.extend(match.end() for match in LINE_BREAK.finditer(source))
+
+    # Línea y columna, ambas desde 1; la columna se cuenta en caracteres
+    def position(self, offset):
+        line_num = bisect_right(self.starts, offset)
+        return line_num, offset - self.starts[line_num - 1] + 1
+
+# Error de léxico o de sintaxis con la posición del token que lo provocó. El
+# mensaje ya nombra la línea; `line` y `column` (None si no se conocen) son
+# para que el editor marque el punto exacto.
+class SourceError(SyntaxError):
+    def __init__(self, message, line=None, column=None):
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+# Tokens de un programa en columnas paralelas sobre el código fuente: el tipo
+# como código de un byte y el inicio, el fin y la línea como enteros sin
+# signo. Un token ocupa 13 bytes en lugar de una tupla con su propio texto; el
+# valor es un corte del código que se crea solo al pedirlo. Es lo que guarda
+# la caché de compilación. La línea es la del texto (cuenta saltos de línea);
+# la columna se calcula a partir del inicio con `position`.
+#
+# Se indexa y recorre como la lista de tuplas (tipo, valor, línea) que
+# devolvía el lexer (respuesta JSON, línea de comandos); el parser recibe sus
+# columnas con `columns()`.
+class TokenStream:
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'lines', 'line_index')
+
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.line_index = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        return (TOKEN_TYPES[self.kinds[index]], self.source[self.starts[index]:self.ends[index]], self.lines[index])
+
+    def __iter__(self):
+        source, types = self.source, TOKEN_TYPES
+        for kind, start, end, line_num in zip(self.kinds, self.starts, self.ends, self.lines):
+            yield (types[kind], source[start:end], line_num)
+
+    # (línea, columna) del token `index` en el código
+    def position(self, index):
+        if self.line_index is None:
+            self.line_index = LineIndex(self.source)
+        return self.line_index.position(self.starts[index])
+
+    # Columnas para el parser; cada valor se corta del código una sola vez
+    def columns(self):
+        source = self.source
+        values = [source[start:end] for start, end in zip(self.starts, self.ends)]
+        # Un solo objeto entero por número de línea (las líneas no decrecen):
+        # los nodos del AST de una misma línea lo comparten
+        line_numbers = tuple(range(self.lines[-1] + 1)) if self.lines else ()
+        lines = tuple(map(line_numbers.__getitem__, self.lines))
+        return TokenColumns(tuple(self.kinds.tolist()), tuple(values), lines, self)
+
+# Columnas de tokens como tuplas de Python para el parser, que las lee varias
+# veces por token: indexar una tupla no crea un entero en cada lectura como un
+# array, y el recolector deja de recorrer una tupla de textos y enteros tras
+# verla una vez. Existen solo mientras se analiza; la caché guarda el
+# TokenStream.
+class TokenColumns:
+    __slots__ = ('kinds', 'values', 'lines', 'stream')
+
+    def __init__(self, kinds, values, lines, stream=None):
+        self.kinds = kinds
+        self.values = values
+        self.lines = lines
+        self.stream = stream
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # (línea, columna) del token `pos`; sin código fuente solo se conoce la línea
+    def position(self, pos):
+        if self.stream is None:
+            return self.lines[pos], None
+        return self.stream.position(pos)
+
+# Columnas a partir de tuplas (tipo, valor, línea), p. ej. las de una
+# expresión suelta en evaluator.evaluate_expression
+def tuple_columns(tokens):
+    return TokenColumns(
+        [TOKEN_CODES[token_type] for token_type, _, _ in tokens],
+        [token_value for _, token_value, _ in tokens],
+        [line_num for _, _, line_num in tokens],
+    )
+
+def build_lexer(token_table):
+    master, whitespace, group_types = compile_token_table(token_table)
+
+    # Código de cada grupo por su número (match.lastindex); los tokens que se
+    # descartan quedan en None. Los grupos internos de un patrón no importan:
+    # lastindex es siempre el del grupo nombrado que los contiene.
+    group_codes = [None] * (master.groups + 1)
+    for name, number in master.groupindex.items():
+        token_type = group_types[name]
+        group_codes[number] = None if token_type in SKIPPED_TOKENS else TOKEN_CODES[token_type]
+
+    def tokenize(code):
+        line_num = 1
+        stream = TokenStream(code)
+        add_kind, add_start, add_end, add_line = (
+            stream.kinds.append, stream.starts.append, stream.ends.append, stream.lines.append)
+        pos = 0
+
+        # Un solo recorrido: el scanner avanza coincidencia tras coincidencia y
+        # se detiene en el primer carácter que ningún patrón reconoce. Solo se
+        # guardan posiciones; ningún token copia su texto. Los saltos de línea
+        # solo pueden estar en los espacios previos a una coincidencia (ningún
+        # patrón de token los acepta): se cuentan ahí.
+        scanner = master.scanner(code)
+        for match in iter(scanner.match, None):
+            group = match.lastindex
+            start, end = match.span(group)
+            line_num += code.count('\n', pos, start)
+            kind = group_codes[group]
+            if kind is not None:
+                add_kind(kind)
+                add_start(start)
+                add_end(end)
+                add_line(line_num)
+            pos = end
+
+        trailing = whitespace.match(code, pos)
+        if trailing:
+            pos = trailing.end()
+        if pos < len(code):
+            line_num, column = LineIndex(code).position(pos)
+            raise SourceError(f'Error léxico en la línea {line_num}, columna {column}: "{code[pos]}"', line_num, column)
+        return stream
+
+    return tokenize
+
+tokenize = build_lexer(tokens)
+
+# Tokens y código minificado (los valores de los tokens, sin espacios ni
+# comentarios). Quien además analiza el programa arma las columnas una vez y
+# minifica con ''.join(columns.values), como cache.CompileCache.
 def lexer(code):
-    pos = 0
-    line_num = 1
-    tokens_found = []
-    minified_code = ""
-    
-    while pos < len(code):
-        match = None
-        for token_type, token_regex in tokens:
-            pattern = re.compile(token_regex)
-            match = pattern.match(code, pos)
-            if match:
-                token_value = match.group(0)
-                if token_type not in ['WHITESPACE', 'COMMENT']:
-                    tokens_found.append((token_type, token_value, line_num))
-                    minified_code += token_value
-                if token_type == 'NEWLINE':
-                    line_num += 1
-                pos = match.end(0)
-                line_num += token_value.count('!')
-                break
-        if not match:
-            raise SyntaxError(f'Error léxico en la línea {line_num}, posición {pos}: "{code[pos]}"')
-    return tokens_found, minified_code
\ No newline at end of file
+    stream = tokenize(code)
+    return stream, ''.join([code[start:end] for start, end in zip(stream.starts, stream.ends)])
+
+# Variante del lexer para el editor: recorre el código desde una posición
+# cualquiera y produce (tipo, valor, inicio, fin) con desplazamientos en el
+# texto. Conserva los comentarios (sirven para resaltar) y no se detiene ante
+# un carácter desconocido: lo devuelve como token ERROR y sigue.
+def build_scanner(token_table):
+    master, whitespace, group_types = compile_token_table(token_table)
+
+    def scan(code, pos=0):
+        match_at = master.match
+        end = len(code)
+        while pos < end:
+            match = match_at(code, pos)
+            if match is None:
+                trailing = whitespace.match(code, pos)
+                if trailing:
+                    pos = trailing.end()
+                    if pos >= end:
+                        break
+                yield ('ERROR', code[pos], pos, pos + 1)
+                pos += 1
+                continue
+            group = match.lastgroup
+            yield (group_types[group], match.group(group), match.start(group), match.end(group))
+            pos = match.end()
+
+    return scan
+
+scan = build_scanner(tokens)
+
+# Tokens en columnas para la respuesta: en lugar de repetir [tipo, valor,
+# línea] por token se envían listas paralelas de códigos de tipo,
+# desplazamientos en el código y longitudes; el valor se recupera del propio
+# código fuente.
+def columnar_tokens(stream):
+    return {
+        'types': TOKEN_TYPES,
+        'codes': stream.kinds.tolist(),
+        'offsets': stream.starts.tolist(),
+        'lengths': [end - start for start, end in zip(stream.starts, stream.ends)],
+    }
@@ -0,0 +1,209 @@
+# Bucles doFor contados: doFor (i = inicio; i < límite; i = i + paso) con un
+# paso numérico constante, un límite que el cuerpo no puede cambiar (no llama
+# a funciones ni lee variables que el cuerpo asigna) y un cuerpo que no asigna
+# el contador. El intérprete de árbol los recorre con un contador de Python
+# (un range si todo es entero) en lugar de evaluar la condición y la
+# actualización en cada vuelta; el valor final del contador es el mismo.
+#
+# Además, las subexpresiones del cuerpo que no dependen de nada que cambie
+# dentro del bucle se reemplazan, en una copia del cuerpo, por nodos Hoisted
+# que se evalúan una sola vez por ejecución del bucle: la primera vez que se
+# llega a ellas, así que un error o una rama que no se toma se comportan
+# igual que antes. Las funciones no pueden asignar variables de quien las
+# llama (interpreter.Frame), así que una llamada en el cuerpo no cambia nada
+# de lo que lee una subexpresión invariante.
+from dataclasses import replace
+
+from nodes import (
+    Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return, Profiled,
+    Literal, Name, UnaryOp, BinOp, Compare, ArrayLiteral, Index, Slice, Hoisted,
+)
+
+class CountedLoop:
+    __slots__ = ('name', 'op', 'bound', 'step', 'body', 'hoisted')
+
+    def __init__(self, name, op, bound, step, body, hoisted):
+        self.name = name          # Variable contador
+        self.op = op              # Comparación de la condición
+        self.bound = bound        # Expresión del límite (invariante)
+        self.step = step          # Paso con signo
+        self.body = body          # Cuerpo con las subexpresiones invariantes extraídas
+        self.hoisted = hoisted    # Nodos Hoisted del cuerpo
+
+def annotate_loops(loops):
+    for node in loops:
+        node.counted = counted_loop(node)
+
+# Paso con signo de `i = i + c` o `i = i - c` (c número) cuando la condición
+# compara i con un único operador; None si el bucle no tiene esa forma. El
+# compilador lo usa también para su instrucción de fin de vuelta.
+def counter_step(node):
+    update, condition = node.update, node.condition
+    value = update.value
+    if type(condition) is not Compare or len(condition.ops) != 1:
+        return None
+    if type(condition.left) is not Name or condition.left.id != update.name:
+        return None
+    if type(value) is not BinOp or value.op not in ('+', '-'):
+        return None
+    if type(value.left) is not Name or value.left.id != update.name:
+        return None
+    step = value.right
+    if type(step) is not Literal or type(step.value) not in (int, float):
+        return None
+    return step.value if value.op == '+' else -step.value
+
+def counted_loop(node):
+    step = counter_step(node)
+    name = node.update.name
+    if step is None or node.init.name != name:
+        return None
+    written = assigned_names(node.body.statements, set())
+    if name in written:
+        return None
+    written.add(name)
+    bound = node.condition.comparators[0]
+    if not is_invariant(bound, written):
+        return None
+    hoisted = []
+    statements = hoist_statements(node.body.statements, written, hoisted)
+    body = replace(node.body, statements=statements) if hoisted else node.body
+    return CountedLoop(name, node.condition.ops[0], bound, step, body, hoisted)
+
+# Agrega a `names` las variables que asignan las sentencias, incluidas las de
+# bloques anidados y funciones declaradas dentro
+def assigned_names(statements, names):
+    for node in statements:
+        node_type = type(node)
+        if node_type is Assign or node_type is Scan:
+            names.add(node.name)
+        elif node_type is Block:
+            assigned_names(node.statements, names)
+        elif node_type is If:
+            assigned_names(node.body.statements, names)
+            if node.orelse is not None:
+                assigned_names([node.orelse], names)
+        elif node_type is While or node_type is FuncDef:
+            assigned_names(node.body.statements, names)
+        elif node_type is DoFor:
+            assigned_names([node.init, node.update], names)
+            assigned_names(node.body.statements, names)
+        elif node_type is Profiled:
+            assigned_names([node.statement], names)
+    return names
+
+def is_invariant(node, written):
+    node_type = type(node)
+    if node_type is Literal:
+        return True
+    if node_type is Name:
+        return node.id not in written
+    parts = operands(node)
+    return parts is not None and all(is_invariant(operand, written) for operand in parts)
+
+# Subexpresiones de una operación sin efectos (sin llamadas); None si el nodo
+# no es una
+def operands(node):
+    node_type = type(node)
+    if node_type is BinOp:
+        return [node.left, node.right]
+    if node_type is UnaryOp:
+        return [node.operand]
+    if node_type is Compare:
+        return [node.left, *node.comparators]
+    if node_type is ArrayLiteral:
+        return list(node.elements)
+    if node_type is Index:
+        return [node.value, node.index]
+    if node_type is Slice:
+        return [node.value] + [bound for bound in (node.start, node.stop) if bound is not None]
+    return None
+
+# Copia del nodo con otras subexpresiones, en el orden de `operands`
+def with_operands(node, parts):
+    node_type = type(node)
+    if node_type is BinOp:
+        return replace(node, left=parts[0], right=parts[1])
+    if node_type is UnaryOp:
+        return replace(node, operand=parts[0])
+    if node_type is Compare:
+        return replace(node, left=parts[0], comparators=parts[1:])
+    if node_type is ArrayLiteral:
+        return replace(node, elements=parts)
+    if node_type is Index:
+        return replace(node, value=parts[0], index=parts[1])
+    rest = iter(parts[1:])
+    return replace(node, value=parts[0],
+                   start=None if node.start is None else next(rest),
+                   stop=None if node.stop is None else next(rest))
+
+# ---- Extracción de subexpresiones invariantes ----
+
+# Copia de las sentencias con las subexpresiones invariantes reemplazadas; las
+# que no cambian se comparten con el original. Los bucles anidados se dejan
+# como están: su cuerpo se trata al marcarlos a ellos.
+def hoist_statements(statements, written, hoisted):
+    return [hoist_statement(node, written, hoisted) for node in statements]
+
+def hoist_statement(node, written, hoisted):
+    node_type = type(node)
+    if node_type is Assign or node_type is Print or (node_type is Return and node.value is not None):
+        value = hoist_root(node.value, written, hoisted)
+        return node if value is node.value else replace(node, value=value)
+    if node_type is Call:
+        args = [hoist_root(arg, written, hoisted) for arg in node.args]
+        return node if same_nodes(args, node.args) else replace(node, args=args)
+    if node_type is Block:
+        statements = hoist_statements(node.statements, written, hoisted)
+        return node if same_nodes(statements, node.statements) else replace(node, statements=statements)
+    if node_type is If:
+        condition = hoist_root(node.condition, written, hoisted)
+        body = hoist_statement(node.body, written, hoisted)
+        orelse = node.orelse if node.orelse is None else hoist_statement(node.orelse, written, hoisted)
+        if condition is node.condition and body is node.body and orelse is node.orelse:
+            return node
+        return replace(node, condition=condition, body=body, orelse=orelse)
+    return node
+
+# Expresión completa de una sentencia: si toda ella es invariante se extrae
+# entera
+def hoist_root(node, written, hoisted):
+    node, invariant = hoist_expression(node, written, hoisted)
+    return hoist_node(node, hoisted) if invariant else node
+
+def hoist_node(node, hoisted):
+    # Un literal o una variable sola no ganan nada
+    if type(node) is Literal or type(node) is Name:
+        return node
+    hoisted_node = Hoisted(node, node.line)
+    hoisted.append(hoisted_node)
+    return hoisted_node
+
+# Devuelve (expresión, si es invariante). Una expresión invariante se devuelve
+# tal cual para que la extraiga quien la contiene; en una que no lo es se
+# extraen sus operandos invariantes, que son las subexpresiones invariantes
+# más grandes.
+def hoist_expression(node, written, hoisted):
+    node_type = type(node)
+    if node_type is Literal:
+        return node, True
+    if node_type is Name:
+        return node, node.id not in written
+    if node_type is Call:
+        args = [hoist_root(arg, written, hoisted) for arg in node.args]
+        return (node if same_nodes(args, node.args) else replace(node, args=args)), False
+
+    parts = operands(node)
+    if parts is None:
+        return node, False
+    results = [hoist_expression(operand, written, hoisted) for operand in parts]
+    if all(invariant for _, invariant in results):
+        return node, True
+
+    new_parts = [hoist_node(operand, hoisted) if invariant else operand for operand, invariant in results]
+    if same_nodes(new_parts, parts):
+        return node, False
+    return with_operands(node, new_parts), False
+
+def same_nodes(new, old):
+    return all(a is b for a, b in zip(new, old))
@@ -0,0 +1,161 @@
+# Nodos del árbol de sintaxis abstracta (AST) de CustomLang.
+# Cada nodo guarda la línea del token que lo originó para los mensajes de error.
+# Los campos `typed` los marca typecheck.annotate_types antes de ejecutar, y
+# `counted` loops.annotate_loops; no forman parte de la representación ni de
+# la igualdad de los nodos.
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+# ---- Sentencias ----
+
+@dataclass
+class Program:
+    body: List
+    line: int = 1
+    # Variables cuyas lecturas el optimizador sustituyó por su valor constante
+    static_uses: Set[str] = field(default_factory=set)
+    typed: bool = field(default=False, repr=False, compare=False)
+    # Si el código tiene corchetes; sin ellos ningún valor puede ser un arreglo
+    arrays: bool = field(default=True, repr=False, compare=False)
+
+@dataclass
+class Block:
+    statements: List
+    line: int
+
+@dataclass
+class If:
+    condition: object
+    body: Block
+    orelse: Optional[object]
+    line: int
+    typed: bool = field(default=False, repr=False, compare=False)
+
+@dataclass
+class While:
+    condition: object
+    body: Block
+    line: int
+    typed: bool = field(default=False, repr=False, compare=False)
+
+@dataclass
+class DoFor:
+    init: 'Assign'
+    condition: object
+    update: 'Assign'
+    body: Block
+    line: int
+    typed: bool = field(default=False, repr=False, compare=False)
+    counted: object = field(default=None, repr=False, compare=False)
+
+@dataclass
+class Print:
+    value: object
+    line: int
+
+# scan(nombre): lee el siguiente dato de la entrada del programa
+@dataclass
+class Scan:
+    name: str
+    line: int
+
+@dataclass
+class Assign:
+    name: str
+    value: object
+    line: int
+    typed: bool = field(default=False, repr=False, compare=False)
+
+@dataclass
+class FuncDef:
+    name: str
+    params: List[str]
+    body: Block
+    line: int
+
+# Llamada a función: como sentencia descarta el valor devuelto y como
+# expresión lo usa
+@dataclass
+class Call:
+    name: str
+    args: List
+    line: int
+
+# return [expresión]: termina la función; sin expresión no devuelve valor
+@dataclass
+class Return:
+    value: Optional[object]
+    line: int
+
+# ---- Expresiones ----
+
+@dataclass
+class Literal:
+    value: object
+    line: int
+
+@dataclass
+class Name:
+    id: str
+    line: int
+
+@dataclass
+class UnaryOp:
+    op: str
+    operand: object
+    line: int
+
+@dataclass
+class BinOp:
+    op: str
+    left: object
+    right: object
+    line: int
+
+# Comparaciones encadenadas al estilo de Python: a < b <= c
+@dataclass
+class Compare:
+    left: object
+    ops: List[str]
+    comparators: List
+    line: int
+
+# [a, b, c]: arreglo numérico (arrays.py)
+@dataclass
+class ArrayLiteral:
+    elements: List
+    line: int
+
+# valor[índice]
+@dataclass
+class Index:
+    value: object
+    index: object
+    line: int
+
+# valor[inicio:fin]; los extremos omitidos son None
+@dataclass
+class Slice:
+    value: object
+    start: Optional[object]
+    stop: Optional[object]
+    line: int
+
+# ---- Perfilado ----
+
+# Envuelve una sentencia en la copia del AST que ejecuta el perfilador
+# (profiler.py); el programa normal nunca contiene estos nodos
+@dataclass
+class Profiled:
+    statement: object
+    line: int
+
+# ---- Bucles contados ----
+
+# Subexpresión invariante de un bucle contado (loops.py): se evalúa una vez por
+# ejecución del bucle. Solo aparece en la copia del cuerpo que guarda
+# DoFor.counted; la identidad del nodo es la clave de su valor.
+@dataclass(eq=False)
+class Hoisted:
+    value: object
+    line: int
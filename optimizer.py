@@ -0,0 +1,254 @@
+# Pase opcional de optimización entre parser.parse_program y la ejecución:
+#   - pliega subexpresiones constantes (2 * 3 + 1 -> 7),
+#   - propaga variables asignadas una sola vez con un valor constante,
+#   - elimina ramas de if/while cuya condición es constante y bloques vacíos.
+# Devuelve un programa nuevo; el original no se modifica.
+from dataclasses import replace
+
+from nodes import (
+    Program, Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return,
+    Literal, Name, UnaryOp, BinOp, Compare, ArrayLiteral, Index, Slice,
+)
+from evaluator import BINARY_OPERATORS, COMPARISON_OPERATORS, UNARY_OPERATORS
+
+def optimize(program):
+    optimizer = Optimizer(program)
+    body = optimizer.optimize_statements(program.body, top_level=True)
+    optimized = Program(body, program.line, static_uses=optimizer.propagated_names, arrays=program.arrays)
+    return optimized, optimizer.report
+
+class Optimizer:
+    def __init__(self, program):
+        self.constants = {}
+        self.propagated_names = set()
+        self.assignment_counts = {}
+        self.count_assignments(program.body)
+        self.certain_reads = set()
+        for node in program.body:
+            self.collect_certain_reads(node)
+        self.report = {
+            'folded': 0,
+            'propagated': 0,
+            'removed_branches': 0,
+            'removed_blocks': 0,
+            'details': [],
+        }
+
+    # Cuenta asignaciones por variable en todo el programa; los parámetros de
+    # función cuentan como asignación para no propagar nombres que se reutilizan
+    def count_assignments(self, statements):
+        for node in statements:
+            node_type = type(node)
+            if node_type is Assign or node_type is Scan:
+                self.assignment_counts[node.name] = self.assignment_counts.get(node.name, 0) + 1
+            elif node_type is Block:
+                self.count_assignments(node.statements)
+            elif node_type is If:
+                self.count_assignments(node.body.statements)
+                if node.orelse is not None:
+                    self.count_assignments([node.orelse])
+            elif node_type is While:
+                self.count_assignments(node.body.statements)
+            elif node_type is DoFor:
+                self.count_assignments([node.init, node.update])
+                self.count_assignments(node.body.statements)
+            elif node_type is FuncDef:
+                for param in node.params:
+                    self.assignment_counts[param] = self.assignment_counts.get(param, 0) + 2
+                self.count_assignments(node.body.statements)
+
+    # Variables que el programa lee sí o sí si termina sin error: las de las
+    # sentencias de nivel superior fuera de cuerpos de if, while, doFor y
+    # funciones. Solo esas se propagan, porque marcarlas como usadas
+    # (Program.static_uses) da el mismo aviso de variable sin usar que
+    # ejecutar el programa sin optimizar.
+    def collect_certain_reads(self, node):
+        node_type = type(node)
+        if node_type is Assign or node_type is Print:
+            self.collect_expression_reads(node.value)
+        elif node_type is Call:
+            for arg in node.args:
+                self.collect_expression_reads(arg)
+        elif node_type is Block:
+            for statement in node.statements:
+                self.collect_certain_reads(statement)
+        elif node_type is If or node_type is While:
+            self.collect_expression_reads(node.condition)
+        elif node_type is DoFor:
+            self.collect_expression_reads(node.init.value)
+            self.collect_expression_reads(node.condition)
+
+    def collect_expression_reads(self, node):
+        node_type = type(node)
+        if node_type is Name:
+            self.certain_reads.add(node.id)
+        elif node_type is BinOp:
+            self.collect_expression_reads(node.left)
+            self.collect_expression_reads(node.right)
+        elif node_type is UnaryOp:
+            self.collect_expression_reads(node.operand)
+        elif node_type is Compare:
+            # En a < b < c, c no se evalúa si a < b es falso
+            self.collect_expression_reads(node.left)
+            self.collect_expression_reads(node.comparators[0])
+        elif node_type is Call or node_type is ArrayLiteral:
+            for element in node.args if node_type is Call else node.elements:
+                self.collect_expression_reads(element)
+        elif node_type is Index:
+            self.collect_expression_reads(node.value)
+            self.collect_expression_reads(node.index)
+        elif node_type is Slice:
+            for part in (node.value, node.start, node.stop):
+                if part is not None:
+                    self.collect_expression_reads(part)
+
+    def note(self, kind, line_num, detail):
+        self.report[kind] += 1
+        self.report['details'].append(f'Línea {line_num}: {detail}')
+
+    # ---- Sentencias ----
+
+    def optimize_statements(self, statements, top_level=False):
+        optimized = []
+        for node in statements:
+            result = self.optimize_statement(node)
+            if result is None:
+                continue
+            if type(result) is Block and not result.statements:
+                self.note('removed_blocks', result.line, 'bloque vacío eliminado')
+                continue
+            optimized.append(result)
+
+            # Solo una asignación de nivel superior domina todas las lecturas
+            # posteriores del programa principal
+            if (top_level and type(result) is Assign and type(result.value) is Literal
+                    and self.assignment_counts.get(result.name) == 1
+                    and result.name in self.certain_reads):
+                self.constants[result.name] = result.value.value
+        return optimized
+
+    def optimize_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            return replace(node, value=self.optimize_expression(node.value))
+        elif node_type is Print:
+            return replace(node, value=self.optimize_expression(node.value))
+        elif node_type is Call:
+            return replace(node, args=[self.optimize_expression(arg) for arg in node.args])
+        elif node_type is Return:
+            if node.value is None:
+                return node
+            return replace(node, value=self.optimize_expression(node.value))
+        elif node_type is Block:
+            return replace(node, statements=self.optimize_statements(node.statements))
+        elif node_type is If:
+            return self.optimize_if(node)
+        elif node_type is While:
+            condition = self.optimize_expression(node.condition)
+            if type(condition) is Literal and condition.value is False:
+                self.note('removed_branches', node.line, 'while con condición siempre falsa eliminado')
+                return None
+            return replace(node, condition=condition, body=self.optimize_statement(node.body))
+        elif node_type is DoFor:
+            return replace(
+                node,
+                init=self.optimize_statement(node.init),
+                condition=self.optimize_expression(node.condition),
+                update=self.optimize_statement(node.update),
+                body=self.optimize_statement(node.body),
+            )
+        elif node_type is FuncDef:
+            # El cuerpo de una función puede ejecutarse antes o después de
+            # cualquier asignación global: no se propagan constantes dentro
+            outer_constants, self.constants = self.constants, {}
+            body = self.optimize_statement(node.body)
+            self.constants = outer_constants
+            return replace(node, body=body)
+        return node
+
+    def optimize_if(self, node):
+        condition = self.optimize_expression(node.condition)
+        body = self.optimize_statement(node.body)
+        orelse = self.optimize_statement(node.orelse) if node.orelse is not None else None
+
+        # Solo se decide en compilación si la condición es un booleano; otro
+        # valor constante debe seguir produciendo el error en ejecución
+        if type(condition) is Literal and type(condition.value) is bool:
+            if condition.value:
+                if orelse is not None:
+                    self.note('removed_branches', node.line, 'rama else inalcanzable eliminada')
+                return body
+            self.note('removed_branches', node.line, 'if con condición siempre falsa eliminado')
+            return orelse
+        return replace(node, condition=condition, body=body, orelse=orelse)
+
+    # ---- Expresiones ----
+
+    def optimize_expression(self, node):
+        node_type = type(node)
+        if node_type is Name:
+            if node.id in self.constants:
+                self.propagated_names.add(node.id)
+                self.report['propagated'] += 1
+                return Literal(self.constants[node.id], node.line)
+            return node
+        elif node_type is BinOp:
+            left = self.optimize_expression(node.left)
+            right = self.optimize_expression(node.right)
+            if type(left) is Literal and type(right) is Literal:
+                folded = self.fold(BINARY_OPERATORS[node.op], left.value, right.value, node.line)
+                if folded is not None:
+                    return folded
+            return replace(node, left=left, right=right)
+        elif node_type is Compare:
+            left = self.optimize_expression(node.left)
+            comparators = [self.optimize_expression(comparator) for comparator in node.comparators]
+            if type(left) is Literal and all(type(comparator) is Literal for comparator in comparators):
+                folded = self.fold_compare(node.ops, [left.value] + [c.value for c in comparators], node.line)
+                if folded is not None:
+                    return folded
+            return replace(node, left=left, comparators=comparators)
+        elif node_type is UnaryOp:
+            operand = self.optimize_expression(node.operand)
+            if type(operand) is Literal:
+                folded = self.fold(UNARY_OPERATORS[node.op], operand.value, None, node.line)
+                if folded is not None:
+                    return folded
+            return replace(node, operand=operand)
+        elif node_type is Call:
+            # Una llamada nunca se pliega, pero sus argumentos sí
+            return replace(node, args=[self.optimize_expression(arg) for arg in node.args])
+        elif node_type is ArrayLiteral:
+            # Los arreglos no se pliegan: un Literal solo guarda valores simples
+            return replace(node, elements=[self.optimize_expression(element) for element in node.elements])
+        elif node_type is Index:
+            return replace(node, value=self.optimize_expression(node.value), index=self.optimize_expression(node.index))
+        elif node_type is Slice:
+            return replace(
+                node,
+                value=self.optimize_expression(node.value),
+                start=None if node.start is None else self.optimize_expression(node.start),
+                stop=None if node.stop is None else self.optimize_expression(node.stop),
+            )
+        return node
+
+    # Una operación que falla (1 / 0, "a" - 1) no se pliega: el error se
+    # reporta en ejecución como siempre
+    def fold(self, function, left, right, line_num):
+        try:
+            value = function(left) if right is None else function(left, right)
+        except Exception:
+            return None
+        self.report['folded'] += 1
+        return Literal(value, line_num)
+
+    def fold_compare(self, ops, values, line_num):
+        try:
+            result = all(
+                COMPARISON_OPERATORS[op](left, right)
+                for op, left, right in zip(ops, values, values[1:])
+            )
+        except Exception:
+            return None
+        self.report['folded'] += 1
+        return Literal(result, line_num)
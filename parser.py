@@ -1,236 +1,358 @@
-from evaluator import evaluate_expression
-from config import logs 
+# Analizador sintáctico: convierte los tokens del lexer en un AST una sola
+# vez. Cada función parse_* recibe las columnas de los tokens
+# (lexer.TokenColumns, de TokenStream.columns()) y la posición actual y
+# devuelve el nodo construido junto con la posición siguiente.
+from lexer import TOKEN_CODES, SourceError
+from nodes import (
+    Program, Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return,
+    Literal, Name, UnaryOp, BinOp, Compare, ArrayLiteral, Index, Slice,
+)
+
+# Precedencia de los operadores binarios (mayor número = se agrupa antes).
+# Es la misma que aplica Python, con la que siempre se han evaluado las
+# expresiones: las comparaciones quedan por debajo de "|" y "&".
+BINARY_PRECEDENCE = {'|': 1, '&': 2, '+': 3, '-': 3, '*': 4, '/': 4, '%': 4}
+COMPARISON_OPERATORS = ('==', '<=', '>=', '<', '>')
+UNARY_OPERATORS = ('+', '-')
+
+# Códigos de tipo de token (índices de lexer.TOKEN_TYPES)
+START, END, IDENTIFIER, OPERATOR, NUMBER, STRING = (
+    TOKEN_CODES[token_type] for token_type in ('START', 'END', 'IDENTIFIER', 'OPERATOR', 'NUMBER', 'STRING'))
 
 def parse_program(tokens):
-    if tokens[0][0] != 'START' or tokens[-1][0] != 'END':
-        raise SyntaxError('El programa debe comenzar con "INICIO" y terminar con "FIN".')
-    
-    in_program = False
-    symbol_table = {}
-    current_statement = []
-    brace_stack = []  # Para manejar bloques anidados
-    
-    for token in tokens:
-        if token[0] == 'START':
-            in_program = True
-        elif token[0] == 'END':
-            in_program = False
-            if current_statement:
-                line_num = current_statement[-1][2]
-                raise SyntaxError(f'Error de sintaxis en la línea {line_num}: falta el símbolo "!" al final.')
-            break
-        elif in_program:
-            if token[1] == '!':
-                if not brace_stack:  # Solo procesar si no estamos dentro de un bloque
-                    parse_statement(current_statement, symbol_table)
-                    current_statement = []
-                else:
-                    current_statement.append(token)
-            elif token[1] == '{':
-                brace_stack.append('{')
-                current_statement.append(token)
-            elif token[1] == '}':
-                if not brace_stack:
-                    raise SyntaxError(f'Llave de cierre sin apertura en línea {token[2]}')
-                brace_stack.pop()
-                current_statement.append(token)
-                if not brace_stack:  # Fin del bloque
-                    parse_statement(current_statement, symbol_table)
-                    current_statement = []
-            else:
-                current_statement.append(token)
-
-    if in_program:
-        raise SyntaxError('El programa no ha sido cerrado con "FIN".')
-    
-    return symbol_table
-
-def parse_statement(tokens, symbol_table):
-    if not tokens:
-        return
-    
-    first_token = tokens[0][1]
+    if not tokens or tokens.kinds[0] != START or tokens.kinds[-1] != END:
+        message = 'El programa debe comenzar con "INICIO" y terminar con "FIN".'
+        if not tokens:
+            raise SourceError(message)
+        raise syntax_error(tokens, 0 if tokens.kinds[0] != START else len(tokens) - 1, message)
+
+    body, _ = parse_statements(tokens, 1, in_block=False)
+    check_returns(body)
+    return Program(body, tokens.lines[0], arrays='[' in tokens.values)
+
+# "return" solo puede aparecer dentro del cuerpo de una función
+def check_returns(statements):
+    for node in statements:
+        node_type = type(node)
+        if node_type is Return:
+            raise SourceError(f'Error en línea {node.line}: "return" fuera de una función.', node.line)
+        elif node_type is Block:
+            check_returns(node.statements)
+        elif node_type is If:
+            check_returns(node.body.statements)
+            if node.orelse is not None:
+                check_returns([node.orelse])
+        elif node_type is While or node_type is DoFor:
+            check_returns(node.body.statements)
+
+def peek_value(tokens, pos):
+    return tokens.values[pos] if pos < len(tokens.kinds) else None
+
+def last_line(tokens, pos):
+    return tokens.lines[min(pos, len(tokens.kinds) - 1)]
+
+# Error situado en el token `pos` (el último si el programa terminó antes); el
+# mensaje debe nombrar la línea de ese mismo token
+def syntax_error(tokens, pos, message):
+    line_num, column = tokens.position(min(pos, len(tokens.kinds) - 1))
+    return SourceError(message, line_num, column)
+
+# Un if/while/doFor/func o un bloque terminan en "}" y no necesitan "!"
+def ends_with_block(node):
+    if isinstance(node, If) and node.orelse is not None:
+        return ends_with_block(node.orelse)
+    return isinstance(node, (Block, If, While, DoFor, FuncDef))
+
+def parse_statements(tokens, pos, in_block):
+    statements = []
+    while True:
+        if pos >= len(tokens.kinds) or tokens.kinds[pos] == END:
+            if in_block:
+                raise syntax_error(tokens, pos, f'Error en línea {last_line(tokens, pos)}: bloque mal formado.')
+            return statements, pos
+
+        token_value = tokens.values[pos]
+        if token_value == '}':
+            if not in_block:
+                raise syntax_error(tokens, pos, f'Llave de cierre sin apertura en línea {tokens.lines[pos]}')
+            return statements, pos
+        if token_value == '!':
+            pos += 1
+            continue
+
+        statement, pos = parse_statement(tokens, pos)
+        statements.append(statement)
+        if ends_with_block(statement):
+            continue
+        if peek_value(tokens, pos) != '!':
+            line_num = tokens.lines[pos - 1]
+            if in_block:
+                raise syntax_error(tokens, pos - 1, f'Error en línea {line_num}: falta "!" al final.')
+            raise syntax_error(tokens, pos - 1, f'Error de sintaxis en la línea {line_num}: falta el símbolo "!" al final.')
+        pos += 1
+
+def parse_statement(tokens, pos):
+    first_token = tokens.values[pos]
     if first_token == 'if':
-        parse_if(tokens, symbol_table)
+        return parse_if(tokens, pos)
     elif first_token == 'else':
-        parse_else(tokens, symbol_table)
-    elif first_token == 'while':  # Nuevo caso para while
-        parse_while(tokens, symbol_table)
-    elif first_token == 'doFor':  # Nuevo caso para doFor
-        parse_doFor(tokens, symbol_table)
-    elif first_token == 'print':  # Nuevo caso para print
-        parse_print(tokens, symbol_table)
-    elif tokens[0][1] == '{':
-        parse_block(tokens, symbol_table)
+        line_num = tokens.lines[pos]
+        raise syntax_error(tokens, pos, f'Error en línea {line_num}: "else" sin un "if" previo.')
+    elif first_token == 'while':
+        return parse_while(tokens, pos)
+    elif first_token == 'doFor':
+        return parse_doFor(tokens, pos)
+    elif first_token == 'print':
+        return parse_print(tokens, pos)
+    elif first_token == 'scan':
+        return parse_scan(tokens, pos)
+    elif first_token == 'func':
+        return parse_function(tokens, pos)
+    elif first_token == 'return':
+        return parse_return(tokens, pos)
+    elif first_token == '{':
+        return parse_block(tokens, pos)
+    elif tokens.kinds[pos] == IDENTIFIER and peek_value(tokens, pos + 1) == '(':
+        return parse_function_call(tokens, pos)
     else:
-        parse_assignment(tokens, symbol_table)
-
-def parse_print(tokens, symbol_table):
-    try:
-        # Buscar paréntesis de la expresión
-        paren_start = tokens.index(('SYMBOL', '(', tokens[0][2]))
-        paren_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: print debe tener la forma print(expresión).')
-    
-    # Evaluar la expresión dentro del print
-    expr_tokens = tokens[paren_start+1:paren_end]
-    result = evaluate_expression(expr_tokens, symbol_table)
-    
-    # Almacenar el resultado en el array global
-    logs.append(str(result))
-
-def parse_doFor(tokens, symbol_table):
-    # Validar estructura básica
-    if len(tokens) < 2 or tokens[1][1] != '(':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: estructura "doFor" debe ser: doFor (inicialización; condición; actualización) {{...}}')
-
-    try:
-        # Buscar paréntesis de condición
-        paren_start = tokens.index(('SYMBOL', '(', tokens[0][2]), 1)  # Busca "(" después de "doFor"
-        paren_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "doFor".')
-    
-    # Obtener las tres partes del for
-    for_parts = tokens[paren_start+1:paren_end]
-    parts = []
-    current_part = []
-    
-    for token in for_parts:
-        if token[1] == ';':
-            parts.append(current_part)
-            current_part = []
-        else:
-            current_part.append(token)
-    parts.append(current_part)
-    
-    if len(parts) != 3:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: "doFor" necesita tres partes separadas por ";".')
-    
-    init_tokens, condition_tokens, update_tokens = parts
-    
-    # Procesar inicialización (asignación)
-    parse_assignment(init_tokens, symbol_table)
-    
-    # Evaluar condición (debe ser booleana)
-    condition = evaluate_expression(condition_tokens, symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num} en "doFor".')
-    
-    # Procesar cuerpo del doFor (debe estar entre llaves)
-    body_tokens = tokens[paren_end+1:]
-    if not body_tokens or body_tokens[0][1] != '{':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: cuerpo del "doFor" debe estar entre llaves {{}}.')
-    
-    # Ejecutar el bucle
-    while condition:
-        parse_block(body_tokens, symbol_table)
-        parse_assignment(update_tokens, symbol_table)
-        condition = evaluate_expression(condition_tokens, symbol_table)
-
-def parse_while(tokens, symbol_table):
-    try:
-        # Buscar paréntesis de condición
-        cond_start = tokens.index(('SYMBOL', '(', tokens[0][2])) + 1
-        cond_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "while".')
-    
-    # Evaluar condición
-    condition = evaluate_expression(tokens[cond_start:cond_end], symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num} (se esperaba true/false).')
-    
-    # Procesar cuerpo (debe estar entre llaves)
-    body_tokens = tokens[cond_end+1:]
-    if not body_tokens or body_tokens[0][1] != '{':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: cuerpo del "while" debe estar entre llaves {{}}.')
-    
-    parse_block(body_tokens, symbol_table)
-
-def parse_block(tokens, symbol_table):
-    if tokens[0][1] != '{' or tokens[-1][1] != '}':
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: bloque mal formado.')
-    
-    current_statement = []
-    brace_count = 0  # Contador de bloques anidados
-    
-    for token in tokens[1:-1]:  # Ignorar las llaves externas
-        if token[1] == '{':
-            brace_count += 1
-        elif token[1] == '}':
-            brace_count -= 1
-        
-        # Procesar "!" solo si no estamos dentro de un bloque anidado
-        if token[1] == '!' and brace_count == 0:
-            parse_statement(current_statement, symbol_table)
-            current_statement = []
+        return parse_assignment(tokens, pos)
+
+def parse_block(tokens, pos):
+    line_num = tokens.lines[pos]
+    if tokens.values[pos] != '{':
+        raise syntax_error(tokens, pos, f'Error en línea {line_num}: bloque mal formado.')
+    statements, pos = parse_statements(tokens, pos + 1, in_block=True)
+    return Block(statements, line_num), pos + 1
+
+# Condición entre paréntesis de if/while; `pos` es la de la palabra clave,
+# en cuya línea se informa el error
+def parse_condition(tokens, pos, error_message):
+    if peek_value(tokens, pos + 1) != '(':
+        raise syntax_error(tokens, pos, error_message)
+    condition, next_pos = parse_expression(tokens, pos + 2)
+    if peek_value(tokens, next_pos) != ')':
+        raise syntax_error(tokens, pos, error_message)
+    return condition, next_pos + 1
+
+def parse_if(tokens, pos):
+    line_num, if_pos = tokens.lines[pos], pos
+    condition, pos = parse_condition(
+        tokens, pos, f'Error en línea {line_num}: paréntesis mal formados en "if".')
+
+    if peek_value(tokens, pos) != '{':
+        raise syntax_error(tokens, if_pos, f'Error en línea {line_num}: cuerpo del "if" debe estar entre llaves.')
+    body, pos = parse_block(tokens, pos)
+
+    # El "else" puede venir separado del bloque del if por un "!"
+    else_pos = pos + 1 if peek_value(tokens, pos) == '!' else pos
+    orelse = None
+    if peek_value(tokens, else_pos) == 'else':
+        if peek_value(tokens, else_pos + 1) in (None, '!', '}') or tokens.kinds[else_pos + 1] == END:
+            raise syntax_error(tokens, else_pos, f'Error en línea {tokens.lines[else_pos]}: "else" no puede estar vacío.')
+        orelse, pos = parse_statement(tokens, else_pos + 1)
+
+    return If(condition, body, orelse, line_num), pos
+
+def parse_while(tokens, pos):
+    line_num, while_pos = tokens.lines[pos], pos
+    condition, pos = parse_condition(
+        tokens, pos, f'Error en línea {line_num}: paréntesis mal formados en "while".')
+
+    if peek_value(tokens, pos) != '{':
+        raise syntax_error(tokens, while_pos, f'Error en línea {line_num}: cuerpo del "while" debe estar entre llaves {{}}.')
+    body, pos = parse_block(tokens, pos)
+    return While(condition, body, line_num), pos
+
+def parse_doFor(tokens, pos):
+    line_num, for_pos = tokens.lines[pos], pos
+    if peek_value(tokens, pos + 1) != '(':
+        raise syntax_error(tokens, for_pos, f'Error en línea {line_num}: estructura "doFor" debe ser: doFor (inicialización; condición; actualización) {{...}}')
+
+    parts_error = f'Error en línea {line_num}: "doFor" necesita tres partes separadas por ";".'
+    init, pos = parse_assignment(tokens, pos + 2)
+    if peek_value(tokens, pos) != ';':
+        raise syntax_error(tokens, for_pos, parts_error)
+    condition, pos = parse_expression(tokens, pos + 1)
+    if peek_value(tokens, pos) != ';':
+        raise syntax_error(tokens, for_pos, parts_error)
+    update, pos = parse_assignment(tokens, pos + 1)
+    if peek_value(tokens, pos) != ')':
+        raise syntax_error(tokens, for_pos, f'Error en línea {line_num}: paréntesis mal formados en "doFor".')
+
+    if peek_value(tokens, pos + 1) != '{':
+        raise syntax_error(tokens, for_pos, f'Error en línea {line_num}: cuerpo del "doFor" debe estar entre llaves {{}}.')
+    body, pos = parse_block(tokens, pos + 1)
+    return DoFor(init, condition, update, body, line_num), pos
+
+def parse_print(tokens, pos):
+    line_num = tokens.lines[pos]
+    error_message = f'Error en línea {line_num}: print debe tener la forma print(expresión).'
+    if peek_value(tokens, pos + 1) != '(':
+        raise syntax_error(tokens, pos, error_message)
+    value, next_pos = parse_expression(tokens, pos + 2)
+    if peek_value(tokens, next_pos) != ')':
+        raise syntax_error(tokens, pos, error_message)
+    return Print(value, line_num), next_pos + 1
+
+def parse_scan(tokens, pos):
+    line_num = tokens.lines[pos]
+    if (peek_value(tokens, pos + 1) != '(' or pos + 2 >= len(tokens.kinds)
+            or tokens.kinds[pos + 2] != IDENTIFIER or peek_value(tokens, pos + 3) != ')'):
+        raise syntax_error(tokens, pos, f'Error en línea {line_num}: scan debe tener la forma scan(variable).')
+    return Scan(tokens.values[pos + 2], line_num), pos + 4
+
+def parse_function(tokens, pos):
+    line_num, func_pos = tokens.lines[pos], pos
+    if pos + 3 >= len(tokens.kinds):
+        raise syntax_error(tokens, pos, f'Error en línea {line_num}: Declaración de función incompleta')
+    if tokens.kinds[pos + 1] != IDENTIFIER:
+        raise syntax_error(tokens, pos + 1, f'Error en línea {tokens.lines[pos + 1]}: Nombre de función no válido')
+    if tokens.values[pos + 2] != '(':
+        raise syntax_error(tokens, pos + 2, f'Error en línea {tokens.lines[pos + 2]}: Se esperaba "(" después del nombre de la función')
+
+    func_name = tokens.values[pos + 1]
+
+    # Extraer parámetros hasta el cierre del paréntesis
+    params = []
+    pos += 3
+    while peek_value(tokens, pos) != ')':
+        if pos >= len(tokens.kinds) or tokens.kinds[pos] == END:
+            raise syntax_error(tokens, func_pos, f'Error en línea {line_num}: Paréntesis de parámetros no cerrado')
+        if tokens.kinds[pos] == IDENTIFIER:
+            params.append(tokens.values[pos])
+        elif tokens.values[pos] != ',':
+            raise syntax_error(tokens, pos, f'Error en línea {tokens.lines[pos]}: Carácter no válido en parámetros')
+        pos += 1
+
+    if peek_value(tokens, pos + 1) != '{':
+        raise syntax_error(tokens, pos + 1, f'Error en línea {last_line(tokens, pos + 1)}: Cuerpo de función debe comenzar con {{')
+    body, pos = parse_block(tokens, pos + 1)
+    return FuncDef(func_name, params, body, line_num), pos
+
+def parse_function_call(tokens, pos):
+    func_name, line_num, name_pos = tokens.values[pos], tokens.lines[pos], pos
+
+    args = []
+    pos += 2
+    if peek_value(tokens, pos) != ')':
+        while True:
+            arg, pos = parse_expression(tokens, pos)
+            args.append(arg)
+            if peek_value(tokens, pos) != ',':
+                break
+            pos += 1
+    if peek_value(tokens, pos) != ')':
+        raise syntax_error(tokens, name_pos, f'Error en línea {line_num}: paréntesis mal formados en la llamada a {func_name}.')
+    return Call(func_name, args, line_num), pos + 1
+
+def parse_return(tokens, pos):
+    line_num = tokens.lines[pos]
+    if peek_value(tokens, pos + 1) == '!':
+        return Return(None, line_num), pos + 1
+    value, pos = parse_expression(tokens, pos + 1)
+    return Return(value, line_num), pos
+
+def parse_assignment(tokens, pos):
+    if (pos + 1 < len(tokens.kinds) and tokens.kinds[pos] == IDENTIFIER
+            and tokens.kinds[pos + 1] == OPERATOR and tokens.values[pos + 1] == '='):
+        value, next_pos = parse_expression(tokens, pos + 2)
+        return Assign(tokens.values[pos], value, tokens.lines[pos]), next_pos
+
+    raise syntax_error(tokens, pos, f'Error de sintaxis en la línea {last_line(tokens, pos)}.')
+
+# ---- Expresiones (precedencia por escalada) ----
+
+def parse_expression(tokens, pos):
+    left, pos = parse_binary(tokens, pos, 1)
+
+    ops = []
+    comparators = []
+    while pos < len(tokens.kinds) and tokens.kinds[pos] == OPERATOR and tokens.values[pos] in COMPARISON_OPERATORS:
+        ops.append(tokens.values[pos])
+        right, pos = parse_binary(tokens, pos + 1, 1)
+        comparators.append(right)
+
+    if ops:
+        return Compare(left, ops, comparators, left.line), pos
+    return left, pos
+
+def parse_binary(tokens, pos, min_precedence):
+    left, pos = parse_unary(tokens, pos)
+
+    while pos < len(tokens.kinds) and tokens.kinds[pos] == OPERATOR:
+        op, line_num = tokens.values[pos], tokens.lines[pos]
+        precedence = BINARY_PRECEDENCE.get(op)
+        if precedence is None or precedence < min_precedence:
+            break
+        right, pos = parse_binary(tokens, pos + 1, precedence + 1)
+        left = BinOp(op, left, right, line_num)
+
+    return left, pos
+
+def parse_unary(tokens, pos):
+    if pos < len(tokens.kinds) and tokens.kinds[pos] == OPERATOR and tokens.values[pos] in UNARY_OPERATORS:
+        operand, next_pos = parse_unary(tokens, pos + 1)
+        return UnaryOp(tokens.values[pos], operand, tokens.lines[pos]), next_pos
+    return parse_postfix(tokens, pos)
+
+# Átomo seguido de índices o cortes: a[i], a[1:3], f(x)[0]
+def parse_postfix(tokens, pos):
+    node, pos = parse_atom(tokens, pos)
+    while peek_value(tokens, pos) == '[':
+        open_pos, line_num = pos, tokens.lines[pos]
+        start = stop = None
+        if peek_value(tokens, pos + 1) != ':':
+            start, pos = parse_expression(tokens, pos + 1)
         else:
-            current_statement.append(token)
-    
-    if current_statement:
-        line_num = current_statement[-1][2]
-        raise SyntaxError(f'Error en línea {line_num}: falta "!" al final.')
-    
-def parse_if(tokens, symbol_table):
-    try:
-        # Buscar paréntesis de condición
-        cond_start = tokens.index(('SYMBOL', '(', tokens[0][2])) + 1
-        cond_end = tokens.index(('SYMBOL', ')', tokens[0][2]))
-    except ValueError:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: paréntesis mal formados en "if".')
-    
-    # Evaluar condición
-    condition = evaluate_expression(tokens[cond_start:cond_end], symbol_table)
-    if not isinstance(condition, bool):
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Condición no booleana en línea {line_num}')
-    
-    # Procesar cuerpo del if SOLO si la condición es verdadera
-    body_tokens = tokens[cond_end+1:]
-    if condition:  # <--- ¡Aquí está el cambio clave!
-        if not body_tokens or body_tokens[0][1] != '{':
-            line_num = tokens[0][2]
-            raise SyntaxError(f'Error en línea {line_num}: cuerpo del "if" debe estar entre llaves.')
-        parse_block(body_tokens, symbol_table)
-
-def parse_else(tokens, symbol_table):
-    if len(tokens) < 2:
-        line_num = tokens[0][2]
-        raise SyntaxError(f'Error en línea {line_num}: "else" no puede estar vacío.')
-    # Procesa el cuerpo del else
-    parse_statement(tokens[1:], symbol_table)
-
-# Función para procesar asignaciones de variables
-def parse_assignment(tokens, symbol_table):
-    if len(tokens) >= 3 and tokens[0][0] == 'IDENTIFIER' and tokens[1][0] == 'OPERATOR' and tokens[1][1] == '=':
-        var_name = tokens[0][1]
-        expr_tokens = tokens[2:]
-
-        if len(expr_tokens) == 1 and expr_tokens[0][0] == 'NUMBER':
-            value = float(expr_tokens[0][1]) if '.' in expr_tokens[0][1] else int(expr_tokens[0][1])
-        elif len(expr_tokens) == 1 and expr_tokens[0][0] == 'STRING':
-            value = expr_tokens[0][1].strip('"')
+            pos += 1
+        if peek_value(tokens, pos) == ':':
+            if peek_value(tokens, pos + 1) != ']':
+                stop, pos = parse_expression(tokens, pos + 1)
+            else:
+                pos += 1
+            node = Slice(node, start, stop, line_num)
         else:
-            filterByIdentifiers = filter(lambda x: x[0] == 'IDENTIFIER', expr_tokens)
-            for(_, token_value, line_num) in filterByIdentifiers:
-                if token_value not in symbol_table:
-                    raise SyntaxError(f'Error de sintaxis en la línea {line_num}: falta el símbolo "!" al final de la declaración.')
-            value = evaluate_expression(expr_tokens, symbol_table)
+            node = Index(node, start, line_num)
+        if peek_value(tokens, pos) != ']':
+            raise syntax_error(tokens, open_pos, f'Error de sintaxis en la expresión en la línea {line_num}: falta "]"')
+        pos += 1
+    return node, pos
 
-        symbol_table[var_name] = value
-    else:
-        line_num = tokens[0][2] if tokens else '?'
-        raise SyntaxError(f'Error de sintaxis en la línea {line_num}.')
+def parse_array(tokens, pos):
+    open_pos, line_num = pos, tokens.lines[pos]
+    elements = []
+    pos += 1
+    if peek_value(tokens, pos) != ']':
+        while True:
+            element, pos = parse_expression(tokens, pos)
+            elements.append(element)
+            if peek_value(tokens, pos) != ',':
+                break
+            pos += 1
+    if peek_value(tokens, pos) != ']':
+        raise syntax_error(tokens, open_pos, f'Error de sintaxis en la expresión en la línea {line_num}: falta "]"')
+    return ArrayLiteral(elements, line_num), pos + 1
+
+def parse_atom(tokens, pos):
+    if pos >= len(tokens.kinds):
+        raise syntax_error(tokens, pos, f'Error de sintaxis en la expresión en la línea {last_line(tokens, pos)}: fin inesperado')
+
+    kind, token_value, line_num = tokens.kinds[pos], tokens.values[pos], tokens.lines[pos]
+    if kind == NUMBER:
+        value = float(token_value) if '.' in token_value else int(token_value)
+        return Literal(value, line_num), pos + 1
+    elif kind == STRING:
+        return Literal(token_value[1:-1], line_num), pos + 1
+    elif kind == IDENTIFIER:
+        if peek_value(tokens, pos + 1) == '(':
+            return parse_function_call(tokens, pos)
+        return Name(token_value, line_num), pos + 1
+    elif token_value == '(':
+        inner, next_pos = parse_expression(tokens, pos + 1)
+        if peek_value(tokens, next_pos) != ')':
+            raise syntax_error(tokens, pos, f'Error de sintaxis en la expresión en la línea {line_num}: falta ")"')
+        return inner, next_pos + 1
+    elif token_value == '[':
+        return parse_array(tokens, pos)
+
+    raise syntax_error(tokens, pos, f'Error de sintaxis en la expresión en la línea {line_num}: {token_value}')
@@ -0,0 +1,130 @@
+# Perfilador por línea para /compile con "profile": true. No toca el AST de la
+# caché ni los motores: `instrument` crea una copia del programa en la que cada
+# sentencia va envuelta en un nodo Profiled y cada expresión lleva un cierre
+# que mide su evaluación. Sin perfilar se ejecuta el árbol original, así que
+# el costo es cero cuando está apagado.
+#
+# El perfil se mide siempre con el intérprete de árbol: el bytecode no conserva
+# las sentencias y su tiempo por línea no sería comparable. Las filas usan la
+# línea de cada nodo, que es la del texto (la del editor).
+from dataclasses import replace
+from time import perf_counter_ns
+
+from lexer import tokenize
+from parser import parse_program
+from nodes import Block, If, While, DoFor, Print, Scan, Assign, FuncDef, Call, Return, Profiled
+from evaluator import compile_expression
+
+PROFILE_COLUMNS = ('line', 'count', 'evals', 'total_us', 'self_us', 'expr_us')
+
+class LineProfile:
+    def __init__(self):
+        # línea -> [ejecuciones, evaluaciones, total ns, propio ns, expresiones ns]
+        self.lines = {}
+        # Tiempo de las sentencias anidadas en la que se está midiendo
+        self.children_ns = 0
+
+    def entry(self, line_num):
+        entry = self.lines.get(line_num)
+        if entry is None:
+            entry = self.lines[line_num] = [0, 0, 0, 0, 0]
+        return entry
+
+    def record_statement(self, line_num, total_ns, self_ns):
+        entry = self.entry(line_num)
+        entry[0] += 1
+        entry[2] += total_ns
+        entry[3] += self_ns
+
+    def record_expression(self, line_num, elapsed_ns):
+        entry = self.entry(line_num)
+        entry[1] += 1
+        entry[4] += elapsed_ns
+
+    # Tabla compacta {"columns": [...], "rows": [[...], ...]} con una fila por
+    # línea, ordenada por línea
+    def table(self):
+        return {
+            'columns': list(PROFILE_COLUMNS),
+            'rows': [
+                [line_num, count, evals, total // 1000, self_ns // 1000, expr // 1000]
+                for line_num, (count, evals, total, self_ns, expr) in sorted(self.lines.items())
+            ],
+        }
+
+# ---- Instrumentación ----
+
+def instrument(program):
+    return replace(program, body=instrument_statements(program.body))
+
+def instrument_statements(statements):
+    return [instrument_statement(statement) for statement in statements]
+
+def instrument_statement(node):
+    return Profiled(instrument_children(node), node.line)
+
+# Copia del nodo con sus bloques instrumentados y sus expresiones medidas; las
+# expresiones de un bucle (condición, inicio, paso) cuentan en la línea del bucle
+def instrument_children(node):
+    node_type = type(node)
+    line_num = node.line
+    if node_type is Block:
+        return replace(node, statements=instrument_statements(node.statements))
+    if node_type is If:
+        orelse = node.orelse
+        if orelse is not None:
+            orelse = instrument_statement(orelse) if type(orelse) is If else instrument_children(orelse)
+        return replace(node, condition=timed_expression(node.condition, line_num),
+                       body=instrument_children(node.body), orelse=orelse)
+    if node_type is While:
+        return replace(node, condition=timed_expression(node.condition, line_num),
+                       body=instrument_children(node.body))
+    if node_type is DoFor:
+        return replace(
+            node,
+            init=replace(node.init, value=timed_expression(node.init.value, line_num)),
+            condition=timed_expression(node.condition, line_num),
+            update=replace(node.update, value=timed_expression(node.update.value, line_num)),
+            body=instrument_children(node.body),
+        )
+    if node_type is Print or node_type is Assign:
+        return replace(node, value=timed_expression(node.value, line_num))
+    if node_type is Call:
+        return replace(node, args=[timed_expression(arg, line_num) for arg in node.args])
+    if node_type is Return:
+        if node.value is None:
+            return node
+        return replace(node, value=timed_expression(node.value, line_num))
+    if node_type is FuncDef:
+        return replace(node, body=instrument_children(node.body))
+    if node_type is Scan:
+        return node
+    raise SyntaxError(f'Sentencia no soportada por el perfilador en la línea {line_num}')
+
+# Copia del nodo de expresión con un cierre que mide la evaluación completa;
+# los nodos internos se comparten con el original
+def timed_expression(node, line_num):
+    compiled = compile_expression(node)
+
+    def timed(symbol_table, context):
+        start = perf_counter_ns()
+        try:
+            return compiled(symbol_table, context)
+        finally:
+            context.profile.record_expression(line_num, perf_counter_ns() - start)
+
+    copy = replace(node)
+    copy.compiled = timed
+    return copy
+
+# ---- Fases de análisis ----
+
+# Tiempo del lexer y del parser sobre el código, medidos aparte de la caché de
+# compilación para que no dependan de si hubo acierto
+def measure_phases(code):
+    start = perf_counter_ns()
+    tokens_detected = tokenize(code)
+    lexed = perf_counter_ns()
+    parse_program(tokens_detected.columns())
+    parsed = perf_counter_ns()
+    return {'lex_us': (lexed - start) // 1000, 'parse_us': (parsed - lexed) // 1000}
@@ -0,0 +1,27 @@
+# Forma de la respuesta de /compile pedida por el cliente:
+#   fields        lista de campos a incluir (por defecto, todos)
+#   token_format  "list" ([tipo, valor, línea] por token) o "columnar"
+#                 (lexer.columnar_tokens)
+RESPONSE_FIELDS = (
+    'message', 'variables', 'minified_code', 'tokens_found', 'logs',
+    'warnings', 'warnings_fns', 'optimizations', 'steps', 'cache', 'profile',
+)
+TOKEN_FORMATS = ('list', 'columnar')
+
+def parse_shape(fields=None, token_format=None):
+    if fields is not None:
+        if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+            raise ValueError('fields debe ser una lista de nombres de campos.')
+        unknown = [field for field in fields if field not in RESPONSE_FIELDS]
+        if unknown:
+            raise ValueError(f'Campos desconocidos: {", ".join(unknown)}. Opciones: {", ".join(RESPONSE_FIELDS)}')
+        fields = set(fields)
+    token_format = token_format or 'list'
+    if token_format not in TOKEN_FORMATS:
+        raise ValueError(f'Formato de tokens no válido: {token_format}. Opciones: {", ".join(TOKEN_FORMATS)}')
+    return fields, token_format
+
+def shape_response(response, fields):
+    if fields is None:
+        return response
+    return {field: value for field, value in response.items() if field in fields}
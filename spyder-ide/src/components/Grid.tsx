@@ -1,5 +1,22 @@
-import useCompile from '../hooks/useCompile'
-import Editor from '@monaco-editor/react';
+import { useEffect, useRef } from 'react'
+import useCompile, { Profile } from '../hooks/useCompile'
+import Editor, { OnMount } from '@monaco-editor/react';
+
+// Niveles del mapa de calor (clases heat-1 ... heat-5 en index.css): la línea
+// con más tiempo propio es la más caliente
+const HEAT_LEVELS = 5
+
+const heatDecorations = (profile: Profile) => {
+    const maxSelf = Math.max(1, ...profile.rows.map(row => row[4]))
+    return profile.rows.map(([line, count, evals, total, self]) => ({
+        range: { startLineNumber: line, startColumn: 1, endLineNumber: line, endColumn: 1 },
+        options: {
+            isWholeLine: true,
+            linesDecorationsClassName: `heat heat-${Math.min(HEAT_LEVELS, Math.max(1, Math.ceil(self / maxSelf * HEAT_LEVELS)))}`,
+            hoverMessage: { value: `${count} ejecuciones · ${evals} evaluaciones · ${total} µs total · ${self} µs propios` }
+        }
+    }))
+}
 
 const Grid = () => {
 
@@ -9,9 +26,72 @@ const Grid = () => {
         success,
         variables,
         error,
+        errorPosition,
         value,
-        warnings
+        warnings,
+        logs,
+        running,
+        profiling,
+        setProfiling,
+        profile,
+        diagnostics
     } = useCompile()
+
+    const editorRef = useRef<Parameters<OnMount>[0] | null>(null)
+    const monacoRef = useRef<Parameters<OnMount>[1] | null>(null)
+    const decorationsRef = useRef<string[]>([])
+
+    const handleMount: OnMount = (editor, monaco) => {
+        editorRef.current = editor
+        monacoRef.current = monaco
+    }
+
+    // Subrayado en el punto exacto del último error de léxico o de sintaxis;
+    // sin columna se marca la línea entera
+    useEffect(() => {
+        const editor = editorRef.current
+        const monaco = monacoRef.current
+        const model = editor?.getModel()
+        if( !monaco || !model ) return
+        const markers = error && errorPosition ? [{
+            severity: monaco.MarkerSeverity.Error,
+            message: error,
+            startLineNumber: errorPosition.line,
+            startColumn: errorPosition.column ?? 1,
+            endLineNumber: errorPosition.line,
+            endColumn: errorPosition.column !== null
+                ? model.getWordAtPosition({ lineNumber: errorPosition.line, column: errorPosition.column })?.endColumn ?? errorPosition.column + 1
+                : model.getLineMaxColumn(errorPosition.line)
+        }] : []
+        monaco.editor.setModelMarkers(model, 'customlang', markers)
+    }, [error, errorPosition])
+
+    // Avisos del análisis estático sobre la línea completa
+    useEffect(() => {
+        const editor = editorRef.current
+        const monaco = monacoRef.current
+        const model = editor?.getModel()
+        if( !monaco || !model ) return
+        const lineCount = model.getLineCount()
+        monaco.editor.setModelMarkers(model, 'customlang-lint', diagnostics
+            .filter(diagnostic => diagnostic.line <= lineCount)
+            .map(diagnostic => ({
+                severity: diagnostic.severity === 'error' ? monaco.MarkerSeverity.Error : monaco.MarkerSeverity.Warning,
+                message: diagnostic.message,
+                startLineNumber: diagnostic.line,
+                startColumn: model.getLineFirstNonWhitespaceColumn(diagnostic.line) || 1,
+                endLineNumber: diagnostic.line,
+                endColumn: model.getLineMaxColumn(diagnostic.line)
+            })))
+    }, [diagnostics])
+
+    // Mapa de calor en el margen del editor con el perfil de la última ejecución
+    useEffect(() => {
+        const editor = editorRef.current
+        if( !editor ) return
+        decorationsRef.current = editor.deltaDecorations(decorationsRef.current, profile ? heatDecorations(profile) : [])
+    }, [profile])
+
     return (
         <div className='grid'>
             <section>
@@ -20,9 +100,10 @@ const Grid = () => {
                     // language="javascript"  
                     value={value}
                     theme='vs-dark'
-                    options={{ minimap: { enabled: true } }}
+                    options={{ minimap: { enabled: true }, lineDecorationsWidth: 12 }}
                     language="plaintext" // Modo texto plano (sin resaltado)
                     onChange={handleChangeCode}
+                    onMount={handleMount}
 
                 />
                 <textarea 
@@ -32,7 +113,18 @@ const Grid = () => {
                     // onChange={handleChangeCode}
                 >
                 </textarea>
-                <button onClick={handleCompile} className='btn btn-primary'>Compilar</button>
+                <button onClick={handleCompile} className='btn btn-primary' disabled={running}>
+                    { running ? 'Ejecutando...' : 'Compilar' }
+                </button>
+                <label className='profile-toggle'>
+                    <input
+                        type='checkbox'
+                        checked={profiling}
+                        disabled={running}
+                        onChange={event => setProfiling(event.target.checked)}
+                    />
+                    Perfilar
+                </label>
                 <section>
                 <h3>Consola</h3>
                 {
@@ -87,24 +179,17 @@ const Grid = () => {
                     <h3>Logs</h3>
                     <ul className='box-tokens'>
                         {
-                            success &&
-                            success.logs.map( log => (
-                                <>
-                                    <li>
-                                        {log}
-                                    </li>
-                                    {/* <hr /> */}
-                                </>
+                            logs.map( (log, index) => (
+                                <li key={`log-${index}`}>
+                                    {log}
+                                </li>
                             ))
                         }
                         {
-                        success &&
-                        <>
-                            {warnings?.map((element,index) => (
-                                <li key={index}>{element}</li>
-                            ))}
-                        </>
-                    }
+                            warnings.map((element,index) => (
+                                <li key={`warning-${index}`}>{element}</li>
+                            ))
+                        }
                     </ul>
                 </div>
             </section>
@@ -1,24 +1,64 @@
 import { OnChange } from '@monaco-editor/react'
-import axios from 'axios'
 import { useEffect, useState } from 'react'
 const APIURL = 'http://127.0.0.1:5000/compile'
+const ANALYZEURL = 'http://127.0.0.1:5000/analyze'
+
+// Espera tras la última tecla antes de pedir el análisis estático
+const LINT_DELAY_MS = 250
 
 type Token = [string, string]
 
+// Perfil por línea de /compile con "profile": true: una fila por línea del
+// texto con [línea, ejecuciones, evaluaciones, total_us, propio_us, expresiones_us]
+export type Profile = {
+    columns: string[]
+    rows: [number, number, number, number, number, number][]
+    engine: string
+    phases: { lex_us: number, parse_us: number }
+}
+
+// Posición (desde 1) del token que provocó un error de léxico o de sintaxis
+export type ErrorPosition = {
+    line: number
+    column: number | null
+}
+
+// Aviso del análisis estático de /analyze
+export type Diagnostic = {
+    kind: string
+    severity: 'error' | 'warning'
+    name: string
+    line: number
+    message: string
+}
+
 type Compiled = {
     message: string
     tokens_found: Token[]
     variables: object
     minified_code: string
+    profile?: Profile | null
 }
 
+// Eventos NDJSON de /compile con "stream": true
+type StreamEvent =
+    | { event: 'output', lines: string[] }
+    | { event: 'warnings', warnings: string[], warnings_fns: string[] }
+    | ({ event: 'result', status: number, error?: string, position?: ErrorPosition } & Compiled)
+
 const useCompile = () => {
 
     const [ error , setError ] = useState<string | null>(null)
+    const [ errorPosition , setErrorPosition ] = useState<ErrorPosition | null>(null)
     const [ success , setSuccess ] = useState<Compiled | null>(null)
     const [ value , setValue ] = useState<any>('')
     const [ variables , setVariables ] = useState<any>([])
-    const [ warnings , setWarnings ] = useState<string>([])
+    const [ warnings , setWarnings ] = useState<string[]>([])
+    const [ logs , setLogs ] = useState<string[]>([])
+    const [ running , setRunning ] = useState(false)
+    const [ profiling , setProfiling ] = useState(false)
+    const [ profile , setProfile ] = useState<Profile | null>(null)
+    const [ diagnostics , setDiagnostics ] = useState<Diagnostic[]>([])
 
     useEffect(() => {
         const code = window.localStorage.getItem('code')
@@ -28,23 +68,82 @@ const useCompile = () => {
         }
     }
     , [])
+
+    // Análisis estático mientras se escribe: no ejecuta el programa. Un error
+    // de sintaxis deja la lista vacía; se muestra al compilar.
+    useEffect(() => {
+        const code = value as string
+        if( !code || !code.trim() ) 
+        {
+            setDiagnostics([])
+            return
+        }
+        const controller = new AbortController()
+        const timer = setTimeout(async () => {
+            try 
+            {
+                const response = await fetch(ANALYZEURL, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ code }),
+                    signal: controller.signal
+                })
+                const data = await response.json()
+                setDiagnostics(data.diagnostics ?? [])
+            } 
+            catch 
+            {
+                // Petición cancelada por una tecla posterior o servidor caído
+            }
+        }, LINT_DELAY_MS)
+        return () => {
+            clearTimeout(timer)
+            controller.abort()
+        }
+    }, [value])
+
     const handleCompile = async () => {
 
 
+        setSuccess(null)
+        setError(null)
+        setErrorPosition(null)
+        setLogs([])
+        setWarnings([])
+        setProfile(null)
+        setRunning(true)
+
         try 
         {
 
             const code = value as string
 
-            const { data } = await axios.post(APIURL, { code })
-
-            const { variables = {} , warnings = [] , warnings_fns = [] } = data
-            const { __funciones__ , __logs__ , ...rest } = variables
-
-            setSuccess(data)
-            setVariables(rest)
-            setWarnings(warnings.concat(warnings_fns))
-            setError(null)
+            // La salida llega por partes mientras el programa corre: cada
+            // línea del cuerpo es un evento JSON
+            const response = await fetch(APIURL, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ code, stream: true, profile: profiling })
+            })
+
+            if( !response.body ) 
+            {
+                throw new Error('El servidor no devolvió contenido.')
+            }
+
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+            let buffer = ''
+
+            while( true ) 
+            {
+                const { done, value: chunk } = await reader.read()
+                if( done ) break
+
+                buffer += chunk
+                const lines = buffer.split('\n')
+                buffer = lines.pop() ?? ''
+                lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)))
+            }
         
         } 
         catch (error) 
@@ -52,17 +151,46 @@ const useCompile = () => {
             console.log('Error:', error)
             handleError(error)    
         }
+        finally 
+        {
+            setRunning(false)
+        }
 
     }
 
-    const handleError = (error: any) => {
-
-        setSuccess(null)
+    const handleEvent = (data: StreamEvent) => {
 
-        if( error.response ) 
+        if( data.event === 'output' ) 
         {
-            setError(error?.response?.data?.error)
+            setLogs(current => current.concat(data.lines))
         }
+        else if( data.event === 'warnings' ) 
+        {
+            setWarnings(data.warnings.concat(data.warnings_fns))
+        }
+        else if( data.error ) 
+        {
+            // Un programa cortado por el límite de pasos también trae su perfil
+            setSuccess(null)
+            setError(data.error)
+            setErrorPosition(data.position ?? null)
+            setProfile(data.profile ?? null)
+        }
+        else 
+        {
+            const { __funciones__ , __logs__ , ...rest } = data.variables as any
+            setSuccess(data)
+            setVariables(rest)
+            setError(null)
+            setProfile(data.profile ?? null)
+        }
+
+    }
+
+    const handleError = (error: any) => {
+
+        setSuccess(null)
+        setError(error?.message ?? 'No se pudo conectar con el servidor.')
 
     }
 
@@ -79,8 +207,15 @@ const useCompile = () => {
     variables,
     success,
     error,
+    errorPosition,
     value,
-    warnings
+    warnings,
+    logs,
+    running,
+    profiling,
+    setProfiling,
+    profile,
+    diagnostics
   }
 }
 
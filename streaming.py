@@ -0,0 +1,72 @@
+# Ejecución con salida en flujo para /compile: lo que imprime el programa se
+# envía al cliente mientras corre, en lugar de acumularse en una lista hasta
+# el final. Los mensajes son tuplas ('event', dict) con la salida y los avisos
+# y, al final, ('result', (respuesta, código HTTP)).
+import queue
+import threading
+import time
+
+# Líneas de print que se agrupan en un mismo evento
+BATCH_LINES = 64
+# Tiempo máximo que una línea espera a que se complete su grupo
+BATCH_INTERVAL = 0.05
+# Eventos pendientes de enviar antes de que el programa se detenga a esperar
+# al cliente
+STREAM_BUFFER = 64
+
+# Sustituye a la lista de logs del contexto: agrupa las líneas y las entrega
+# a `emit` como un evento {"event": "output", "lines": [...]}
+class OutputStream:
+    def __init__(self, emit):
+        self.emit = emit
+        self.pending = []
+        # La primera línea sale de inmediato; luego se agrupan
+        self.last_flush = 0.0
+
+    def append(self, line):
+        self.pending.append(line)
+        if len(self.pending) >= BATCH_LINES or time.monotonic() - self.last_flush >= BATCH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            lines, self.pending = self.pending, []
+            self.emit({'event': 'output', 'lines': lines})
+        self.last_flush = time.monotonic()
+
+# Corre target(job, emit) en un hilo y devuelve sus mensajes a medida que
+# llegan. La cola es acotada: si el cliente lee despacio, el programa espera.
+# Si el cliente se va, el programa se corta en el siguiente print.
+def stream_inline(target, job):
+    messages = queue.Queue(maxsize=STREAM_BUFFER)
+    cancelled = threading.Event()
+
+    def put(message):
+        while True:
+            if cancelled.is_set():
+                raise SyntaxError('Ejecución cancelada: el cliente cerró la conexión.')
+            try:
+                messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run():
+        try:
+            result = target(job, lambda event: put(('event', event)))
+        except Exception as e:
+            result = ({'error': f'Error interno del ejecutor: {e}'}, 500)
+        try:
+            put(('result', result))
+        except SyntaxError:
+            pass
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while True:
+            message = messages.get()
+            yield message
+            if message[0] == 'result':
+                return
+    finally:
+        cancelled.set()
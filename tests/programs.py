@@ -0,0 +1,77 @@
+# Generador de programas aleatorios válidos para las pruebas diferenciales:
+# expresiones de todos los tipos, if/else, while, doFor (contados o no),
+# scan y llamadas a funciones, incluidas las recursivas. Las variables
+# locales de las funciones no repiten nombres globales, porque el uso de
+# variables se registra por nombre y cada motor lo marca en otro momento.
+import random
+
+GLOBALS = ['a', 'b', 'n', 's', 'k']
+COUNTERS = ['i', 'j']
+
+FUNCTIONS = '''func f (p) { r = p + 1! return r! }
+func g (m) { t = 0! doFor (q = 0; q < m; q = q + 1) { t = t + m * 2 + q! if (t > 40) { return t! } } return t! }
+func h (m) { if (m < 1) { return! } doFor (w = 0; w < 2; w = w + 1) { print(w * 10 + m)! u = g(2)! h(m - 1)! } }
+'''
+
+PRELUDES = ['n = 4! k = 2.5!', 'n = 3! k = 1!', 'n = "x"! k = 0!', '']
+
+class ProgramGenerator:
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def program(self):
+        body = ' '.join(self.statement() for _ in range(self.random.randint(1, 7)))
+        return f'INICIO\n{FUNCTIONS}{self.random.choice(PRELUDES)}\n{body}\nFIN'
+
+    def atom(self):
+        return self.random.choice([
+            '1', '2', '0', '2.5', '"x"', self.random.choice(GLOBALS), self.random.choice(GLOBALS),
+            'i', 'j', '(1 < 2)', 'f(1)', 'g(n)',
+        ])
+
+    def expression(self, depth=0):
+        roll = self.random.random()
+        if depth > 2 or roll < .3:
+            return self.atom()
+        if roll < .4:
+            return f'-{self.expression(depth + 1)}'
+        if roll < .55:
+            op = self.random.choice(['<', '==', '>=', '>', '<='])
+            return f'({self.expression(depth + 1)} {op} {self.expression(depth + 1)})'
+        op = self.random.choice(['+', '-', '*', '/', '%', '+', '*'])
+        return f'({self.expression(depth + 1)} {op} {self.expression(depth + 1)})'
+
+    def loop(self, depth):
+        choice = self.random.choice
+        counter = choice(COUNTERS)
+        init = choice(['0', '1', '10', '-3', '0.5', '"x"', 'n', 'k', '(n * 2)'])
+        op = choice(['<', '<=', '>', '>=', '=='])
+        bound = choice(['5', '3', '0', '-2', '2.5', 'n', 'k', '(n + 1)', 's', 'f(2)', f'({counter} + 2)'])
+        update = f'{counter} = {counter} {choice(["+", "+", "-"])} {choice(["1", "2", "0.5", "3", "0"])}'
+        return f'doFor ({counter} = {init}; {counter} {op} {bound}; {update}) {{ {self.block(depth + 1)} }}'
+
+    def statement(self, depth=0):
+        roll = self.random.random()
+        name = self.random.choice(GLOBALS)
+        if depth < 3 and roll < .15:
+            return f'if ({self.expression()}) {{ {self.block(depth + 1)} }} else {{ {self.block(depth + 1)} }}'
+        if depth < 3 and roll < .2:
+            return f'while ({name} < 3) {{ {name} = {name} + 1! {self.block(depth + 1)} }}'
+        if depth < 3 and roll < .35:
+            return self.loop(depth)
+        if roll < .48:
+            return f'print({self.expression()})!'
+        if roll < .5:
+            return f'scan({name})!'
+        if roll < .53:
+            return f'h({self.expression()})!'
+        if roll < .56:
+            return f'{self.random.choice(COUNTERS)} = {self.expression()}!'
+        return f'{name} = {self.expression()}!'
+
+    def block(self, depth):
+        return ' '.join(self.statement(depth) for _ in range(self.random.randint(0, 3)))
+
+def generated_programs(count, seed=0):
+    generator = ProgramGenerator(seed)
+    return [generator.program() for _ in range(count)]
@@ -0,0 +1,86 @@
+# Un artefacto guardado se vuelve a abrir con el mismo programa, tokens y
+# bytecode; uno de otra versión del intérprete, dañado o que otro usuario
+# podría haber modificado se descarta y se compila de nuevo.
+import os
+
+import pytest
+
+import artifacts
+from context import ExecutionContext
+from engines import run_program
+from interpreter import export_variables
+from lexer import tokenize
+from parser import parse_program
+
+SOURCE = '''INICIO
+func doble (m) { return m * 2! }
+t = 0!
+doFor (i = 0; i < 10; i = i + 1) { t = t + doble(i)! }
+a = [1, 2, 3]!
+print(t)!
+print(a * t)!
+FIN'''
+
+def saved_artifact(cache_dir):
+    artifacts.compile_source(SOURCE, str(cache_dir))
+    (path,) = cache_dir.iterdir()
+    return path
+
+def run(program, engine, code=None):
+    context = ExecutionContext()
+    symbol_table = run_program(program, engine, context, code)
+    return export_variables(symbol_table), context.logs
+
+def test_round_trip(tmp_path):
+    path = saved_artifact(tmp_path)
+    assert path.suffix == artifacts.SUFFIX
+    assert path.stat().st_mode & 0o077 == 0
+
+    artifact = artifacts.compile_source(SOURCE, str(tmp_path))
+    assert artifact.buffer is not None
+    assert artifact.program == parse_program(tokenize(SOURCE).columns())
+    assert list(artifact.tokens()) == list(tokenize(SOURCE))
+    expected = run(parse_program(tokenize(SOURCE).columns()), 'tree')
+    assert run(artifact.program, 'tree') == expected
+    assert run(artifact.program, 'vm', artifact.bytecode()) == expected
+
+def test_other_source_is_not_found(tmp_path):
+    saved_artifact(tmp_path)
+    assert artifacts.cached_artifact(SOURCE + ' ', str(tmp_path)) is None
+
+def test_stale_artifact_is_recompiled(tmp_path, monkeypatch):
+    saved_artifact(tmp_path)
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is not None
+    # Lo mismo que pasa al modificar uno de VERSION_MODULES
+    version = artifacts.interpreter_version() + b'\nlexer 0 0'
+    monkeypatch.setattr(artifacts, 'interpreter_version', lambda: version)
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is None
+
+    artifact = artifacts.compile_source(SOURCE, str(tmp_path))
+    assert artifact.buffer is None
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is not None
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='sin dueños de archivo')
+def test_writable_by_others_is_rejected(tmp_path):
+    path = saved_artifact(tmp_path)
+    path.chmod(0o666)
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is None
+
+    # Se reemplaza por uno privado
+    assert artifacts.compile_source(SOURCE, str(tmp_path)).buffer is None
+    assert path.stat().st_mode & 0o077 == 0
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is not None
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='sin dueños de archivo')
+def test_other_owner_is_rejected(tmp_path, monkeypatch):
+    saved_artifact(tmp_path)
+    uid = os.getuid()
+    monkeypatch.setattr(os, 'getuid', lambda: uid + 1)
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is None
+
+def test_truncated_artifact_is_ignored(tmp_path):
+    path = saved_artifact(tmp_path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    assert artifacts.cached_artifact(SOURCE, str(tmp_path)) is None
+    assert run(artifacts.compile_source(SOURCE, str(tmp_path)).program, 'tree')[1] == ['90', '[90, 180, 270]']
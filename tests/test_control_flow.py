@@ -0,0 +1,58 @@
+# Semántica de if/else y while en los dos motores.
+import pytest
+
+from context import ExecutionContext
+from engines import ENGINES, run_program
+from lexer import tokenize
+from parser import parse_program
+
+def run(body, engine, max_steps=10000):
+    program = parse_program(tokenize(f'INICIO\n{body}\nFIN').columns())
+    context = ExecutionContext(max_steps=max_steps)
+    run_program(program, engine, context)
+    return context.logs
+
+def error(body, engine, max_steps=10000):
+    with pytest.raises(SyntaxError) as info:
+        run(body, engine, max_steps)
+    return str(info.value)
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return request.param
+
+@pytest.mark.parametrize('x, expected', [(1, ['uno']), (2, ['dos']), (3, ['otro'])])
+def test_else_if_chain(engine, x, expected):
+    body = f'x = {x}!\nif (x == 1) {{ print("uno")! }} else if (x == 2) {{ print("dos")! }} else {{ print("otro")! }}'
+    assert run(body, engine) == expected
+
+def test_else_runs_only_when_condition_is_false(engine):
+    body = 'x = 1!\nif (x > 0) { print("si")! } else { print("no")! }\nif (x < 0) { print("si")! } else { print("no")! }'
+    assert run(body, engine) == ['si', 'no']
+
+def test_else_after_bang(engine):
+    assert run('if (1 > 2) {\nprint(1)!\n}!\nelse {\nprint(2)!\n}', engine) == ['2']
+
+def test_else_without_if_is_an_error():
+    with pytest.raises(SyntaxError, match='"else" sin un "if" previo'):
+        parse_program(tokenize('INICIO\nelse { x = 1! }\nFIN').columns())
+
+def test_empty_else_is_an_error():
+    with pytest.raises(SyntaxError, match='"else" no puede estar vacío'):
+        parse_program(tokenize('INICIO\nif (1 > 2) { x = 1! } else\nFIN').columns())
+
+def test_while_repeats_until_condition_is_false(engine):
+    assert run('c = 0!\nwhile (c < 3) { c = c + 1! print(c)! }\nprint("fin")!', engine) == ['1', '2', '3', 'fin']
+
+def test_while_with_false_condition_never_runs(engine):
+    assert run('c = 5!\nwhile (c < 3) { print(c)! }\nprint(c)!', engine) == ['5']
+
+def test_nested_while(engine):
+    body = 'a = 0!\nwhile (a < 2) { b = 0! while (b < 2) { print(a * 10 + b)! b = b + 1! } a = a + 1! }'
+    assert run(body, engine) == ['0', '1', '10', '11']
+
+def test_while_condition_must_be_boolean(engine):
+    assert 'Condición no booleana en línea 3' in error('c = 1!\nwhile (c) { c = c - 1! }', engine)
+
+def test_infinite_while_hits_the_step_limit(engine):
+    assert 'Límite de ejecución excedido en la línea 3' in error('c = 0!\nwhile (c < 1) { c = c * 1! }', engine, 500)
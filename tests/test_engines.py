@@ -0,0 +1,54 @@
+# El motor de árbol y la máquina virtual deben dar el mismo resultado para
+# cualquier programa: variables, salida, error, tipos, uso de variables y
+# pasos consumidos.
+import pytest
+
+from context import ExecutionContext
+from engines import run_program
+from interpreter import export_variables
+from lexer import tokenize
+from parser import parse_program
+from programs import generated_programs
+
+INPUT = ['5', 'hola', '2']
+
+def run(source, engine, max_steps):
+    program = parse_program(tokenize(source).columns())
+    context = ExecutionContext(max_steps=max_steps, input_lines=INPUT)
+    try:
+        symbol_table = run_program(program, engine, context)
+    except SyntaxError as e:
+        # El motor de árbol descuenta los pasos de cada sentencia al
+        # ejecutarla y la máquina virtual los de un tramo entero al empezarlo:
+        # al agotarse el límite la salida puede diferir en el último tramo
+        if str(e).startswith('Límite de ejecución'):
+            return ('limit', str(e))
+        return ('error', str(e), context.logs)
+    except RecursionError:
+        return ('recursion', context.logs)
+    return (
+        'ok', export_variables(symbol_table), context.logs, context.types,
+        {name: usage['used'] for name, usage in context.unused_vars.items()},
+        {name: usage['called'] for name, usage in context.unused_fns.items()},
+        context.fuel.steps,
+    )
+
+@pytest.mark.parametrize('seed', range(6))
+def test_generated_programs_match(seed):
+    for index, source in enumerate(generated_programs(80, seed)):
+        try:
+            parse_program(tokenize(source).columns())
+        except SyntaxError:
+            continue
+        max_steps = (200, 3000, 100000)[index % 3]
+        assert run(source, 'tree', max_steps) == run(source, 'vm', max_steps), source
+
+@pytest.mark.parametrize('source', [
+    'INICIO\nfunc fib (m) { if (m < 2) { return m! } return fib(m - 1) + fib(m - 2)! }\nprint(fib(15))!\nFIN',
+    'INICIO\nt = 0!\ndoFor (i = 0; i < 1000; i = i + 1) { t = t + i * 2! }\nprint(t)!\nFIN',
+    'INICIO\na = [1, 2, 3]!\nb = a * 2 + 1!\nprint(b[b > 3])!\nprint(sum(b[1:]))!\nFIN',
+    'INICIO\nx = 0.0!\ny = -0.0!\nprint(x)!\nprint(y)!\nprint([y, x])!\nFIN',
+    'INICIO\nx = 0!\nwhile (x < 5) { x = x + 1! }\nprint(x / 0)!\nFIN',
+])
+def test_programs_match(source):
+    assert run(source, 'tree', 100000) == run(source, 'vm', 100000)
@@ -0,0 +1,49 @@
+# Tras cada edición, el documento incremental debe tener los mismos tokens
+# y comienzos de línea que un análisis completo del texto nuevo, y el tramo
+# que devuelve apply_edit debe bastar para actualizar la lista anterior.
+import os
+import random
+
+import pytest
+
+from incremental import IncrementalDocument
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIECES = list('abc xyz 123 .!"#\n(){}=<+-[]:') + ['if ', 'FIN', 'INICIO', '"', '#', '\n', '\n\n', '\r', ' ']
+
+with open(os.path.join(ROOT, 'ejemplos.txt'), encoding='utf-8') as examples:
+    EXAMPLES = examples.read()
+
+@pytest.mark.parametrize('seed', range(4))
+def test_random_edits_match_full_rescan(seed):
+    rnd = random.Random(seed)
+    document = IncrementalDocument(EXAMPLES if seed % 2 else EXAMPLES[:200])
+    for step in range(400):
+        text = document.text()
+        # Ediciones seguidas en la misma zona, como al escribir, y saltos
+        if rnd.random() < .3:
+            offset = rnd.randint(0, len(text))
+        else:
+            offset = step * 7 % (len(text) + 1)
+        deleted = rnd.randint(0, min(3, len(text) - offset))
+        inserted = ''.join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 5)))
+
+        before = document.all_tokens()
+        start, replaced, tokens = document.apply_edit(offset, deleted, inserted)
+        expected = text[:offset] + inserted + text[offset + deleted:]
+        reference = IncrementalDocument(expected)
+
+        assert document.text() == expected
+        assert document.all_tokens() == reference.all_tokens()
+        assert [document.line_start(i) for i in range(len(document.lines))] == reference.line_starts
+        shift = len(inserted) - deleted
+        # Los tokens posteriores al tramo solo se desplazan
+        patched = before[:start] + tokens + [
+            [kind, value, token_start + shift, size] for kind, value, token_start, size in before[start + replaced:]
+        ]
+        assert patched == reference.all_tokens()
+
+def test_edit_inside_string_relexes_to_its_end():
+    document = IncrementalDocument('INICIO\nx = "hola"!\ny = 1!\nFIN')
+    document.apply_edit(document.text().index('hola'), 0, '"')
+    assert document.all_tokens() == IncrementalDocument(document.text()).all_tokens()
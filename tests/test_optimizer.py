@@ -0,0 +1,44 @@
+# El optimizador no cambia nada de lo que ve el usuario: ni la salida, ni
+# las variables, ni los errores, ni los avisos de variables y funciones sin
+# usar.
+import pytest
+
+from api import compile_source
+from programs import generated_programs
+
+VISIBLE_FIELDS = ('error', 'position', 'logs', 'variables', 'warnings', 'warnings_fns')
+
+def visible(source, should_optimize):
+    response, status = compile_source({
+        'code': source, 'optimize': should_optimize, 'input': '5\nhola\n2', 'max_steps': 100000,
+    })
+    # Con menos sentencias que ejecutar, el límite de pasos puede agotarse
+    # en otro punto del programa
+    if response.get('error', '').startswith('Límite de ejecución'):
+        return status, 'limit'
+    return status, {field: response.get(field) for field in VISIBLE_FIELDS}
+
+@pytest.mark.parametrize('seed', range(4))
+def test_generated_programs_match(seed):
+    for source in generated_programs(60, seed):
+        assert visible(source, False) == visible(source, True), source
+
+@pytest.mark.parametrize('source', [
+    # x solo se lee en una rama que no se ejecuta: sigue sin usarse
+    'INICIO\nx = 1!\ny = 5!\nif (y > 10) { print(x)! }\nFIN',
+    'INICIO\nx = 2!\ndoFor (i = 0; i < 0; i = i + 1) { print(x * 3)! }\nFIN',
+    'INICIO\nlimite = 3!\nc = 0!\nwhile (c < limite) { c = c + 1! }\nprint(c)!\nFIN',
+    'INICIO\ndebug = 1 > 2!\nif (debug) { print("traza")! } else { print(1 + 2 * 3)! }\nFIN',
+    'INICIO\nx = 1!\nprint(x / 0)!\nFIN',
+])
+def test_programs_match(source):
+    assert visible(source, False) == visible(source, True)
+
+def test_optimizations_are_reported():
+    response, _ = compile_source({
+        'code': 'INICIO\nx = 2 * 3!\nif (x > 10) { print("grande")! }\nprint(x)!\nFIN',
+        'optimize': True,
+    })
+    assert response['optimizations']['folded'] >= 1
+    assert response['optimizations']['propagated'] >= 1
+    assert response['logs'] == ['6']
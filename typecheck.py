@@ -0,0 +1,205 @@
+# Inferencia de tipos antes de ejecutar. Asigna number, string o boolean a cada
+# variable cuyo tipo se puede probar sin ejecutar: todas sus asignaciones, en
+# cualquier parte del programa, producen ese mismo tipo. Las que lee scan o
+# que son parámetros de alguna función quedan sin tipo (su valor depende de la
+# entrada o de quien llama), igual que las que reciben el valor de una llamada.
+#
+# `annotate_types` marca en el AST lo que ya no hace falta comprobar al
+# ejecutar (Assign.typed, If/While/DoFor.typed) y devuelve los conflictos
+# entre asignaciones de tipos conocidos. El intérprete de árbol usa las marcas
+# para saltarse la comprobación de tipo de la asignación y la de la condición
+# en cada vuelta de un bucle. Un conflicto sigue siendo un error solo si las
+# dos asignaciones llegan a ejecutarse, como siempre. En la misma pasada se
+# marcan los bucles contados (loops.py).
+from loops import annotate_loops
+from nodes import (
+    Block, If, While, DoFor, Scan, Assign, FuncDef, Profiled,
+    Literal, Name, UnaryOp, BinOp, Compare, Call, ArrayLiteral, Index, Slice,
+)
+
+# Tipo de un valor constante, como interpreter.determine_type
+def literal_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    return None
+
+# Tipo del valor de una expresión, si la evaluación termina sin error, a
+# partir de los tipos conocidos de las variables; None si no se puede saber
+# sin ejecutar (una llamada, una operación cuyo resultado depende de los
+# valores). Una comparación es boolean salvo entre arreglos, donde da otro
+# arreglo, así que necesita conocer el tipo de sus operandos; con
+# `arrays=False` (un programa sin arreglos) siempre es boolean.
+def expression_type(node, types, arrays=True):
+    node_type = type(node)
+    if node_type is Literal:
+        return literal_type(node.value)
+    if node_type is Name:
+        return types.get(node.id)
+    if node_type is Compare:
+        if not arrays:
+            return 'boolean'
+        operand_types = [expression_type(node.left, types)]
+        operand_types.extend(expression_type(comparator, types) for comparator in node.comparators)
+        if None in operand_types:
+            return None
+        return 'array' if 'array' in operand_types else 'boolean'
+    if node_type is UnaryOp:
+        operand = expression_type(node.operand, types, arrays)
+        return operand if operand in ('number', 'array') else None
+    if node_type is BinOp:
+        left = expression_type(node.left, types, arrays)
+        right = expression_type(node.right, types, arrays)
+        if left is None or right is None:
+            return None
+        # Un arreglo opera elemento a elemento con números y otros arreglos
+        if 'array' in (left, right):
+            return 'array' if 'string' not in (left, right) else None
+        if left != right:
+            return None
+        if node.op in ('&', '|'):
+            return left if left == 'boolean' else None
+        if left == 'number' or (left == 'string' and node.op == '+'):
+            return left
+    if node_type is ArrayLiteral or node_type is Slice:
+        return 'array'
+    return None
+
+# Asignaciones, condiciones y variables sin tipo posible del programa, en
+# orden de aparición
+class ProgramFacts:
+    def __init__(self, program):
+        self.assignments = []
+        self.conditions = []
+        self.untyped = set()
+        self.arrays = program.arrays
+        self.collect(program.body)
+
+    def collect(self, statements):
+        for node in statements:
+            node_type = type(node)
+            if node_type is Profiled:
+                self.collect([node.statement])
+            elif node_type is Assign:
+                self.assignments.append(node)
+            elif node_type is Scan:
+                self.untyped.add(node.name)
+            elif node_type is Block:
+                self.collect(node.statements)
+            elif node_type is If:
+                self.conditions.append(node)
+                self.collect(node.body.statements)
+                if node.orelse is not None:
+                    self.collect([node.orelse])
+            elif node_type is While:
+                self.conditions.append(node)
+                self.collect(node.body.statements)
+            elif node_type is DoFor:
+                self.conditions.append(node)
+                self.collect([node.init, node.update])
+                self.collect(node.body.statements)
+            elif node_type is FuncDef:
+                self.untyped.update(node.params)
+                self.collect(node.body.statements)
+
+# Devuelve ({variable: tipo} de las variables con tipo probado, conflictos).
+# Cada conflicto es (línea, variable, tipo anterior, tipo nuevo).
+def infer_types(program):
+    return infer_facts(ProgramFacts(program))
+
+def infer_facts(facts):
+    untyped, arrays = facts.untyped, facts.arrays
+    assignments = [node for node in facts.assignments if node.name not in untyped]
+
+    # Asignaciones que leen cada variable: cuando una variable gana o pierde
+    # su tipo solo se vuelven a mirar esas, así que cada asignación se revisa
+    # una vez más por cada variable que lee y no por cada vuelta completa
+    readers = {}
+    for node in assignments:
+        for name in names_read(node.value, []):
+            readers.setdefault(name, []).append(node)
+
+    # Primero cada variable toma el tipo de la primera asignación que se
+    # puede tipar (x = 0 tipa después a y = x + 1 aunque y se asigne antes)
+    types = {}
+    pending = assignments[::-1]
+    while pending:
+        node = pending.pop()
+        if node.name in types:
+            continue
+        value_type = expression_type(node.value, types, arrays)
+        if value_type is not None:
+            types[node.name] = value_type
+            pending.extend(reversed(readers.get(node.name, ())))
+
+    # Después se comprueba que todas las asignaciones producen ese tipo; la
+    # variable que no lo cumple pierde su tipo, lo que puede dejar sin tipo a
+    # otras que dependían de ella
+    conflicts = []
+    pending = assignments[::-1]
+    while pending:
+        node = pending.pop()
+        existing_type = types.get(node.name)
+        if existing_type is None:
+            continue
+        value_type = expression_type(node.value, types, arrays)
+        if value_type != existing_type:
+            if value_type is not None:
+                conflicts.append((node.line, node.name, existing_type, value_type))
+            del types[node.name]
+            pending.extend(readers.get(node.name, ()))
+    conflicts.sort()
+    return types, conflicts
+
+# Agrega a `names` las variables que lee la expresión
+def names_read(node, names):
+    node_type = type(node)
+    if node_type is Name:
+        names.append(node.id)
+    elif node_type is BinOp:
+        names_read(node.left, names)
+        names_read(node.right, names)
+    elif node_type is Compare:
+        names_read(node.left, names)
+        for comparator in node.comparators:
+            names_read(comparator, names)
+    elif node_type is UnaryOp:
+        names_read(node.operand, names)
+    elif node_type is Call:
+        for arg in node.args:
+            names_read(arg, names)
+    elif node_type is ArrayLiteral:
+        for element in node.elements:
+            names_read(element, names)
+    elif node_type is Index:
+        names_read(node.value, names)
+        names_read(node.index, names)
+    elif node_type is Slice:
+        names_read(node.value, names)
+        for bound in (node.start, node.stop):
+            if bound is not None:
+                names_read(bound, names)
+    return names
+
+# Marca el AST con los tipos probados y devuelve los conflictos. Se puede
+# llamar más de una vez sobre el mismo programa (p. ej. el de la caché): las
+# marcas dependen solo del programa.
+def annotate_types(program):
+    facts = ProgramFacts(program)
+    types, conflicts = infer_facts(facts)
+    for node in facts.assignments:
+        node.typed = node.name in types
+    for node in facts.conditions:
+        node.typed = expression_type(node.condition, types, facts.arrays) == 'boolean'
+    annotate_loops(node for node in facts.conditions if type(node) is DoFor)
+    program.typed = True
+    return conflicts
+
+def conflict_warnings(conflicts):
+    return [
+        f'⚠️ Línea {line_num}: Variable "{name}" es de tipo {existing_type}, se le asigna {new_type}'
+        for line_num, name, existing_type, new_type in conflicts
+    ]
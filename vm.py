@@ -0,0 +1,325 @@
+# Máquina virtual de pila que ejecuta el bytecode generado por compiler.py.
+# Un único ciclo de despacho recorre el arreglo de instrucciones; las
+# variables viven en arreglos indexados por slot y las llamadas apilan marcos
+# en lugar de usar la recursión de Python. Las instrucciones se comparan en
+# el orden en que más se ejecutan en un bucle: primero las combinadas, que
+# reemplazan a las secuencias más comunes (compiler.py).
+from compiler import (
+    LOAD_CONST, LOAD_FAST, STORE_FAST, LOAD_GLOBAL,
+    BINARY_OP, UNARY_NEG, UNARY_POS, JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP,
+    DUP_TOP, ROT_TWO, ROT_THREE, POP_TOP, PRINT, DEFINE_FUNC, CALL, RETURN, TICK, SCAN, FOR_STEP,
+    BUILD_ARRAY, INDEX, SLICE,
+    BINARY_FAST_CONST, BINARY_FAST_FAST, BINARY_CONST, BINARY_FAST,
+    COMPARE_FAST_CONST_JUMP, COMPARE_FAST_FAST_JUMP, INPLACE_FAST_CONST,
+    LOAD_HOISTED, STORE_HOISTED, CLEAR_HOISTED, is_variable,
+)
+from evaluator import expression_error, format_value, COMPARISON_OPERATORS
+from interpreter import determine_type
+from arrays import BUILTINS, call_builtin, display_value, make_array, index_array, slice_array
+from context import ExecutionContext
+
+# Marca de slot sin asignar (variable aún no definida)
+UNSET = object()
+
+def run(main, context=None):
+    if context is None:
+        context = ExecutionContext()
+    logs, types = context.logs, context.types
+    unused_vars, unused_fns = context.unused_vars, context.unused_fns
+    fuel = context.fuel
+    max_depth = context.max_depth
+    functions = {}
+    global_slots = [UNSET] * len(main.varnames)
+    used_flags = {main: [False] * len(main.varnames)}
+
+    code = main
+    instructions = code.instructions
+    consts = code.consts
+    slots = global_slots
+    used = used_flags[main]
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    frames = []
+    pc = 0
+    left = right = None
+    steps = fuel.steps
+    limit = fuel.limit
+
+    try:
+        while True:
+            opcode, arg = instructions[pc]
+            pc += 1
+
+            if opcode == BINARY_OP:
+                function, _ = arg
+                right = pop()
+                left = stack[-1]
+                stack[-1] = function(left, right)
+            elif opcode == TICK:
+                steps += arg[0]
+                if steps > limit:
+                    fuel.steps = steps
+                    fuel.checkpoint(step_line(arg, steps, fuel.max_steps))
+                    limit = fuel.limit
+            elif opcode == STORE_FAST:
+                value = pop()
+                current = slots[arg]
+                if current is UNSET:
+                    var_name = code.varnames[arg]
+                    unused_vars[var_name] = {'value': value, 'used': False}
+                    types[var_name] = determine_type(value)
+                elif type(value) is not type(current):
+                    check_type(code, arg, value, types, pc)
+                slots[arg] = value
+            elif opcode == BINARY_FAST_CONST:
+                slot, right, function, _ = arg
+                left = slots[slot]
+                if left is UNSET:
+                    raise undefined_variable(code, slot, pc)
+                used[slot] = True
+                push(function(left, right))
+            elif opcode == LOAD_FAST:
+                value = slots[arg]
+                if value is UNSET:
+                    raise undefined_variable(code, arg, pc)
+                used[arg] = True
+                push(value)
+            elif opcode == BINARY_FAST_FAST:
+                left_slot, right_slot, function, _ = arg
+                left = slots[left_slot]
+                if left is UNSET:
+                    raise undefined_variable(code, left_slot, pc)
+                right = slots[right_slot]
+                if right is UNSET:
+                    raise undefined_variable(code, right_slot, pc)
+                used[left_slot] = used[right_slot] = True
+                push(function(left, right))
+            elif opcode == COMPARE_FAST_CONST_JUMP:
+                slot, right, function, _, target = arg
+                left = slots[slot]
+                if left is UNSET:
+                    raise undefined_variable(code, slot, pc)
+                used[slot] = True
+                condition = function(left, right)
+                if condition is False:
+                    pc = target
+                elif condition is not True:
+                    raise SyntaxError(code.errors[pc - 1])
+            elif opcode == FOR_STEP:
+                # Con números del mismo tipo que el paso, la suma y la
+                # comparación no pueden fallar ni cambiar el tipo del contador
+                slot, step, op, bound_slot, bound_global, bound, body_start, loop_end = arg
+                value = slots[slot]
+                if bound_slot is not None:
+                    bound = global_slots[bound_slot] if bound_global else slots[bound_slot]
+                if type(value) is type(step) and (type(bound) is int or type(bound) is float):
+                    value = value + step
+                    slots[slot] = value
+                    pc = body_start if COMPARISON_OPERATORS[op](value, bound) else loop_end
+            elif opcode == BINARY_CONST:
+                right, function, _ = arg
+                left = stack[-1]
+                stack[-1] = function(left, right)
+            elif opcode == INPLACE_FAST_CONST:
+                slot, right, function, _ = arg
+                left = slots[slot]
+                if left is UNSET:
+                    raise undefined_variable(code, slot, pc)
+                used[slot] = True
+                value = function(left, right)
+                if type(value) is not type(left):
+                    check_type(code, slot, value, types, pc)
+                slots[slot] = value
+            elif opcode == JUMP:
+                pc = arg
+            elif opcode == LOAD_CONST:
+                push(consts[arg])
+            elif opcode == BINARY_FAST:
+                slot, function, _ = arg
+                right = slots[slot]
+                if right is UNSET:
+                    raise undefined_variable(code, slot, pc)
+                used[slot] = True
+                left = stack[-1]
+                stack[-1] = function(left, right)
+            elif opcode == COMPARE_FAST_FAST_JUMP:
+                left_slot, right_slot, function, _, target = arg
+                left = slots[left_slot]
+                if left is UNSET:
+                    raise undefined_variable(code, left_slot, pc)
+                right = slots[right_slot]
+                if right is UNSET:
+                    raise undefined_variable(code, right_slot, pc)
+                used[left_slot] = used[right_slot] = True
+                condition = function(left, right)
+                if condition is False:
+                    pc = target
+                elif condition is not True:
+                    raise SyntaxError(code.errors[pc - 1])
+            elif opcode == JUMP_IF_FALSE:
+                condition = pop()
+                if condition is False:
+                    pc = arg
+                elif condition is not True:
+                    raise SyntaxError(code.errors[pc - 1])
+            elif opcode == CALL:
+                func_name, nargs, wants_value = arg
+                func = functions.get(func_name)
+                if func is None:
+                    if func_name not in BUILTINS:
+                        raise SyntaxError(f'Función no definida: {func_name}')
+                    # Las predefinidas se ejecutan sin marco
+                    args = stack[len(stack) - nargs:]
+                    del stack[len(stack) - nargs:]
+                    value = call_builtin(func_name, args, code.lines[pc - 1])
+                    if wants_value:
+                        push(value)
+                    continue
+                if nargs != len(func.params):
+                    raise SyntaxError(f'Número incorrecto de argumentos para {func_name}')
+                if len(frames) >= max_depth:
+                    raise SyntaxError(f'Error en línea {code.lines[pc - 1]}: se superó el límite de {max_depth} llamadas anidadas al llamar a {func_name}.')
+
+                # Nuevo marco: parámetros en los primeros slots y copia de las
+                # variables globales que la función reasigna
+                new_slots = [UNSET] * len(func.varnames)
+                if nargs:
+                    new_slots[:nargs] = stack[-nargs:]
+                    del stack[-nargs:]
+                for local_slot, global_slot in func.copy_in:
+                    new_slots[local_slot] = global_slots[global_slot]
+
+                frames.append((code, pc, slots, used, wants_value))
+                code = func
+                instructions = code.instructions
+                consts = code.consts
+                slots = new_slots
+                used = used_flags[func]
+                pc = 0
+            elif opcode == RETURN:
+                if not frames:
+                    break
+                # El valor devuelto (None si no hubo return) está en la pila
+                value = pop()
+                func_name = code.name
+                unused_fns[func_name]['called'] = True
+                code, pc, slots, used, wants_value = frames.pop()
+                instructions = code.instructions
+                consts = code.consts
+                if wants_value:
+                    if value is None:
+                        raise SyntaxError(f'Error en línea {code.lines[pc - 1]}: la función {func_name} no devolvió ningún valor.')
+                    push(value)
+            elif opcode == LOAD_GLOBAL:
+                value = global_slots[arg]
+                if value is UNSET:
+                    raise SyntaxError(f'Variable no definida en la línea {code.lines[pc - 1]}: {main.varnames[arg]}')
+                used_flags[main][arg] = True
+                push(value)
+            elif opcode == LOAD_HOISTED:
+                slot, target = arg
+                value = slots[slot]
+                if value is not UNSET:
+                    push(value)
+                    pc = target
+            elif opcode == STORE_HOISTED:
+                slots[arg] = stack[-1]
+            elif opcode == CLEAR_HOISTED:
+                for slot in arg:
+                    slots[slot] = UNSET
+            elif opcode == PRINT:
+                logs.append(display_value(pop()))
+            elif opcode == UNARY_NEG:
+                left = stack[-1]
+                stack[-1] = -left
+            elif opcode == UNARY_POS:
+                left = stack[-1]
+                stack[-1] = +left
+            elif opcode == JUMP_IF_FALSE_OR_POP:
+                condition = stack[-1]
+                if condition is False:
+                    pc = arg
+                elif condition is True:
+                    pop()
+                else:
+                    raise SyntaxError(f'Error evaluando la expresión en la línea {code.lines[pc - 1]}: una comparación encadenada no admite arreglos')
+            elif opcode == DUP_TOP:
+                push(stack[-1])
+            elif opcode == ROT_TWO:
+                stack[-1], stack[-2] = stack[-2], stack[-1]
+            elif opcode == ROT_THREE:
+                stack.insert(-2, pop())
+            elif opcode == POP_TOP:
+                pop()
+            elif opcode == SCAN:
+                push(context.read_input(code.lines[pc - 1]))
+            elif opcode == BUILD_ARRAY:
+                values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                push(make_array(values, code.lines[pc - 1]))
+            elif opcode == INDEX:
+                right = pop()
+                stack[-1] = index_array(stack[-1], right, code.lines[pc - 1])
+            elif opcode == SLICE:
+                has_start, has_stop = arg
+                stop = pop() if has_stop else None
+                start = pop() if has_start else None
+                stack[-1] = slice_array(stack[-1], start, stop, code.lines[pc - 1])
+            elif opcode == DEFINE_FUNC:
+                func = consts[arg]
+                functions[func.name] = func
+                used_flags.setdefault(func, [False] * len(func.varnames))
+                unused_fns[func.name] = {
+                    'params': func.params,
+                    'called': False,
+                }
+            else:
+                raise SyntaxError(f'Instrucción desconocida en la línea {code.lines[pc - 1]}: {opcode}')
+    except SyntaxError:
+        fuel.steps = steps
+        raise
+    except Exception as e:
+        fuel.steps = steps
+        opcode, op = instructions[pc - 1]
+        if type(op) is tuple:
+            # Instrucción combinada: (..., función, op[, destino])
+            op = op[3] if opcode == COMPARE_FAST_CONST_JUMP or opcode == COMPARE_FAST_FAST_JUMP else op[-1]
+        if opcode in (UNARY_NEG, UNARY_POS):
+            expr = f'{op}{format_value(left)}'
+        else:
+            expr = f'{format_value(left)} {op} {format_value(right)}'
+        raise expression_error(e, expr, code.lines[pc - 1]) from None
+
+    fuel.steps = steps
+
+    # Volcar las marcas de uso de cada slot al registro de variables
+    for func_code, flags in used_flags.items():
+        for var_name, was_used in zip(func_code.varnames, flags):
+            if was_used and var_name in unused_vars:
+                unused_vars[var_name]['used'] = True
+
+    symbol_table = context.symbol_table
+    symbol_table['__funciones__'] = functions
+    for var_name, value in zip(main.varnames, global_slots):
+        if value is not UNSET and is_variable(var_name):
+            symbol_table[var_name] = value
+    return symbol_table
+
+def undefined_variable(code, slot, pc):
+    return SyntaxError(f'Variable no definida en la línea {code.lines[pc - 1]}: {code.varnames[slot]}')
+
+# Una variable con tipo conocido no puede recibir un valor de otro tipo
+def check_type(code, slot, value, types, pc):
+    var_name = code.varnames[slot]
+    existing_type = types.get(var_name)
+    new_type = determine_type(value)
+    if existing_type is not None and existing_type != new_type:
+        raise SyntaxError(f'Error en línea {code.lines[pc - 1]}: Variable "{var_name}" es de tipo {existing_type}, no se puede asignar {new_type}')
+
+# Línea del paso que agotó el presupuesto dentro de un TICK; si lo que se
+# agotó fue el tiempo, basta con la primera sentencia del tramo
+def step_line(arg, steps, max_steps):
+    count, step_lines = arg
+    over = steps - max_steps if max_steps is not None else 0
+    return step_lines[count - over] if over > 0 else step_lines[0]
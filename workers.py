@@ -0,0 +1,125 @@
+# Pool de procesos de ejecución. Cada trabajador es un proceso ya iniciado
+# (con los módulos importados) que recibe trabajos por un pipe, los ejecuta
+# con su propio estado del intérprete y devuelve el resultado por el mismo
+# pipe. Así varias compilaciones corren en paralelo en todos los núcleos sin
+# compartir el intérprete ni el GIL.
+#
+# Configuración por variables de entorno:
+#   CUSTOMLANG_WORKERS          procesos del pool (por defecto, uno por núcleo;
+#                               0 ejecuta en el mismo hilo de la petición)
+#   CUSTOMLANG_WORKER_MAX_JOBS  trabajos antes de reciclar un proceso
+#   CUSTOMLANG_WORKER_TIMEOUT   segundos antes de matar un trabajo colgado
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from contextlib import closing
+
+from fuel import MAX_TIMEOUT
+
+POOL_SIZE = int(os.environ.get('CUSTOMLANG_WORKERS', os.cpu_count() or 1))
+MAX_JOBS_PER_WORKER = int(os.environ.get('CUSTOMLANG_WORKER_MAX_JOBS', 500))
+
+# Respaldo por si un trabajo no vuelve: el presupuesto de fuel.py ya corta los
+# programas largos con un error limpio, esto cubre lo que no se mide en pasos
+JOB_TIMEOUT = float(os.environ.get('CUSTOMLANG_WORKER_TIMEOUT', MAX_TIMEOUT + 5))
+
+# Bucle de cada proceso trabajador. `target(job, emit)` devuelve (respuesta,
+# estado); si el trabajo pide flujo, cada evento que produce se envía por el
+# pipe en cuanto ocurre. El pipe tiene un búfer acotado del sistema: si el
+# servidor no lee, el trabajador espera.
+def worker_main(conn, target):
+    while True:
+        try:
+            job, stream = conn.recv()
+        except (EOFError, OSError):
+            break
+        emit = (lambda event: conn.send(('event', event))) if stream else None
+        try:
+            result = target(job, emit)
+        except Exception as e:
+            result = ({'error': f'Error interno del ejecutor: {e}'}, 500)
+        conn.send(('result', result))
+
+class Worker:
+    def __init__(self, context, target):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, target), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+class WorkerPool:
+    def __init__(self, target, size=POOL_SIZE, max_jobs=MAX_JOBS_PER_WORKER, timeout=JOB_TIMEOUT):
+        # forkserver crea los procesos desde un servidor de un solo hilo: hacer
+        # fork directamente desde un servidor con hilos puede heredar locks tomados
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.target = target
+        self.size = size
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.idle = queue.Queue()
+        self.recycled = 0
+        self.lock = threading.Lock()
+        for _ in range(size):
+            self.idle.put(Worker(self.context, target))
+
+    def submit(self, job):
+        with closing(self.stream(job, events=False)) as messages:
+            for kind, payload in messages:
+                if kind == 'result':
+                    return payload
+
+    # Mensajes del trabajo a medida que llegan: ('event', dict) y al final
+    # ('result', (respuesta, estado))
+    def stream(self, job, events=True):
+        worker = self.idle.get()
+        if not worker.process.is_alive():
+            worker = self.replace(worker)
+        finished = False
+        try:
+            worker.conn.send((job, events))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                    worker, finished = self.replace(worker), True
+                    yield 'result', ({'error': f'La ejecución superó {self.timeout:g} s y se canceló.'}, 400)
+                    return
+                kind, payload = worker.conn.recv()
+                if kind == 'result':
+                    finished = True
+                    worker.jobs += 1
+                    if worker.jobs >= self.max_jobs:
+                        worker = self.replace(worker)
+                yield kind, payload
+                if finished:
+                    return
+        except (EOFError, OSError):
+            worker, finished = self.replace(worker), True
+            yield 'result', ({'error': 'El proceso de ejecución terminó inesperadamente.'}, 500)
+        finally:
+            # Si el cliente se fue a mitad del flujo, el trabajador sigue
+            # enviando mensajes de ese trabajo: se reemplaza
+            if not finished:
+                worker = self.replace(worker)
+            self.idle.put(worker)
+
+    def replace(self, worker):
+        worker.stop()
+        with self.lock:
+            self.recycled += 1
+        return Worker(self.context, self.target)
+
+    def stats(self):
+        return {'workers': self.size, 'idle': self.idle.qsize(), 'recycled': self.recycled}
+
+    def close(self):
+        for _ in range(self.size):
+            self.idle.get().stop()